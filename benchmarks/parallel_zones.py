@@ -0,0 +1,64 @@
+"""
+Benchmark serial against process-pool zone generation.
+
+Zones are generated for the districts of a simulated city whose populations
+are scaled up, so every district holds many zones. Each run is checked to give
+the same zones as the serial run.
+
+Worker processes have to pickle districts and zones and start interpreters,
+so the pool is slower than serial generation unless several cores are free
+and districts hold many zones. On a single CPU it only measures that overhead.
+
+Usage:
+    python -m benchmarks.parallel_zones [--zones-per-district N] [--workers 2 4]
+"""
+
+import argparse
+import os
+import time
+from dataclasses import replace
+
+from metro.city_simulator import CitySimulator
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--population", type=int, default=1000000)
+    parser.add_argument("--zones-per-district", type=int, default=20000)
+    parser.add_argument("--rng-mode", default="sequential")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    args = parser.parse_args()
+
+    simulator = CitySimulator({"seed": args.seed, "rng_mode": args.rng_mode})
+    layout = simulator.simulate_city(args.population)
+    districts = [
+        replace(d, population=args.zones_per_district * 10000) for d in layout.districts
+    ]
+    print(
+        f"{len(districts)} districts, {args.zones_per_district} zones each, "
+        f"{os.cpu_count()} CPUs"
+    )
+    if (os.cpu_count() or 1) < 2:
+        print("single CPU: timings show process pool overhead only")
+
+    def run(workers):
+        # A fresh simulator so every run starts from unconsumed streams
+        fresh = CitySimulator({"seed": args.seed, "rng_mode": args.rng_mode})
+        start = time.perf_counter()
+        zones = fresh._generate_zones(districts, args.population, workers)
+        return zones, time.perf_counter() - start
+
+    serial, serial_time = run(None)
+    print(f"serial      {serial_time:8.3f} s")
+    for workers in args.workers:
+        zones, elapsed = run(workers)
+        assert zones == serial, "parallel zones differ from serial zones"
+        print(
+            f"workers={workers:<3} {elapsed:8.3f} s  "
+            f"{serial_time / elapsed:.2f}x serial throughput"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+Scaling benchmarks for the simulation pipeline.
+
+Every case runs once per population tier (the tiers of
+CitySeedManager._get_population_tier) in a fresh process, recording the best
+and median wall time over the repeats, the peak resident set size of the
+process and the size of the case's JSON output. Results are written to a JSON
+file and can be compared against a stored baseline.
+
+Usage:
+    python -m benchmarks.suite [--tiers small medium] [--cases simulate_city]
+        [--output results.json] [--baseline benchmarks/baseline.json]
+        [--time-threshold 0.25] [--rss-threshold 0.25] [--size-threshold 0.05]
+        [--min-time-delta 0.005] [--save-baseline]
+"""
+
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+
+# Population tiers, one population per tier of _get_population_tier
+TIERS = {
+    "small": 1000,
+    "medium": 10000,
+    "large": 100000,
+    "metropolitan": 500000,
+    "megalopolis": 1000000,
+}
+
+SEED = 42
+
+
+def bench_simulate_city(population: int) -> Callable[[], Any]:
+    """CitySimulator.simulate_city, output measured as its JSON export."""
+    from metro.city_simulator import CitySimulator
+
+    def run() -> Any:
+        simulator = CitySimulator({"seed": SEED, "population": population})
+        simulator.simulate_city(population)
+        return simulator
+
+    return run
+
+
+def bench_temporal_evolution(population: int) -> Callable[[], Any]:
+    """TemporalCitySimulator.simulate_city_evolution."""
+    from metro.temporal_simulator import TemporalCitySimulator
+
+    def run() -> Any:
+        simulator = TemporalCitySimulator({"seed": SEED, "population": population})
+        simulator.simulate_city_evolution(population)
+        return simulator.export_temporal_data()
+
+    return run
+
+
+def bench_population_model(population: int) -> Callable[[], Any]:
+    """PopulationModel in its default (legacy) sampling mode."""
+    import random
+
+    from metro.population import PopulationModel
+
+    def run() -> Any:
+        model = PopulationModel(random.Random(SEED), population)
+        return {"histogram": model.histogram, "zones": model.zones}
+
+    return run
+
+
+def bench_export_city_data(population: int) -> Callable[[], Any]:
+    """export_city_data and JSON encoding of a simulated city."""
+    from metro.city_simulator import CitySimulator
+
+    simulator = CitySimulator({"seed": SEED, "population": population})
+    simulator.simulate_city(population)
+
+    def run() -> Any:
+        return json.dumps(simulator.export_city_data())
+
+    return run
+
+
+CASES: Dict[str, Callable[[int], Callable[[], Any]]] = {
+    "simulate_city": bench_simulate_city,
+    "temporal_evolution": bench_temporal_evolution,
+    "population_model": bench_population_model,
+    "export_city_data": bench_export_city_data,
+}
+
+
+def output_size(result: Any) -> int:
+    """Get the size in bytes of a case result serialized as JSON."""
+    if hasattr(result, "export_city_data"):
+        result = result.export_city_data()
+    if not isinstance(result, str):
+        result = json.dumps(result)
+    return len(result.encode("utf-8"))
+
+
+def run_case(case: str, tier: str, repeat: int) -> Dict[str, Any]:
+    """Run one benchmark case in the current process."""
+    run = CASES[case](TIERS[tier])
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        times.append(time.perf_counter() - start)
+
+    return {
+        "population": TIERS[tier],
+        "time": min(times),
+        "median_time": statistics.median(times),
+        "repeat": repeat,
+        # ru_maxrss is in KiB on Linux
+        "peak_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "output_bytes": output_size(result),
+    }
+
+
+def _child(case: str, tier: str, repeat: int, queue: Any) -> None:
+    """Process entry point reporting run_case results through a queue."""
+    try:
+        queue.put(run_case(case, tier, repeat))
+    except Exception as e:  # reported by the parent
+        queue.put({"error": f"{type(e).__name__}: {e}"})
+
+
+def run_isolated(case: str, tier: str, repeat: int) -> Dict[str, Any]:
+    """Run one benchmark case in a fresh process so peak RSS is its own."""
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_child, args=(case, tier, repeat, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def compare(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    thresholds: Dict[str, float],
+    min_deltas: Optional[Dict[str, float]] = None,
+) -> List[Tuple[str, str, float, float]]:
+    """
+    Find results that regressed against a baseline.
+
+    Args:
+        results: Benchmark key to measurements
+        baseline: Benchmark key to baseline measurements
+        thresholds: Measurement name to allowed relative increase
+        min_deltas: Measurement name to absolute increase below which a
+            change is treated as noise
+
+    Returns:
+        List of (benchmark key, measurement, baseline value, new value) for
+        every measurement exceeding its threshold
+    """
+    regressions = []
+    for key, measured in results.items():
+        reference = baseline.get(key)
+        if reference is None or "error" in measured:
+            continue
+        for name, threshold in thresholds.items():
+            old, new = reference.get(name), measured.get(name)
+            if old is None or new is None:
+                continue
+            min_delta = (min_deltas or {}).get(name, 0)
+            if new > old * (1 + threshold) and new - old > min_delta:
+                regressions.append((key, name, old, new))
+    return regressions
+
+
+def environment() -> Dict[str, Any]:
+    """Describe the machine the benchmarks ran on."""
+    import numpy
+
+    return {
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": multiprocessing.cpu_count(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the Metro scaling benchmarks.")
+    parser.add_argument("--tiers", nargs="+", choices=list(TIERS), default=list(TIERS))
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, default=Path("benchmark_results.json"))
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--time-threshold",
+        type=float,
+        default=0.25,
+        help="allowed relative increase of the best time",
+    )
+    parser.add_argument(
+        "--rss-threshold",
+        type=float,
+        default=0.25,
+        help="allowed relative increase of the peak RSS",
+    )
+    parser.add_argument(
+        "--min-time-delta",
+        type=float,
+        default=0.005,
+        help="time increase in seconds below which changes are noise",
+    )
+    parser.add_argument(
+        "--size-threshold",
+        type=float,
+        default=0.05,
+        help="allowed relative increase of the output size",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="write the results to the baseline file instead of comparing",
+    )
+    args = parser.parse_args()
+
+    results = {}
+    for case in args.cases:
+        for tier in args.tiers:
+            key = f"{case}/{tier}"
+            result = run_isolated(case, tier, args.repeat)
+            results[key] = result
+            if "error" in result:
+                print(f"{key:36} ERROR {result['error']}")
+            else:
+                print(
+                    f"{key:36} {result['time']:9.4f} s "
+                    f"{result['peak_rss'] / 2**20:8.1f} MiB "
+                    f"{result['output_bytes']:>10} B"
+                )
+
+    document = {"environment": environment(), "results": results}
+    args.output.write_text(json.dumps(document, indent=2) + "\n")
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(document, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create it")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())["results"]
+    thresholds = {
+        "time": args.time_threshold,
+        "peak_rss": args.rss_threshold,
+        "output_bytes": args.size_threshold,
+    }
+    regressions = compare(results, baseline, thresholds, {"time": args.min_time_delta})
+    for key, name, old, new in regressions:
+        print(f"REGRESSION {key} {name}: {old:.6g} -> {new:.6g} ({new / old - 1:+.1%})")
+    if not regressions:
+        print(f"No regressions against {args.baseline}")
+    errors = any("error" in result for result in results.values())
+    return 1 if regressions or errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,19 +5,32 @@ This module provides a REST API for the Metro city generation system,
 allowing the web interface to request city simulations from the Python backend.
 """
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory
 import json
 import os
-from typing import Dict, Any
+from dataclasses import asdict
+from typing import Dict, Any, Optional
 
+from .binary_format import MEDIA_TYPE
 from .city_simulator import CitySimulator, simulate_city_from_config
+from .json_stream import COORDINATE_FIELDS, iter_city_json
 from .seed_system import CitySeedManager
+from .stage_cache import StageCache
 
 
-def create_app():
-    """Create and configure the Flask application."""
+def create_app(stage_cache_dir: Optional[str] = None) -> Flask:
+    """
+    Create and configure the Flask application.
+
+    Args:
+        stage_cache_dir: Directory for the simulation stage cache; defaults
+            to the METRO_STAGE_CACHE environment variable, if set
+    """
     app = Flask(__name__)
 
+    stage_cache_dir = stage_cache_dir or os.environ.get("METRO_STAGE_CACHE")
+    stage_cache = StageCache(stage_cache_dir) if stage_cache_dir else None
+
     # Enable CORS for web interface
     @app.after_request
     def after_request(response):
@@ -40,11 +53,19 @@ def create_app():
             population = data.get("population", 100000)
             city_size = data.get("citySize", 10.0)
             master_seed = data.get("masterSeed", 2944957927)
+            population_mode = data.get("populationMode", "legacy")
+            rng_mode = data.get("rngMode", "sequential")
+            layout_backend = data.get("layoutBackend", "dataclass")
+            include_timings = bool(data.get("includeTimings", False))
 
             # Create city configuration
             city_config = {
                 "population": population,
                 "seed": master_seed,
+                "population_mode": population_mode,
+                "rng_mode": rng_mode,
+                "layout_backend": layout_backend,
+                "profile_stages": include_timings,
                 "zones": {},  # Will be generated
                 "workforce": {},  # Will be generated
                 "occupations": {},  # Will be generated
@@ -52,17 +73,74 @@ def create_app():
             }
 
             # Simulate the city
-            simulator = CitySimulator(city_config)
+            simulator = CitySimulator(city_config, stage_cache=stage_cache)
             city_layout = simulator.simulate_city(population, city_size)
 
+            # Clients accepting the binary format get it instead of JSON
+            best = request.accept_mimetypes.best_match(["application/json", MEDIA_TYPE])
+            if best == MEDIA_TYPE:
+                return Response(
+                    simulator.export_city_binary(
+                        compression=data.get("compression", "zlib"),
+                        float_dtype=data.get("floatDtype", "float32"),
+                    ),
+                    mimetype=MEDIA_TYPE,
+                )
+
+            # Stream the export instead of building it in memory; keys keep
+            # their generation order rather than being sorted.
+            if data.get("stream"):
+                decimals = data.get("coordinateDecimals")
+                field_decimals = (
+                    dict.fromkeys(COORDINATE_FIELDS, decimals)
+                    if decimals is not None
+                    else None
+                )
+                return Response(
+                    iter_city_json(
+                        simulator,
+                        include_timings=include_timings,
+                        field_decimals=field_decimals,
+                    ),
+                    mimetype="application/json",
+                )
+
             # Export city data
-            city_data = simulator.export_city_data()
+            city_data = simulator.export_city_data(include_timings=include_timings)
 
             return jsonify(city_data)
 
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
+    @app.route("/api/simulate-district", methods=["POST"])
+    def simulate_district() -> Any:
+        """Generate a single district and its zones without the whole city."""
+        try:
+            data = request.get_json()
+
+            # Extract parameters
+            index = data.get("index", 0)
+            population = data.get("population", 100000)
+            city_size = data.get("citySize", 10.0)
+            master_seed = data.get("masterSeed", 2944957927)
+
+            # Keyed mode lets one district be generated in isolation
+            simulator = CitySimulator(
+                {"population": population, "seed": master_seed, "rng_mode": "keyed"}
+            )
+            district, zones = simulator.simulate_district(index, population, city_size)
+
+            return jsonify(
+                {
+                    "district": asdict(district),
+                    "zones": [asdict(zone) for zone in zones],
+                }
+            )
+
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
     @app.route("/api/city-config", methods=["GET"])
     def get_city_config():
         """Get the default city configuration."""
@@ -95,7 +173,10 @@ def create_app():
         """Get the seed tree for a given master seed."""
         try:
             seed_manager = CitySeedManager(master_seed)
-            seed_tree = seed_manager.export_seed_tree()
+            seed_tree = seed_manager.export_seed_tree(
+                request.args.get("path", ""),
+                request.args.get("depth", type=int),
+            )
             return jsonify(seed_tree)
         except Exception as e:
             return jsonify({"error": str(e)}), 500
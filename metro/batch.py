@@ -0,0 +1,160 @@
+"""
+Batch Simulation of Many Cities
+
+This module runs parameter sweeps: a grid of (seed, population, city size)
+combinations simulated across a process pool. Worker processes are warmed once
+with the imports and the occupation table every simulation needs, at most a
+few jobs per worker are in flight, and each city is written to a JSON lines
+file as soon as it finishes, so a sweep's memory use does not grow with its
+size.
+"""
+
+import itertools
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+from .city_simulator import CitySimulator
+from .occupations import load_occupation_table
+
+# Jobs submitted to the pool per worker before waiting for results
+JOBS_IN_FLIGHT_PER_WORKER = 2
+
+
+@dataclass
+class BatchSummary:
+    """Outcome of a batch run."""
+
+    output: str
+    cities: int
+    failed: int
+    elapsed: float
+
+    @property
+    def cities_per_second(self) -> float:
+        """Aggregate throughput of the batch."""
+        return self.cities / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def parameter_grid(
+    seeds: Iterable[int],
+    populations: Iterable[int],
+    city_sizes: Sequence[Optional[float]] = (None,),
+) -> List[Dict[str, Any]]:
+    """
+    Build the jobs for every combination of the given parameters.
+
+    Args:
+        seeds: Master seeds
+        populations: Target populations
+        city_sizes: City sizes in km; None derives the size from the seed
+
+    Returns:
+        List of {"seed", "population", "city_size"} jobs
+    """
+    return [
+        {"seed": seed, "population": population, "city_size": city_size}
+        for seed, population, city_size in itertools.product(
+            seeds, populations, city_sizes
+        )
+    ]
+
+
+def run_batch(
+    jobs: Iterable[Dict[str, Any]],
+    output: Union[str, Path],
+    workers: Optional[int] = None,
+    config: Optional[Dict[str, Any]] = None,
+    include_layout: bool = True,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> BatchSummary:
+    """
+    Simulate every job and stream the results to a JSON lines file.
+
+    Each line holds the job's index in ``jobs``, the job itself and either the
+    city's export_city_data() (only its metadata without include_layout) or
+    the error the simulation raised. Lines are written in completion order.
+
+    Args:
+        jobs: Dictionaries with "seed", "population" and optional "city_size"
+        output: JSON lines file to write (overwritten)
+        workers: Worker processes to use; None or 1 simulates in-process
+        config: Base city configuration shared by all jobs (e.g. rng_mode)
+        include_layout: Whether to write complete exports or metadata only
+        on_result: Called with every result line's data as it is written
+
+    Returns:
+        Summary of the run
+    """
+    jobs = list(jobs)
+    config = dict(config or {})
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    cities = failed = 0
+    start = time.perf_counter()
+    with open(output, "w") as f:
+
+        def write(index: int, result: Dict[str, Any]) -> None:
+            nonlocal cities, failed
+            if "error" in result:
+                failed += 1
+            else:
+                cities += 1
+            line = dict(index=index, job=jobs[index], **result)
+            f.write(json.dumps(line) + "\n")
+            f.flush()
+            if on_result is not None:
+                on_result(line)
+
+        tasks = (
+            (index, (config, job, include_layout)) for index, job in enumerate(jobs)
+        )
+        if workers is None or workers <= 1:
+            _warm_worker()
+            for index, task in tasks:
+                write(index, _simulate_job(task))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_warm_worker
+            ) as executor:
+                # Submit jobs as earlier ones finish, so neither pending jobs
+                # nor unwritten results pile up in memory
+                pending: Dict[Future, int] = {}
+
+                def submit(count: int) -> None:
+                    for index, task in itertools.islice(tasks, count):
+                        pending[executor.submit(_simulate_job, task)] = index
+
+                submit(JOBS_IN_FLIGHT_PER_WORKER * workers)
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        write(pending.pop(future), future.result())
+                    submit(len(done))
+
+    return BatchSummary(str(output), cities, failed, time.perf_counter() - start)
+
+
+def _warm_worker() -> None:
+    """Load what every simulation needs once per worker process."""
+    load_occupation_table()
+    from . import roman_grid  # noqa: F401  imported lazily by simulations
+
+
+def _simulate_job(task: Any) -> Dict[str, Any]:
+    """Simulate one job; module level so worker processes can run it."""
+    config, job, include_layout = task
+    try:
+        simulator = CitySimulator(
+            dict(config, seed=job["seed"], population=job["population"])
+        )
+        simulator.simulate_city(job["population"], job.get("city_size"))
+        data = simulator.export_city_data()
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+
+    return {"city": data if include_layout else {"metadata": data["metadata"]}}
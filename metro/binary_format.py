@@ -0,0 +1,452 @@
+"""
+Binary Export Format for Simulated Cities
+
+This module packs city exports into a compact, versioned binary file instead of
+JSON. A file starts with a fixed prefix::
+
+    magic (8 bytes) | version (uint16) | compression (uint8) | reserved (uint8)
+    | payload size (uint64)
+
+followed by the payload, compressed as a single zlib or zstd frame or stored
+as is. The payload is a JSON header (uint32 length, then UTF-8 text) followed
+by the column data of every table, little endian and 8-byte aligned.
+
+Tables hold one array per field: floats as float32 (or float64 for lossless
+output), integers in the narrowest of int32/uint32/int64 that fits, and
+strings as uint32 codes into a dictionary stored in the header. Fields some
+rows lack get a validity mask. Values that fit none of these (nested
+structures, mixed types) are kept in the header as JSON.
+"""
+
+import json
+import struct
+import zlib
+from dataclasses import fields
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .columnar_layout import ColumnarTable
+
+try:
+    import zstandard
+except ImportError:  # zstd frames are optional
+    zstandard = None
+
+MAGIC = b"METROCTY"
+FORMAT_VERSION = 1
+PREFIX = struct.Struct("<8sHBBQ")
+COMPRESSIONS = ("none", "zlib", "zstd")
+FLOAT_DTYPES = ("float32", "float64")
+MEDIA_TYPE = "application/vnd.metro.city"
+
+# Infrastructure groups stored as one table with a "kind" column each
+INFRASTRUCTURE_GROUPS = ("utilities", "services")
+
+
+class _Missing:
+    """Marker for a field a record does not have."""
+
+    def __repr__(self) -> str:
+        return "MISSING"
+
+
+_MISSING = _Missing()
+
+
+def encode_tables(
+    tables: Dict[str, Dict[str, Any]],
+    header: Optional[Dict[str, Any]] = None,
+    compression: str = "zlib",
+    float_dtype: str = "float32",
+) -> bytes:
+    """
+    Pack named tables and a JSON header into the binary format.
+
+    Args:
+        tables: Table name to {"rows": row count, "columns": {field: values}},
+            where values has one entry per row, or the missing marker
+            (see records_table) for rows lacking the field
+        header: JSON-serializable data stored alongside the tables
+        compression: One of COMPRESSIONS
+        float_dtype: One of FLOAT_DTYPES
+
+    Returns:
+        Encoded bytes
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError(
+            f"Unknown compression {compression!r}, expected one of {COMPRESSIONS}"
+        )
+    if float_dtype not in FLOAT_DTYPES:
+        raise ValueError(
+            f"Unknown float dtype {float_dtype!r}, expected one of {FLOAT_DTYPES}"
+        )
+
+    blobs: List[bytes] = []
+    offset = 0
+
+    def add_blob(array: np.ndarray) -> Dict[str, Any]:
+        nonlocal offset
+        data = np.ascontiguousarray(array).tobytes()
+        entry = {"dtype": array.dtype.str, "offset": offset, "nbytes": len(data)}
+        padding = -len(data) % 8
+        blobs.append(data + b"\0" * padding)
+        offset += len(data) + padding
+        return entry
+
+    table_headers = {}
+    for name, table in tables.items():
+        columns = []
+        for field, values in table["columns"].items():
+            column = {"name": field}
+            valid = np.array([v is not _MISSING for v in values], dtype=bool)
+            if not valid.all():
+                column["valid"] = add_blob(np.packbits(valid))
+                values = [v for v in values if v is not _MISSING]
+
+            kind, array, extra = _encode_column(values, float_dtype)
+            column["kind"] = kind
+            column.update(extra)
+            if array is not None:
+                column["data"] = add_blob(array)
+            columns.append(column)
+        table_headers[name] = {"rows": table["rows"], "columns": columns}
+
+    header_bytes = json.dumps(
+        {"tables": table_headers, "header": header or {}}, separators=(",", ":")
+    ).encode("utf-8")
+    header_padding = -(4 + len(header_bytes)) % 8
+    payload = b"".join(
+        [
+            struct.pack("<I", len(header_bytes) + header_padding),
+            header_bytes,
+            b" " * header_padding,
+        ]
+        + blobs
+    )
+
+    prefix = PREFIX.pack(
+        MAGIC, FORMAT_VERSION, COMPRESSIONS.index(compression), 0, len(payload)
+    )
+    return prefix + _compress(payload, compression)
+
+
+def decode_tables(data: bytes) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Any]]:
+    """
+    Unpack tables and the JSON header from the binary format.
+
+    Args:
+        data: Bytes produced by encode_tables
+
+    Returns:
+        Tuple of (tables, header). Each table is {"rows": row count,
+        "columns": {field: list of values}}, with the missing marker for
+        rows lacking a field.
+    """
+    if len(data) < PREFIX.size:
+        raise ValueError("Data too short for a Metro city file")
+    magic, version, compression, _, size = PREFIX.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a Metro city file")
+    if version != FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported Metro city format version {version}, "
+            f"expected {FORMAT_VERSION}"
+        )
+    if compression >= len(COMPRESSIONS):
+        raise ValueError(f"Unknown compression code {compression}")
+
+    payload = _decompress(data[PREFIX.size :], COMPRESSIONS[compression], size)
+    if len(payload) != size:
+        raise ValueError("Truncated Metro city file")
+
+    (header_size,) = struct.unpack_from("<I", payload)
+    document = json.loads(payload[4 : 4 + header_size].decode("utf-8"))
+    blob_start = 4 + header_size
+
+    def read_blob(entry: Dict[str, Any]) -> np.ndarray:
+        dtype = np.dtype(entry["dtype"])
+        return np.frombuffer(
+            payload,
+            dtype=dtype,
+            count=entry["nbytes"] // dtype.itemsize,
+            offset=blob_start + entry["offset"],
+        )
+
+    tables = {}
+    for name, table in document["tables"].items():
+        rows = table["rows"]
+        columns = {}
+        for column in table["columns"]:
+            values = _decode_column(column, read_blob)
+            if "valid" in column:
+                valid = np.unpackbits(read_blob(column["valid"]), count=rows)
+                present = iter(values)
+                values = [next(present) if v else _MISSING for v in valid]
+            columns[column["name"]] = values
+        tables[name] = {"rows": rows, "columns": columns}
+
+    return tables, document["header"]
+
+
+def records_table(records: Sequence[Any]) -> Dict[str, Any]:
+    """
+    Build a table from dataclasses, a ColumnarTable or dictionaries.
+
+    Dictionary fields are taken in order of first appearance, with the
+    missing marker for records lacking a field.
+
+    Args:
+        records: Records of one kind
+
+    Returns:
+        Table for encode_tables
+    """
+    if isinstance(records, ColumnarTable):
+        names = [f.name for f in fields(records.record_type)]
+        return {
+            "rows": len(records),
+            "columns": {name: records.values(name) for name in names},
+        }
+
+    records = list(records)
+    if records and not isinstance(records[0], dict):
+        names = [f.name for f in fields(records[0])]
+        return {
+            "rows": len(records),
+            "columns": {
+                name: [getattr(record, name) for record in records] for name in names
+            },
+        }
+
+    names = list(dict.fromkeys(key for record in records for key in record))
+    return {
+        "rows": len(records),
+        "columns": {
+            name: [record.get(name, _MISSING) for record in records] for name in names
+        },
+    }
+
+
+def table_records(table: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Rebuild the dictionaries of a decoded table, skipping missing fields."""
+    names = list(table["columns"])
+    return [
+        {name: value for name, value in zip(names, row) if value is not _MISSING}
+        for row in zip(*table["columns"].values())
+    ] or [{} for _ in range(table["rows"])]
+
+
+def encode_city_layout(
+    layout: Any,
+    metadata: Optional[Dict[str, Any]] = None,
+    routing: Any = None,
+    **options: Any,
+) -> bytes:
+    """
+    Encode a CityLayout or ColumnarLayout.
+
+    Args:
+        layout: Layout to encode
+        metadata: JSON-serializable data stored with the layout, such as
+            export_city_data()["metadata"]
+        routing: ContractionHierarchy of the layout's roads to store with it,
+            readable with ContractionHierarchy.from_bytes
+        **options: encode_tables compression and float_dtype
+
+    Returns:
+        Encoded bytes
+    """
+    infrastructure = dict(layout.infrastructure)
+    tables = {
+        "districts": records_table(layout.districts),
+        "zones": records_table(layout.zones),
+        "roads": records_table(infrastructure.pop("roads", [])),
+    }
+    groups = {}
+    for group in INFRASTRUCTURE_GROUPS:
+        kinds = infrastructure.pop(group, {})
+        groups[group] = list(kinds)
+        tables[group] = records_table(
+            [dict(item, kind=kind) for kind, items in kinds.items() for item in items]
+        )
+
+    header = {
+        "type": "city",
+        "width": layout.width,
+        "height": layout.height,
+        "total_area": layout.total_area,
+        "infrastructure_groups": groups,
+        # Anything else is small enough to keep as JSON
+        "infrastructure": infrastructure,
+        "demographics": layout.demographics,
+        "metadata": metadata or {},
+    }
+    if routing is not None:
+        routing_tables, header["routing"] = routing.tables()
+        for name, table in routing_tables.items():
+            tables[f"routing_{name}"] = table
+    return encode_tables(tables, header, **options)
+
+
+def decode_city_layout(data: bytes) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Decode a layout written by encode_city_layout.
+
+    Args:
+        data: Encoded bytes
+
+    Returns:
+        Tuple of (CityLayout, metadata)
+    """
+    from .city_simulator import CityLayout, District, Zone
+
+    tables, header = decode_tables(data)
+    if header.get("type") != "city":
+        raise ValueError("Metro file does not hold a city layout")
+
+    infrastructure: Dict[str, Any] = {"roads": table_records(tables["roads"])}
+    for group, kinds in header["infrastructure_groups"].items():
+        infrastructure[group] = {kind: [] for kind in kinds}
+        for item in table_records(tables[group]):
+            infrastructure[group][item.pop("kind")].append(item)
+    infrastructure.update(header["infrastructure"])
+
+    layout = CityLayout(
+        width=header["width"],
+        height=header["height"],
+        total_area=header["total_area"],
+        districts=[District(**d) for d in table_records(tables["districts"])],
+        zones=[Zone(**z) for z in table_records(tables["zones"])],
+        infrastructure=infrastructure,
+        demographics=header["demographics"],
+    )
+    return layout, header["metadata"]
+
+
+def encode_temporal_data(simulator: Any, **options: Any) -> bytes:
+    """
+    Encode the export of a TemporalCitySimulator.
+
+    Roman grid blocks and roads are stored as tables; eras, timeline and key
+    points are kept in the header.
+
+    Args:
+        simulator: TemporalCitySimulator to export
+        **options: encode_tables compression and float_dtype
+
+    Returns:
+        Encoded bytes
+    """
+    grid = simulator.roman_grid
+    road_fields = ("x1", "y1", "x2", "y2")
+    tables = {
+        "blocks": records_table(grid.blocks),
+        "cardos": records_table([dict(zip(road_fields, r)) for r in grid.cardos]),
+        "decumani": records_table([dict(zip(road_fields, r)) for r in grid.decumani]),
+    }
+
+    header = simulator.export_temporal_data()
+    header.pop("roman_grid")
+    header["type"] = "temporal"
+    return encode_tables(tables, header, **options)
+
+
+def decode_temporal_data(data: bytes) -> Dict[str, Any]:
+    """
+    Decode data written by encode_temporal_data.
+
+    Args:
+        data: Encoded bytes
+
+    Returns:
+        Dictionary shaped like TemporalCitySimulator.export_temporal_data()
+    """
+    tables, header = decode_tables(data)
+    if header.pop("type", None) != "temporal":
+        raise ValueError("Metro file does not hold temporal city data")
+
+    header["roman_grid"] = {
+        "cardos": [tuple(r.values()) for r in table_records(tables["cardos"])],
+        "decumani": [tuple(r.values()) for r in table_records(tables["decumani"])],
+        "blocks": table_records(tables["blocks"]),
+    }
+    return header
+
+
+def _encode_column(
+    values: List[Any], float_dtype: str
+) -> Tuple[str, Optional[np.ndarray], Dict[str, Any]]:
+    """Choose a column encoding: (kind, array or None, extra header fields)."""
+    types = {type(value) for value in values}
+    if types <= {str}:
+        dictionary = list(dict.fromkeys(values))
+        index = {value: code for code, value in enumerate(dictionary)}
+        codes = np.array([index[value] for value in values], dtype="<u4")
+        return "str", codes, {"dictionary": dictionary}
+    if types <= {bool}:
+        return "bool", np.array(values, dtype=np.uint8), {}
+    if types <= {int}:
+        low, high = (min(values), max(values)) if values else (0, 0)
+        for dtype in ("<i4", "<u4", "<i8", "<u8"):
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                return "int", np.array(values, dtype=dtype), {}
+    if types <= {int, float}:
+        return (
+            "float",
+            np.array(values, dtype=np.dtype(float_dtype).newbyteorder("<")),
+            {},
+        )
+    return "json", None, {"values": values}
+
+
+def _decode_column(
+    column: Dict[str, Any], read_blob: Callable[[Dict[str, Any]], np.ndarray]
+) -> List[Any]:
+    """Decode a column's values to Python objects."""
+    kind = column["kind"]
+    values: List[Any]
+    if kind == "json":
+        values = column["values"]
+    elif kind == "str":
+        array = read_blob(column["data"])
+        values = np.array(column["dictionary"], dtype=object)[array].tolist()
+    elif kind == "bool":
+        values = read_blob(column["data"]).astype(bool).tolist()
+    else:
+        values = read_blob(column["data"]).tolist()
+    return values
+
+
+def _compress(payload: bytes, compression: str) -> bytes:
+    """Compress the payload as a single frame."""
+    if compression == "zlib":
+        return zlib.compress(payload, 6)
+    if compression == "zstd":
+        compressed: bytes = _zstd().ZstdCompressor(level=3).compress(payload)
+        return compressed
+    return payload
+
+
+def _decompress(frame: bytes, compression: str, size: int) -> bytes:
+    """Decompress a payload frame of the given decompressed size."""
+    if compression == "zlib":
+        return zlib.decompress(frame)
+    if compression == "zstd":
+        payload: bytes = (
+            _zstd().ZstdDecompressor().decompress(frame, max_output_size=size)
+        )
+        return payload
+    return bytes(frame)
+
+
+def _zstd() -> Any:
+    """Get the zstandard module, which zstd compression requires."""
+    if zstandard is None:
+        raise ImportError(
+            "zstd compression requires the zstandard package: "
+            "pip install metro[zstd]"
+        )
+    return zstandard
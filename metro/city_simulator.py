@@ -6,14 +6,47 @@ cities with populations up to 1 million while maintaining performance
 and reproducibility through the hierarchical seed system.
 """
 
+import contextlib
+import copy
 import json
 import random
-from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass, asdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+from dataclasses import dataclass, asdict, replace
 from pathlib import Path
 
 from .seed_system import CitySeedManager, create_city_seed_manager
+from .binary_format import encode_city_layout
+from .columnar_layout import ColumnarLayout
+from .contraction import ContractionHierarchy
+from .instrumentation import StageHook, StageProfiler, StageTiming
 from .population import PopulationModel
+from .road_network import RoadNetwork
+from .spatial_index import SpatialIndex
+from .stage_cache import StageCache
+from .travel_demand import ODMatrix, gravity_model
+
+if TYPE_CHECKING:
+    from .roman_grid import RomanGridSystem
+
+# Ways CitySimulator can draw districts and zones, see CitySimulator.rng_mode.
+RNG_MODES = ("sequential", "keyed")
+
+# Context manager used for stages when instrumentation is disabled
+_UNTIMED_STAGE = contextlib.nullcontext()
+
+# Ways CitySimulator can store layouts, see CitySimulator.layout_backend.
+LAYOUT_BACKENDS = ("dataclass", "columnar")
 
 
 @dataclass
@@ -70,21 +103,80 @@ class CitySimulator:
     up to 1 million, using hierarchical seeds for reproducibility.
     """
 
-    def __init__(self, city_config: Dict[str, Any]):
+    def __init__(
+        self, city_config: Dict[str, Any], stage_cache: Optional[StageCache] = None
+    ):
         self.config = city_config
         self.seed_manager = create_city_seed_manager(city_config)
-        self.population_model = None
-        self.city_layout = None
+        self.population_model: Any = None
+        self.city_layout: Any = None
+        # (target population, requested city size) of the last simulation
+        self.simulation_args: Optional[Tuple[int, Optional[float]]] = None
+        # Stages recomputed by the last resimulate_from call
+        self.regenerated_stages: List[str] = []
+        # Spatial indexes of the current layout by kind, see spatial_index
+        self._spatial_indexes: Dict[str, Tuple[Any, SpatialIndex]] = {}
+        self._road_network: Tuple[Any, Optional[RoadNetwork]] = (None, None)
+        self._contraction_hierarchies: Dict[
+            str, Tuple[RoadNetwork, ContractionHierarchy]
+        ] = {}
+        # Optional on-disk cache of stage outputs keyed by seed path
+        self.stage_cache = stage_cache
+
+        # "sequential" replays one RNG stream per seed path; "keyed" draws
+        # every district and zone from a counter-based stream so any one of
+        # them can be regenerated on its own.
+        self.rng_mode: str = city_config.get("rng_mode", "sequential")
+        if self.rng_mode not in RNG_MODES:
+            raise ValueError(
+                f"Unknown rng_mode {self.rng_mode!r}, expected one of {RNG_MODES}"
+            )
+
+        # Per-stage wall time, CPU time and optionally tracemalloc peak; None
+        # disables instrumentation, see StageProfiler.
+        self.profiler: Optional[StageProfiler] = None
+        if city_config.get("profile_stages") or city_config.get("profile_memory"):
+            self.profiler = StageProfiler(city_config.get("profile_memory", False))
+
+        # Sharded population sampling draws each shard from NumPy, so it
+        # needs a non-legacy population_mode, see PopulationModel.from_shards.
+        if city_config.get("population_shards") and (
+            city_config.get("population_mode", "legacy") == "legacy"
+        ):
+            raise ValueError(
+                "population_shards requires population_mode 'vectorized' or "
+                "'analytic'"
+            )
+
+        # "columnar" stores districts and zones as NumPy arrays, see
+        # ColumnarLayout. Generation still builds dataclass records, so this
+        # lowers the memory held after simulation, not its peak.
+        self.layout_backend = city_config.get("layout_backend", "dataclass")
+        if self.layout_backend not in LAYOUT_BACKENDS:
+            raise ValueError(
+                f"Unknown layout_backend {self.layout_backend!r}, "
+                f"expected one of {LAYOUT_BACKENDS}"
+            )
+
+    @property
+    def keyed(self) -> bool:
+        """Whether entities are drawn from counter-based streams."""
+        return self.rng_mode == "keyed"
 
     def simulate_city(
-        self, target_population: int = None, city_size: float = None
-    ) -> CityLayout:
+        self,
+        target_population: int = None,
+        city_size: Optional[float] = None,
+        workers: Optional[int] = None,
+    ) -> Union[CityLayout, ColumnarLayout]:
         """
         Simulate a complete city with the given parameters.
 
         Args:
             target_population: Target population (defaults to config value)
             city_size: City size in km (defaults to calculated value)
+            workers: Worker processes generating district zones; None or 1
+                generates them in-process. The layout does not depend on it.
 
         Returns:
             Complete city layout
@@ -92,16 +184,383 @@ class CitySimulator:
         if target_population is None:
             target_population = self.config.get("population", 100000)
 
+        self.simulation_args = (target_population, city_size)
+        if self.profiler is not None:
+            self.profiler.reset()
+
         if city_size is None:
             city_size = self._calculate_city_size(target_population)
 
         # Generate population model
-        self.population_model = self._generate_population_model(target_population)
+        with self._stage("population"):
+            self.population_model = self._generate_population_model(target_population)
 
         # Generate city layout
-        self.city_layout = self._generate_city_layout(target_population, city_size)
+        layout = self._apply_layout_backend(
+            self._generate_city_layout(target_population, city_size, workers)
+        )
+        self.city_layout = layout
+
+        return layout
+
+    def simulate_variation(
+        self, variation_type: str, variation_value: str, branches: List[str]
+    ) -> "CitySimulator":
+        """
+        Re-simulate the city with only the given seed branches varied.
+
+        Args:
+            variation_type: Type of variation (e.g., "layout")
+            variation_value: Specific variation value (e.g., "grid")
+            branches: Seed paths to vary (e.g., ["infrastructure"])
+
+        Returns:
+            New simulator holding the varied city
+        """
+        variant = CitySimulator(self.config, stage_cache=self.stage_cache)
+        variant.seed_manager = self.seed_manager.create_city_variation(
+            variation_type, variation_value, branches
+        )
+        variant.resimulate_from(self)
+        return variant
+
+    def resimulate_from(
+        self, base: "CitySimulator"
+    ) -> Union[CityLayout, ColumnarLayout]:
+        """
+        Simulate the city of a previous run, reusing its unaffected stages.
+
+        Only stages drawing from a seed branch whose override differs between
+        the two seed managers are recomputed; the rest of the layout is copied
+        from the base. The result is identical to a full simulate_city run.
+        Anything other than branch overrides differing falls back to a full
+        run.
+
+        Args:
+            base: Simulator that has already simulated a city
+
+        Returns:
+            Complete city layout
+        """
+        if base.city_layout is None or base.simulation_args is None:
+            raise ValueError("Base city must be simulated before resimulating")
+
+        population, city_size = base.simulation_args
+        generator = self.seed_manager.generator
+        base_generator = base.seed_manager.generator
+        if (
+            generator.master_seed != base_generator.master_seed
+            or self.rng_mode != base.rng_mode
+            or self.config != base.config
+        ):
+            self.regenerated_stages = ["all"]
+            return self.simulate_city(population, city_size)
+
+        overrides = generator.branch_overrides
+        base_overrides = base_generator.branch_overrides
+        changed = [
+            branch
+            for branch in set(overrides) | set(base_overrides)
+            if overrides.get(branch) != base_overrides.get(branch)
+        ]
+
+        def varied(path: str) -> bool:
+            return any(path == b or path.startswith(f"{b}.") for b in changed)
+
+        self.simulation_args = (population, city_size)
+        base_layout = base.city_layout
+        self.regenerated_stages = []
+
+        if city_size is None:
+            if varied("city.size"):
+                city_size = self._calculate_city_size(population)
+                self.regenerated_stages.append("city_size")
+            else:
+                city_size = base_layout.width
+
+        population_paths = [self.seed_manager.get_population_seed_path(population)]
+        shards = self.config.get("population_shards")
+        if shards:
+            population_paths += [f"population.shard.{i}" for i in range(shards)]
+        if any(varied(path) for path in population_paths):
+            self.population_model = self._generate_population_model(population)
+            self.regenerated_stages.append("population")
+        else:
+            self.population_model = base.population_model
+
+        # Every later stage is placed relative to the districts
+        if (
+            city_size != base_layout.width
+            or varied("city.districts")
+            or varied("districts")
+        ):
+            layout = self._apply_layout_backend(
+                self._generate_city_layout(population, city_size)
+            )
+            self.city_layout = layout
+            self.regenerated_stages += [
+                "districts",
+                "zones",
+                "infrastructure",
+                "demographics",
+            ]
+            return layout
+
+        # Districts and zones only need their own seeds refreshed
+        districts = [
+            replace(
+                d,
+                seed=self.seed_manager.get_district_seed(
+                    d.name.lower().replace(" ", "_")
+                ),
+            )
+            for d in base_layout.districts
+        ]
+
+        stale = [d for d in districts if varied(self._zone_stream_path(d))]
+        new_zones: Dict[str, List[Zone]] = {d.id: [] for d in stale}
+        for zone in self._generate_zones(stale, population):
+            new_zones[zone.district_id].append(zone)
+        if stale:
+            self.regenerated_stages.append("zones")
+
+        base_zones: Dict[str, List[Zone]] = {}
+        for zone in base_layout.zones:
+            base_zones.setdefault(zone.district_id, []).append(zone)
+
+        zones = []
+        for district in districts:
+            if district.id in new_zones:
+                zones.extend(new_zones[district.id])
+                continue
+            slug = district.name.lower().replace(" ", "_")
+            zones.extend(
+                replace(z, seed=self.seed_manager.get_zone_seed(z.zone_type, slug))
+                for z in base_zones.get(district.id, [])
+            )
+
+        if varied("infrastructure") or varied("roman_grid.founding"):
+            infrastructure = self._generate_infrastructure_with_roman_grid(
+                districts, city_size, self._create_roman_grid(city_size)
+            )
+            self.regenerated_stages.append("infrastructure")
+        else:
+            infrastructure = copy.deepcopy(base_layout.infrastructure)
+
+        if varied("demographics"):
+            demographics = self._generate_demographics(districts, population)
+            self.regenerated_stages.append("demographics")
+        else:
+            demographics = copy.deepcopy(base_layout.demographics)
+
+        layout = self._apply_layout_backend(
+            CityLayout(
+                width=city_size,
+                height=city_size,
+                total_area=city_size * city_size,
+                districts=districts,
+                zones=zones,
+                infrastructure=infrastructure,
+                demographics=demographics,
+            )
+        )
+        self.city_layout = layout
+        return layout
+
+    def simulate_district(
+        self,
+        index: int,
+        target_population: Optional[int] = None,
+        city_size: Optional[float] = None,
+    ) -> Tuple[District, List[Zone]]:
+        """
+        Generate a single district and its zones without generating the city.
+
+        Only available in keyed mode, where the result is identical to the
+        corresponding entries of a full simulate_city run.
+
+        Args:
+            index: District index
+            target_population: Target population (defaults to config value)
+            city_size: City size in km (defaults to calculated value)
+
+        Returns:
+            Tuple of (district, zones within the district)
+        """
+        if not self.keyed:
+            raise ValueError("simulate_district requires rng_mode 'keyed'")
 
-        return self.city_layout
+        if target_population is None:
+            target_population = self.config.get("population", 100000)
+
+        if city_size is None:
+            city_size = self._calculate_city_size(target_population)
+
+        district_count = self._calculate_district_count(target_population)
+        if not 0 <= index < district_count:
+            raise IndexError(
+                f"District index {index} out of range for {district_count} districts"
+            )
+
+        district = self._generate_district(
+            index,
+            district_count,
+            city_size,
+            target_population,
+            self._get_entity_rng("districts", index),
+        )
+        return district, self._generate_zones([district], target_population)
+
+    @property
+    def stage_timings(self) -> List[StageTiming]:
+        """Timings of the stages of the last simulation, if instrumented."""
+        return self.profiler.timings if self.profiler is not None else []
+
+    def add_stage_hook(self, hook: StageHook) -> None:
+        """
+        Call a function with the StageTiming of every stage as it finishes.
+
+        Enables instrumentation if it is not enabled yet.
+
+        Args:
+            hook: Function taking a StageTiming
+        """
+        if self.profiler is None:
+            self.profiler = StageProfiler()
+        self.profiler.add_hook(hook)
+
+    def travel_demand(
+        self, costs: str = "euclidean", top_k: Optional[int] = None, **options: Any
+    ) -> ODMatrix:
+        """
+        Estimate commuter flows between the zones of the current layout.
+
+        Args:
+            costs: "euclidean" or "network" distances (see gravity_model)
+            top_k: Destinations kept per origin; None fits the dense matrix
+            **options: Other gravity_model options, e.g. beta
+
+        Returns:
+            Flows between zones, in the layout's zone order
+        """
+        if self.city_layout is None:
+            raise ValueError("City must be simulated before estimating travel demand")
+
+        workforce = self.population_model.workforce()["t"]
+        population = sum(
+            counts["m"] + counts["f"] for counts in self.population_model.histogram
+        )
+        network = hierarchy = None
+        if costs == "network":
+            network = self.road_network()
+            hierarchy = self.contraction_hierarchy("length")
+        with self._stage("travel_demand"):
+            return gravity_model(
+                self.city_layout.zones,
+                workforce / population if population else 0.0,
+                costs=costs,
+                network=network,
+                hierarchy=hierarchy,
+                top_k=top_k,
+                **options,
+            )
+
+    def _stage(self, name: str) -> ContextManager[None]:
+        """Get a context manager timing stage ``name`` if instrumented."""
+        if self.profiler is None:
+            return _UNTIMED_STAGE
+        return self.profiler.stage(name)
+
+    def spatial_index(self, kind: str = "zones") -> SpatialIndex:
+        """
+        Get a spatial index over the districts or zones of the current layout.
+
+        The index is built on first use and rebuilt when the layout changes.
+
+        Args:
+            kind: "districts" or "zones"
+
+        Returns:
+            Index whose rectangle indices match the layout's list order
+        """
+        if self.city_layout is None:
+            raise ValueError("City must be simulated before indexing")
+
+        cached = self._spatial_indexes.get(kind)
+        if cached is None or cached[0] is not self.city_layout:
+            cached = (
+                self.city_layout,
+                SpatialIndex.from_layout(self.city_layout, kind),
+            )
+            self._spatial_indexes[kind] = cached
+        return cached[1]
+
+    def road_network(self) -> RoadNetwork:
+        """
+        Get the road network of the current layout.
+
+        The network is built on first use and rebuilt when the layout changes.
+
+        Returns:
+            Network whose edge_road indexes the layout's roads
+        """
+        if self.city_layout is None:
+            raise ValueError("City must be simulated before building its roads")
+
+        layout, network = self._road_network
+        if network is None or layout is not self.city_layout:
+            network = RoadNetwork.from_layout(self.city_layout)
+            self._road_network = (self.city_layout, network)
+        return network
+
+    def contraction_hierarchy(self, weight: str = "time") -> ContractionHierarchy:
+        """
+        Get a contraction hierarchy over the road network of the current layout.
+
+        The hierarchy is built on first use and rebuilt when the layout changes.
+
+        Args:
+            weight: "time" or "length"
+
+        Returns:
+            Hierarchy whose node indices match road_network()
+        """
+        network = self.road_network()
+        cached = self._contraction_hierarchies.get(weight)
+        if cached is None or cached[0] is not network:
+            cached = (network, ContractionHierarchy.build(network, weight))
+            self._contraction_hierarchies[weight] = cached
+        return cached[1]
+
+    def _apply_layout_backend(
+        self, layout: CityLayout
+    ) -> Union[CityLayout, ColumnarLayout]:
+        """
+        Convert a generated layout to the configured layout backend.
+
+        The conversion runs once the full list-based layout exists, so both
+        representations are alive until the lists are released.
+        """
+        if self.layout_backend == "columnar":
+            return ColumnarLayout.from_layout(layout)
+        return layout
+
+    def _zone_stream_path(self, district: District) -> str:
+        """Get the seed path the zones of a district are drawn from."""
+        if self.keyed:
+            return f"districts.{district.id}.zones"
+        # Districts sharing a name share a stream, so they vary together
+        return f"districts.{district.name.lower().replace(' ', '_')}"
+
+    def _get_stage_rng(self, path: str) -> random.Random:
+        """Get the RNG for a single-draw stage such as the city size."""
+        if self.keyed:
+            return self._get_entity_rng(path, 0)
+        return self.seed_manager.generator.get_rng(path)
+
+    def _get_entity_rng(self, path: str, index: int) -> random.Random:
+        """Get the counter-based stream for entity ``index`` under ``path``."""
+        return self.seed_manager.generator.get_counter_rng(path).stream(index)
 
     def _calculate_city_size(self, population: int) -> float:
         """Calculate appropriate city size based on population."""
@@ -110,7 +569,7 @@ class CitySimulator:
         base_area = population / base_density
 
         # Add some variation based on city type
-        rng = self.seed_manager.generator.get_rng("city.size")
+        rng = self._get_stage_rng("city.size")
         variation = rng.uniform(0.8, 1.2)
 
         area = base_area * variation
@@ -124,31 +583,152 @@ class CitySimulator:
         pop_seed = self.seed_manager.get_population_seed(population)
         rng = random.Random(pop_seed)
 
-        # Use the existing PopulationModel but with our seeded RNG
-        return PopulationModel(rng, population)
+        # Use the existing PopulationModel but with our seeded RNG. Non-legacy
+        # modes draw from NumPy seeded with the same population seed.
+        mode = self.config.get("population_mode", "legacy")
+
+        # Sharded sampling draws each shard from population.shard.<i>.
+        shards = self.config.get("population_shards")
+
+        def build() -> PopulationModel:
+            if shards:
+                return PopulationModel.from_shards(
+                    self.seed_manager.generator,
+                    population,
+                    shards=shards,
+                    workers=self.config.get("population_workers"),
+                    mode=mode,
+                )
+            return PopulationModel(rng, population, mode=mode, seed=pop_seed)
+
+        if self.stage_cache is None:
+            return build()
+
+        # Only the histogram is cached; occupations are rescaled from it
+        histogram = self._cached_stage(
+            "population",
+            self.seed_manager.get_population_seed_path(population),
+            {"population": population, "mode": mode, "shards": shards},
+            lambda: build().histogram,
+        )
+        return PopulationModel.from_histogram(histogram, rng, mode=mode)
 
-    def _generate_city_layout(self, population: int, city_size: float) -> CityLayout:
+    def _cached_stage(
+        self,
+        stage: str,
+        seed_path: str,
+        params: Dict[str, Any],
+        build: Callable[[], Any],
+    ) -> Any:
+        """
+        Run a generation stage through the stage cache, if one is configured.
+
+        Args:
+            stage: Stage name
+            seed_path: Seed path the stage draws from
+            params: Other inputs that affect the stage output
+            build: Function generating the stage output on a cache miss
+
+        Returns:
+            Stage output
+        """
+        if self.stage_cache is None:
+            return build()
+
+        generator = self.seed_manager.generator
+        params = dict(
+            params,
+            master_seed=generator.master_seed,
+            rng_mode=self.rng_mode,
+        )
+        if generator.branch_overrides:
+            # Stages read seeds below their own path too, e.g. zone seeds
+            params["branch_overrides"] = sorted(generator.branch_overrides.items())
+        # Streams drawn from by earlier stages or simulations continue where
+        # they stopped, so the output depends on where they stand
+        rng_states = generator.rng_states()
+        if rng_states:
+            params["rng_states"] = sorted(rng_states.items())
+        # Looking up the key must not derive the path, or the seed tree
+        # would depend on whether a cache is configured
+        key = self.stage_cache.key(
+            stage, seed_path, generator.get_seed(seed_path, record=False), params
+        )
+        entry = self.stage_cache.get(key)
+        if entry is None:
+            with generator.record_paths() as paths:
+                value = build()
+            entry = {
+                "value": value,
+                "seed_paths": list(dict.fromkeys(paths)),
+                "rng_states": {
+                    path: state
+                    for path, state in generator.rng_states().items()
+                    if rng_states.get(path) != state
+                },
+            }
+            self.stage_cache.put(key, entry)
+        else:
+            # Derive the seeds a miss would have derived and leave the
+            # streams where it would have left them, so the seed tree and
+            # later stages come out the same whether or not it was cached
+            for path in entry["seed_paths"]:
+                generator.get_seed(path)
+            for path, state in entry["rng_states"].items():
+                generator.set_rng_state(path, state)
+        return entry["value"]
+
+    def _generate_city_layout(
+        self, population: int, city_size: float, workers: Optional[int] = None
+    ) -> CityLayout:
         """Generate the complete city layout."""
-        from .roman_grid import RomanGridSystem
-        
-        # Create Roman grid system
-        roman_grid = RomanGridSystem(city_size, self.seed_manager)
-        roman_grid.create_founding_grid()
-        
         # Calculate number of districts based on population
         district_count = self._calculate_district_count(population)
 
         # Generate districts
-        districts = self._generate_districts(district_count, city_size, population)
+        with self._stage("districts"):
+            districts = self._cached_stage(
+                "districts",
+                "districts",
+                {
+                    "district_count": district_count,
+                    "city_size": city_size,
+                    "population": population,
+                },
+                lambda: self._generate_districts(district_count, city_size, population),
+            )
+        district_params = (
+            [asdict(d) for d in districts] if self.stage_cache is not None else None
+        )
 
         # Generate zones within districts
-        zones = self._generate_zones(districts, population)
+        with self._stage("zones"):
+            zones = self._cached_stage(
+                "zones",
+                "districts",
+                {"districts": district_params, "population": population},
+                lambda: self._generate_zones(districts, population, workers),
+            )
 
         # Generate infrastructure using Roman grid
-        infrastructure = self._generate_infrastructure_with_roman_grid(districts, city_size, roman_grid)
+        with self._stage("infrastructure"):
+            infrastructure = self._cached_stage(
+                "infrastructure",
+                "infrastructure",
+                {"districts": district_params, "city_size": city_size},
+                lambda: self._generate_infrastructure_with_roman_grid(
+                    districts, city_size, self._create_roman_grid(city_size)
+                ),
+            )
 
         # Generate demographics
-        demographics = self._generate_demographics(districts, population)
+        with self._stage("demographics"):
+            demographics = self._cached_stage(
+                "demographics",
+                "demographics",
+                {"population": population},
+                lambda: self._generate_demographics(districts, population),
+            )
 
         return CityLayout(
             width=city_size,
@@ -160,13 +740,22 @@ class CitySimulator:
             demographics=demographics,
         )
 
+    def _create_roman_grid(self, city_size: float) -> "RomanGridSystem":
+        """Create the Roman grid system the city is founded on."""
+        from .roman_grid import RomanGridSystem
+
+        roman_grid = RomanGridSystem(city_size, self.seed_manager)
+        with self._stage("roman_grid"):
+            roman_grid.create_founding_grid()
+        return roman_grid
+
     def _calculate_district_count(self, population: int) -> int:
         """Calculate appropriate number of districts based on population."""
         # Base calculation: roughly 1 district per 50k people
         base_districts = max(3, population // 50000)
 
         # Add some variation
-        rng = self.seed_manager.generator.get_rng("city.districts")
+        rng = self._get_stage_rng("city.districts")
         variation = rng.randint(-2, 3)
 
         return max(3, min(20, base_districts + variation))
@@ -178,6 +767,27 @@ class CitySimulator:
         districts = []
         rng = self.seed_manager.generator.get_rng("districts")
 
+        for i in range(district_count):
+            if self.keyed:
+                # Each district draws from its own counter-based stream
+                rng = self._get_entity_rng("districts", i)
+
+            district = self._generate_district(
+                i, district_count, city_size, population, rng
+            )
+            districts.append(district)
+
+        return districts
+
+    def _generate_district(
+        self,
+        index: int,
+        district_count: int,
+        city_size: float,
+        population: int,
+        rng: random.Random,
+    ) -> District:
+        """Generate a single district from the given RNG."""
         # District types with weights
         district_types = {
             "residential": 0.4,
@@ -186,50 +796,46 @@ class CitySimulator:
             "mixed": 0.15,
         }
 
-        for i in range(district_count):
-            # Generate district properties
-            name = self._generate_district_name(i, rng)
-            x = rng.uniform(0, city_size * 0.8)  # Leave some margin
-            y = rng.uniform(0, city_size * 0.8)
-            width = rng.uniform(1, city_size * 0.3)
-            height = rng.uniform(1, city_size * 0.3)
-
-            # Ensure district fits within city bounds
-            x = min(x, city_size - width)
-            y = min(y, city_size - height)
-
-            # Select district type
-            zone_type = self._select_weighted_choice(district_types, rng)
-
-            # Calculate population for this district
-            district_population = self._calculate_district_population(
-                i, district_count, population, zone_type, rng
-            )
+        # Generate district properties
+        name = self._generate_district_name(index, rng)
+        x = rng.uniform(0, city_size * 0.8)  # Leave some margin
+        y = rng.uniform(0, city_size * 0.8)
+        width = rng.uniform(1, city_size * 0.3)
+        height = rng.uniform(1, city_size * 0.3)
 
-            # Calculate density
-            area = width * height
-            density = district_population / area if area > 0 else 0
+        # Ensure district fits within city bounds
+        x = min(x, city_size - width)
+        y = min(y, city_size - height)
 
-            # Get district-specific seed
-            district_seed = self.seed_manager.get_district_seed(
-                name.lower().replace(" ", "_")
-            )
+        # Select district type
+        zone_type = self._select_weighted_choice(district_types, rng)
 
-            district = District(
-                id=f"district_{i}",
-                name=name,
-                x=x,
-                y=y,
-                width=width,
-                height=height,
-                population=district_population,
-                zone_type=zone_type,
-                density=density,
-                seed=district_seed,
-            )
-            districts.append(district)
+        # Calculate population for this district
+        district_population = self._calculate_district_population(
+            index, district_count, population, zone_type, rng
+        )
 
-        return districts
+        # Calculate density
+        area = width * height
+        density = district_population / area if area > 0 else 0
+
+        # Get district-specific seed
+        district_seed = self.seed_manager.get_district_seed(
+            name.lower().replace(" ", "_")
+        )
+
+        return District(
+            id=f"district_{index}",
+            name=name,
+            x=x,
+            y=y,
+            width=width,
+            height=height,
+            population=district_population,
+            zone_type=zone_type,
+            density=density,
+            seed=district_seed,
+        )
 
     def _generate_district_name(self, index: int, rng: random.Random) -> str:
         """Generate a district name."""
@@ -308,9 +914,15 @@ class CitySimulator:
         return max(1000, population)
 
     def _generate_zones(
-        self, districts: List[District], total_population: int
+        self,
+        districts: List[District],
+        total_population: int,
+        workers: Optional[int] = None,
     ) -> List[Zone]:
         """Generate zones within districts."""
+        if workers is not None and workers > 1:
+            return self._generate_zones_parallel(districts, total_population, workers)
+
         zones = []
 
         for district in districts:
@@ -318,59 +930,141 @@ class CitySimulator:
             zone_count = max(1, district.population // 10000)
 
             # Get district-specific RNG
-            district_rng = self.seed_manager.generator.get_rng(
-                f"districts.{district.name.lower().replace(' ', '_')}"
-            )
+            if not self.keyed:
+                district_rng = self.seed_manager.generator.get_rng(
+                    self._zone_stream_path(district)
+                )
 
             for i in range(zone_count):
-                # Generate zone within district bounds
-                zone_x = district_rng.uniform(district.x, district.x + district.width)
-                zone_y = district_rng.uniform(district.y, district.y + district.height)
-                zone_width = district_rng.uniform(0.2, district.width * 0.8)
-                zone_height = district_rng.uniform(0.2, district.height * 0.8)
-
-                # Ensure zone fits within district
-                zone_x = min(zone_x, district.x + district.width - zone_width)
-                zone_y = min(zone_y, district.y + district.height - zone_height)
-
-                # Zone type (can be different from district type)
-                zone_types = [
-                    "residential",
-                    "commercial",
-                    "industrial",
-                    "mixed",
-                    "park",
-                    "service",
-                ]
-                zone_type = district_rng.choice(zone_types)
-
-                # Calculate zone population
-                zone_area = zone_width * zone_height
-                zone_density = district.density * district_rng.uniform(0.5, 1.5)
-                zone_population = int(zone_area * zone_density)
-
-                # Get zone-specific seed
-                zone_seed = self.seed_manager.get_zone_seed(
-                    zone_type, district.name.lower().replace(" ", "_")
-                )
+                if self.keyed:
+                    # Zones are keyed by district id, which unlike the name
+                    # is unique within a city.
+                    district_rng = self._get_entity_rng(
+                        self._zone_stream_path(district), i
+                    )
+                zones.append(self._generate_zone(district, i, district_rng))
+
+        return zones
+
+    def _generate_zones_parallel(
+        self, districts: List[District], total_population: int, workers: int
+    ) -> List[Zone]:
+        """
+        Generate zones within districts using a process pool.
 
-                zone = Zone(
-                    id=f"zone_{district.id}_{i}",
-                    district_id=district.id,
-                    zone_type=zone_type,
-                    area=zone_area,
-                    population=zone_population,
-                    density=zone_density,
-                    x=zone_x,
-                    y=zone_y,
-                    width=zone_width,
-                    height=zone_height,
-                    seed=zone_seed,
+        Districts drawing from the same RNG stream are kept in one task, in
+        order, so every stream is consumed exactly as in serial generation.
+        In sequential mode each task starts its streams where this
+        simulator's streams stand, and their final states are copied back,
+        so repeated runs on one simulator also match serial generation.
+        """
+        groups: Dict[str, List[District]] = {}
+        for district in districts:
+            groups.setdefault(self._zone_stream_path(district), []).append(district)
+
+        batches: List[List[District]] = [[] for _ in range(min(workers, len(groups)))]
+        for k, group in enumerate(groups.values()):
+            batches[k % len(batches)].extend(group)
+
+        generator = self.seed_manager.generator
+        tasks = []
+        for batch in batches:
+            rng_states = {}
+            if not self.keyed:
+                for path in dict.fromkeys(map(self._zone_stream_path, batch)):
+                    state = generator.get_rng_state(path)
+                    if state is not None:
+                        rng_states[path] = state
+            tasks.append(
+                (
+                    self.config,
+                    generator.master_seed,
+                    generator.settings(),
+                    batch,
+                    total_population,
+                    rng_states,
+                )
+            )
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_generate_zone_batch, tasks))
+
+        by_district: Dict[str, List[Zone]] = {d.id: [] for d in districts}
+        final_states: Dict[str, Tuple[Any, int]] = {}
+        for batch_zones, batch_states in results:
+            for zone in batch_zones:
+                by_district[zone.district_id].append(zone)
+            final_states.update(batch_states)
+
+        # Derive the seeds serial generation derives, in the same order, so
+        # the seed tree and cache statistics match too.
+        zones = []
+        for district in districts:
+            path = self._zone_stream_path(district)
+            if not self.keyed:
+                generator.get_rng(path)
+            for zone in by_district[district.id]:
+                if self.keyed:
+                    generator.get_counter_rng(path)
+                self.seed_manager.get_zone_seed(
+                    zone.zone_type, district.name.lower().replace(" ", "_")
                 )
                 zones.append(zone)
 
+        # Leave each stream where serial generation would have left it
+        for path, state in final_states.items():
+            generator.set_rng_state(path, state)
+
         return zones
 
+    def _generate_zone(
+        self, district: District, index: int, district_rng: random.Random
+    ) -> Zone:
+        """Generate a single zone within a district from the given RNG."""
+        # Generate zone within district bounds
+        zone_x = district_rng.uniform(district.x, district.x + district.width)
+        zone_y = district_rng.uniform(district.y, district.y + district.height)
+        zone_width = district_rng.uniform(0.2, district.width * 0.8)
+        zone_height = district_rng.uniform(0.2, district.height * 0.8)
+
+        # Ensure zone fits within district
+        zone_x = min(zone_x, district.x + district.width - zone_width)
+        zone_y = min(zone_y, district.y + district.height - zone_height)
+
+        # Zone type (can be different from district type)
+        zone_types = [
+            "residential",
+            "commercial",
+            "industrial",
+            "mixed",
+            "park",
+            "service",
+        ]
+        zone_type = district_rng.choice(zone_types)
+
+        # Calculate zone population
+        zone_area = zone_width * zone_height
+        zone_density = district.density * district_rng.uniform(0.5, 1.5)
+        zone_population = int(zone_area * zone_density)
+
+        # Get zone-specific seed
+        zone_seed = self.seed_manager.get_zone_seed(
+            zone_type, district.name.lower().replace(" ", "_")
+        )
+
+        return Zone(
+            id=f"zone_{district.id}_{index}",
+            district_id=district.id,
+            zone_type=zone_type,
+            area=zone_area,
+            population=zone_population,
+            density=zone_density,
+            x=zone_x,
+            y=zone_y,
+            width=zone_width,
+            height=zone_height,
+            seed=zone_seed,
+        )
+
     def _generate_infrastructure_with_roman_grid(
         self, districts: List[District], city_size: float, roman_grid: 'RomanGridSystem'
     ) -> Dict[str, Any]:
@@ -588,32 +1282,116 @@ class CitySimulator:
 
         return demographics
 
-    def export_city_data(self) -> Dict[str, Any]:
-        """Export complete city data for web interface."""
+    def export_city_data(
+        self, copy_layout: bool = True, include_timings: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Export complete city data for web interface.
+
+        Args:
+            copy_layout: Whether to convert the layout to nested dictionaries.
+                Pass False to get the layout object itself, e.g. for
+                JSONStreamEncoder, which walks it directly.
+            include_timings: Whether to add the stage timings of the last
+                simulation to the metadata as "stage_timings"
+
+        Returns:
+            City data dictionary
+        """
         if not self.city_layout:
             raise ValueError("City must be simulated before exporting")
 
-        return {
+        layout: Any
+        if isinstance(self.city_layout, ColumnarLayout):
+            population = self.city_layout.districts.sum("population")
+            layout = self.city_layout.to_dict() if copy_layout else self.city_layout
+        else:
+            population = sum(d.population for d in self.city_layout.districts)
+            layout = asdict(self.city_layout) if copy_layout else self.city_layout
+
+        data: Dict[str, Any] = {
             "metadata": {
                 "generated_at": self.population_model.__dict__.get(
                     "generated_at", "unknown"
                 ),
                 "master_seed": self.seed_manager.generator.master_seed,
-                "population": sum(d.population for d in self.city_layout.districts),
+                "population": population,
                 "area": self.city_layout.total_area,
                 "districts": len(self.city_layout.districts),
                 "zones": len(self.city_layout.zones),
             },
-            "layout": asdict(self.city_layout),
+            "layout": layout,
             "population_model": {
                 "workforce": self.population_model.workforce(),
                 "zones": self.population_model.zones,
                 "occupations": self.population_model.occupations,
                 "histogram": self.population_model.histogram,
             },
-            "seed_tree": self.seed_manager.export_seed_tree(),
+            # Seeds are recomputable from the master seed, so only the tree
+            # structure is shipped with every city. Cache counters are left
+            # out so the export does not depend on cache state.
+            "seed_tree": self.seed_manager.export_seed_tree(
+                include_seeds=False, include_metadata=False
+            ),
         }
 
+        if include_timings:
+            data["metadata"]["stage_timings"] = [asdict(t) for t in self.stage_timings]
+
+        return data
+
+    def export_city_binary(
+        self, include_routing: bool = False, **options: Any
+    ) -> bytes:
+        """
+        Export the city layout and metadata in the binary format.
+
+        Args:
+            include_routing: Whether to store the travel time contraction
+                hierarchy of the roads with the layout
+            **options: encode_tables compression and float_dtype
+
+        Returns:
+            Encoded bytes, readable with decode_city_layout (and
+            ContractionHierarchy.from_bytes with include_routing)
+        """
+        metadata = self.export_city_data(copy_layout=False)["metadata"]
+        routing = self.contraction_hierarchy() if include_routing else None
+        return encode_city_layout(self.city_layout, metadata, routing, **options)
+
+
+def _generate_zone_batch(
+    task: Tuple[
+        Dict[str, Any],
+        int,
+        Dict[str, Any],
+        List[District],
+        int,
+        Dict[str, Tuple[Any, int]],
+    ],
+) -> Tuple[List[Zone], Dict[str, Tuple[Any, int]]]:
+    """
+    Generate a batch of districts' zones; module level for worker processes.
+
+    Returns the zones and, in sequential mode, the final state of every RNG
+    stream the batch drew from.
+    """
+    config, master_seed, settings, districts, total_population, rng_states = task
+    simulator = CitySimulator(config)
+    simulator.seed_manager = CitySeedManager(master_seed, **settings)
+    generator = simulator.seed_manager.generator
+    for path, state in rng_states.items():
+        generator.set_rng_state(path, state)
+
+    zones = simulator._generate_zones(districts, total_population)
+    final_states: Dict[str, Tuple[Any, int]] = {}
+    if not simulator.keyed:
+        for path in dict.fromkeys(map(simulator._zone_stream_path, districts)):
+            final_state = generator.get_rng_state(path)
+            if final_state is not None:
+                final_states[path] = final_state
+    return zones, final_states
+
 
 def simulate_city_from_config(
     config_path: str, target_population: int = None
@@ -0,0 +1,265 @@
+"""
+Struct-of-Arrays City Layout
+
+This module stores the districts and zones of a city layout as one NumPy array
+per dataclass field instead of a list of dataclass instances. String fields are
+dictionary encoded as integer codes into a tuple of categories. Bulk statistics
+and export run over the arrays, while indexing or iterating a table still hands
+out ``District``/``Zone`` instances built on demand, so code written against
+``CityLayout`` keeps working.
+
+Tables are converted from finished lists of records. They shrink what a city
+holds once generated and speed up bulk queries, but generation itself still
+peaks at the size of the dataclass records plus the columns.
+"""
+
+from dataclasses import dataclass, fields, is_dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple, Type
+
+import numpy as np
+
+# Array dtypes for dataclass field types; strings are stored as category codes
+FIELD_DTYPES = {float: np.float64, int: np.int64, str: np.int32}
+
+# Fields stored with a narrower dtype than their Python type suggests
+FIELD_DTYPE_OVERRIDES = {"seed": np.uint32}
+
+
+class ColumnarTable(Sequence):
+    """
+    A read-only table of dataclass records stored column by column.
+
+    Records returned by indexing or iteration are fresh dataclass instances;
+    modifying them does not modify the table.
+    """
+
+    def __init__(
+        self,
+        record_type: Type,
+        columns: Dict[str, np.ndarray],
+        categories: Dict[str, Tuple[str, ...]],
+    ):
+        self.record_type = record_type
+        self.columns = columns
+        # Category values for each string column, indexed by its codes
+        self.categories = categories
+        self._names = [f.name for f in fields(record_type)]
+        self._length = len(next(iter(columns.values()))) if columns else 0
+
+    @classmethod
+    def from_records(cls, record_type: Type, records: Iterable[Any]) -> "ColumnarTable":
+        """
+        Build a table from dataclass instances.
+
+        Args:
+            record_type: Dataclass type of the records
+            records: Instances of record_type
+
+        Returns:
+            Table holding the records
+        """
+        if not is_dataclass(record_type):
+            raise TypeError(f"{record_type!r} is not a dataclass")
+
+        records = list(records)
+        columns = {}
+        categories = {}
+        for field in fields(record_type):
+            values = [getattr(record, field.name) for record in records]
+            if _field_type(field.type) is str:
+                # Categories in order of first appearance keep codes stable
+                index = {
+                    value: code for code, value in enumerate(dict.fromkeys(values))
+                }
+                categories[field.name] = tuple(index)
+                columns[field.name] = np.fromiter(
+                    (index[value] for value in values),
+                    dtype=FIELD_DTYPES[str],
+                    count=len(values),
+                )
+            else:
+                dtype = FIELD_DTYPE_OVERRIDES.get(
+                    field.name, FIELD_DTYPES[_field_type(field.type)]
+                )
+                columns[field.name] = np.array(values, dtype=dtype)
+
+        return cls(record_type, columns, categories)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("table index out of range")
+
+        return self.record_type(
+            **{name: self._value(name, index) for name in self._names}
+        )
+
+    def __iter__(self) -> Iterator[Any]:
+        for row in zip(*(self.values(name) for name in self._names)):
+            yield self.record_type(*row)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, ColumnarTable):
+            return self.record_type is other.record_type and self.to_dicts() == (
+                other.to_dicts()
+            )
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    def _value(self, name: str, index: int) -> Any:
+        """Get a single field value as a Python object."""
+        value = self.columns[name][index].item()
+        if name in self.categories:
+            return self.categories[name][value]
+        return value
+
+    def values(self, name: str) -> List[Any]:
+        """
+        Get a column as a list of Python objects.
+
+        Args:
+            name: Field name
+
+        Returns:
+            Field values, with string columns decoded
+        """
+        column = self.columns[name]
+        values: List[Any]
+        if name in self.categories:
+            values = np.array(self.categories[name], dtype=object)[column].tolist()
+        else:
+            values = column.tolist()
+        return values
+
+    def mask(self, **filters: Any) -> np.ndarray:
+        """
+        Get a boolean mask of the records matching all filters.
+
+        Args:
+            **filters: Field name to required value
+
+        Returns:
+            Boolean array with one entry per record
+        """
+        mask = np.ones(self._length, dtype=bool)
+        for name, value in filters.items():
+            if name in self.categories:
+                if value not in self.categories[name]:
+                    return np.zeros(self._length, dtype=bool)
+                value = self.categories[name].index(value)
+            mask &= self.columns[name] == value
+        return mask
+
+    def sum(self, name: str) -> Any:
+        """Get the sum of a numeric column as a Python number."""
+        return self.columns[name].sum().item()
+
+    def group_sum(self, value: str, by: str) -> Dict[str, Any]:
+        """
+        Sum a numeric column per category of a string column.
+
+        Args:
+            value: Numeric field to sum (e.g., "population")
+            by: String field to group by (e.g., "zone_type")
+
+        Returns:
+            Dictionary mapping each category to its total
+        """
+        column = self.columns[value]
+        totals = np.zeros(len(self.categories[by]), dtype=column.dtype)
+        np.add.at(totals, self.columns[by], column)
+        return dict(zip(self.categories[by], totals.tolist()))
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Get the records as dictionaries, like dataclasses.asdict."""
+        columns = [self.values(name) for name in self._names]
+        return [dict(zip(self._names, row)) for row in zip(*columns)]
+
+
+def _field_type(annotation: Any) -> type:
+    """Resolve a dataclass field annotation to float, int or str."""
+    if isinstance(annotation, str):
+        return {"float": float, "int": int, "str": str}[annotation]
+    resolved: type = annotation
+    return resolved
+
+
+@dataclass
+class ColumnarLayout:
+    """A CityLayout whose districts and zones are columnar tables."""
+
+    width: float
+    height: float
+    total_area: float
+    districts: ColumnarTable
+    zones: ColumnarTable
+    infrastructure: Dict[str, Any]
+    demographics: Dict[str, Any]
+
+    @classmethod
+    def from_layout(cls, layout: Any) -> "ColumnarLayout":
+        """
+        Convert a CityLayout to the columnar backend.
+
+        This is a conversion of a finished layout: the caller's lists stay
+        alive until it releases them.
+
+        Args:
+            layout: CityLayout to convert
+
+        Returns:
+            Equivalent ColumnarLayout
+        """
+        from .city_simulator import District, Zone
+
+        return cls(
+            width=layout.width,
+            height=layout.height,
+            total_area=layout.total_area,
+            districts=ColumnarTable.from_records(District, layout.districts),
+            zones=ColumnarTable.from_records(Zone, layout.zones),
+            infrastructure=layout.infrastructure,
+            demographics=layout.demographics,
+        )
+
+    def to_layout(self) -> Any:
+        """Convert back to a list-based CityLayout."""
+        from .city_simulator import CityLayout
+
+        return CityLayout(
+            width=self.width,
+            height=self.height,
+            total_area=self.total_area,
+            districts=list(self.districts),
+            zones=list(self.zones),
+            infrastructure=self.infrastructure,
+            demographics=self.demographics,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the layout as a dictionary, like dataclasses.asdict."""
+        return {
+            "width": self.width,
+            "height": self.height,
+            "total_area": self.total_area,
+            "districts": self.districts.to_dicts(),
+            "zones": self.zones.to_dicts(),
+            "infrastructure": _copy_plain(self.infrastructure),
+            "demographics": _copy_plain(self.demographics),
+        }
+
+
+def _copy_plain(value: Any) -> Any:
+    """Copy nested dicts and lists of plain values, like asdict does."""
+    if isinstance(value, dict):
+        return {key: _copy_plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_copy_plain(item) for item in value)
+    return value
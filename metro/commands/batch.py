@@ -0,0 +1,55 @@
+from typing import List
+
+import typer
+
+from metro.batch import parameter_grid, run_batch
+
+
+def batch(
+    seed: List[int] = typer.Option(
+        None, help="A master seed to simulate; repeat for several."
+    ),
+    seed_count: int = typer.Option(
+        0, help="Also simulate the seeds 0 to seed_count - 1."
+    ),
+    population: List[int] = typer.Option(
+        [100000], help="A target population; repeat for several."
+    ),
+    city_size: List[float] = typer.Option(
+        None, help="A city size in km; repeat for several. Derived if omitted."
+    ),
+    workers: int = typer.Option(None, help="Worker processes to run cities on."),
+    rng_mode: str = typer.Option("sequential", help="Entity RNG mode."),
+    population_mode: str = typer.Option("legacy", help="Population sampling mode."),
+    metadata_only: bool = typer.Option(
+        False, help="Write only each city's metadata instead of its full export."
+    ),
+    output_file: str = typer.Option(
+        "cities.jsonl", help="The JSON lines file to write the cities to."
+    ),
+) -> None:
+    """
+    Simulates every combination of seeds, populations and city sizes.
+    """
+    seeds = list(seed or []) + list(range(seed_count))
+    if not seeds:
+        raise typer.BadParameter("Give at least one --seed or a --seed-count.")
+
+    jobs = parameter_grid(seeds, population, city_size or [None])
+    print(f"Simulating {len(jobs)} cities with {workers or 1} worker(s).")
+
+    summary = run_batch(
+        jobs,
+        output_file,
+        workers=workers,
+        config={"rng_mode": rng_mode, "population_mode": population_mode},
+        include_layout=not metadata_only,
+    )
+
+    print(
+        f"Simulated {summary.cities} cities ({summary.failed} failed) in "
+        f"{summary.elapsed:.2f} s, {summary.cities_per_second:.2f} cities/s."
+    )
+    print(f"Cities saved to {output_file}.")
+    if summary.failed:
+        raise typer.Exit(code=1)
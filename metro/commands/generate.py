@@ -4,7 +4,9 @@ import random
 # import json
 from metro.city import City
 from metro.population import PopulationModel
+from metro.population_store import write_population_store
 from metro.model import CityModel, Workforce, Zone, Occupation, HistogramEntry
+from metro.seed_system import HierarchicalSeedGenerator, generate_reproducible_city_id
 
 
 def generate(
@@ -13,6 +15,9 @@ def generate(
     output_file: str = typer.Option(
         "city.json", help="The output file to save the city configuration."
     ),
+    people_dir: str = typer.Option(
+        None, help="Directory to write individual residents to as .npy columns."
+    ),
 ):
     """
     Generates a new city model.
@@ -45,7 +50,16 @@ def generate(
     )
 
     # Save the city configuration to a file.
+    city_config = city_model.model_dump()
     with open(output_file, "w") as f:
         f.write(city_model.model_dump_json(indent=2))
 
     print(f"City configuration saved to {output_file}.")
+
+    if people_dir is not None:
+        # Same config as the city file, so the ids match
+        city_id = generate_reproducible_city_id(city_config)
+        write_population_store(
+            people_dir, population_model, HierarchicalSeedGenerator(seed), city_id
+        )
+        print(f"Residents saved to {people_dir}.")
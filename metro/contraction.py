@@ -0,0 +1,506 @@
+"""
+Contraction Hierarchies for Road Networks
+
+This module preprocesses a RoadNetwork so shortest-path queries touch only a
+small part of it. Nodes are contracted one at a time, least important first
+(fewest shortcuts added relative to edges removed). Contracting a node adds a
+shortcut between each pair of its remaining neighbours whose shortest path
+runs through it, unless a bounded witness search finds another path at most as
+short.
+
+Each edge, original or shortcut, is stored once in the upward graph of its
+lower-ranked end, in compressed sparse row form like the road network. A query
+runs Dijkstra upward from both ends and meets at the highest node of the
+shortest path; shortcuts are unpacked into road network edges for routes.
+"""
+
+import heapq
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .binary_format import decode_tables, encode_tables
+from .road_network import Route
+
+# Nodes settled by one witness search before giving up and adding a shortcut
+WITNESS_SETTLE_LIMIT = 64
+
+
+class ContractionHierarchy:
+    """
+    Shortest-path index over a road network, for one edge weight.
+
+    Args:
+        rank: Contraction order of every node
+        edge_source: Lower-ranked end of every upward edge
+        edge_target: Higher-ranked end of every upward edge
+        edge_cost: Cost of every upward edge
+        edge_middle: Node a shortcut bypasses, -1 for road network edges
+        edge_road_edge: Road network edge of every upward edge, -1 for
+            shortcuts
+        road_length: Road network edge lengths in km
+        road_time: Road network edge travel times in minutes
+        weight: Edge weight the hierarchy was built for, "time" or "length"
+    """
+
+    def __init__(
+        self,
+        rank: Any,
+        edge_source: Any,
+        edge_target: Any,
+        edge_cost: Any,
+        edge_middle: Any,
+        edge_road_edge: Any,
+        road_length: Any,
+        road_time: Any,
+        weight: str = "time",
+    ):
+        self.rank = np.asarray(rank, dtype=np.int64)
+        self.edge_source = np.asarray(edge_source, dtype=np.int64)
+        self.edge_target = np.asarray(edge_target, dtype=np.int64)
+        self.edge_cost = np.asarray(edge_cost, dtype=np.float64)
+        self.edge_middle = np.asarray(edge_middle, dtype=np.int64)
+        self.edge_road_edge = np.asarray(edge_road_edge, dtype=np.int64)
+        self.road_length = np.asarray(road_length, dtype=np.float64)
+        self.road_time = np.asarray(road_time, dtype=np.float64)
+        self.weight = weight
+
+        order = np.argsort(self.edge_source, kind="stable")
+        self.up_targets = self.edge_target[order]
+        self.up_edges = order
+        self.up_offsets = np.zeros(len(self.rank) + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(self.edge_source, minlength=len(self.rank)),
+            out=self.up_offsets[1:],
+        )
+
+        # Python lists for queries, and each edge keyed by its ends for unpacking
+        self._offsets = self.up_offsets.tolist()
+        self._targets = self.up_targets.tolist()
+        self._costs = self.edge_cost[order].tolist()
+        self._edges = order.tolist()
+        self._edge_by_ends: Optional[Dict[Tuple[int, int], int]] = None
+
+    @classmethod
+    def build(cls, network: Any, weight: str = "time") -> "ContractionHierarchy":
+        """
+        Contract a road network.
+
+        Args:
+            network: RoadNetwork to index
+            weight: "time" or "length"
+
+        Returns:
+            Hierarchy answering queries between the network's nodes
+        """
+        costs = network.weights(weight).tolist()
+        # Remaining graph: node -> neighbour -> (cost, middle node, road edge)
+        graph: List[Dict[int, Tuple[float, int, int]]] = [
+            {} for _ in range(network.node_count)
+        ]
+        for edge, (u, w) in enumerate(
+            zip(network.edge_source.tolist(), network.edge_target.tolist())
+        ):
+            if u != w and costs[edge] < graph[u].get(w, (math.inf,))[0]:
+                graph[u][w] = graph[w][u] = (costs[edge], -1, edge)
+
+        rank = [-1] * network.node_count
+        contracted = 0
+        upward: List[Tuple[int, int, float, int, int]] = []
+        contracted_neighbors = [0] * network.node_count
+
+        def priority(node: int) -> int:
+            shortcuts = _shortcuts(graph, node)
+            return len(shortcuts) - len(graph[node]) + contracted_neighbors[node]
+
+        heap = [(priority(node), node) for node in range(network.node_count)]
+        heapq.heapify(heap)
+        while heap:
+            _, node = heapq.heappop(heap)
+            if rank[node] >= 0:
+                continue
+            # Lazy update: contract only if still the least important node
+            current = priority(node)
+            if heap and current > heap[0][0]:
+                heapq.heappush(heap, (current, node))
+                continue
+
+            rank[node] = contracted
+            contracted += 1
+            for u, w, cost in _shortcuts(graph, node):
+                if cost < graph[u].get(w, (math.inf,))[0]:
+                    graph[u][w] = graph[w][u] = (cost, node, -1)
+            for neighbor, (cost, middle, edge) in graph[node].items():
+                upward.append((node, neighbor, cost, middle, edge))
+                del graph[neighbor][node]
+                contracted_neighbors[neighbor] += 1
+            graph[node] = {}
+
+        columns: List[List[Any]] = [list(column) for column in zip(*upward)]
+        sources, targets, costs, middles, road_edges = columns or [[]] * 5
+        return cls(
+            rank,
+            sources,
+            targets,
+            costs,
+            middles,
+            road_edges,
+            network.edge_length,
+            network.edge_time,
+            weight,
+        )
+
+    @property
+    def node_count(self) -> int:
+        return len(self.rank)
+
+    def _search(self, source: int, target: int) -> Tuple[float, int, Dict, Dict]:
+        """Run the bidirectional upward search: (cost, meeting node, parents)."""
+        offsets, targets, costs, edges = (
+            self._offsets,
+            self._targets,
+            self._costs,
+            self._edges,
+        )
+        dist = ({source: 0.0}, {target: 0.0})
+        parents: Tuple[Dict[int, int], Dict[int, int]] = ({}, {})
+        heaps = ([(0.0, source)], [(0.0, target)])
+        best, meeting = (0.0, source) if source == target else (math.inf, -1)
+
+        side = 0
+        while heaps[0] or heaps[1]:
+            if not heaps[side]:
+                side = 1 - side
+            cost, node = heapq.heappop(heaps[side])
+            own, other = dist[side], dist[1 - side]
+            if cost <= own[node]:
+                if node in other and cost + other[node] < best:
+                    best, meeting = cost + other[node], node
+                for i in range(offsets[node], offsets[node + 1]):
+                    neighbor = targets[i]
+                    candidate = cost + costs[i]
+                    if candidate < own.get(neighbor, math.inf):
+                        own[neighbor] = candidate
+                        parents[side][neighbor] = edges[i]
+                        heapq.heappush(heaps[side], (candidate, neighbor))
+            # A side whose next node costs at least the best path is done
+            for s in (0, 1):
+                if heaps[s] and heaps[s][0][0] >= best:
+                    heaps[s].clear()
+            side = 1 - side
+
+        return best, meeting, parents[0], parents[1]
+
+    def query(self, source: int, target: int) -> float:
+        """
+        Find the cost of the shortest path between two nodes.
+
+        Args:
+            source: Source node
+            target: Target node
+
+        Returns:
+            Cost in the hierarchy's weight, infinite when unreachable
+        """
+        return self._search(source, target)[0]
+
+    def pair_costs(self, sources: Any, targets: Any) -> np.ndarray:
+        """
+        Find the costs of many shortest paths at once (many-to-many).
+
+        Every distinct node gets one full upward search. The searches from
+        target nodes fill per-node buckets of (target, cost), and each source
+        node's search is joined with the buckets of the nodes it reaches, so
+        the cost is a few searches per node rather than one per pair.
+
+        Args:
+            sources: Source node of every pair
+            targets: Target node of every pair
+
+        Returns:
+            Cost in the hierarchy's weight of every pair, infinite when
+            unreachable
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        costs = np.full(len(sources), math.inf)
+        if len(sources) == 0:
+            return costs
+
+        spaces: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+        def space(node: int) -> Tuple[np.ndarray, np.ndarray]:
+            if node not in spaces:
+                spaces[node] = self._upward_space(node)
+            return spaces[node]
+
+        # Bucket of every node: the targets whose upward search reached it
+        target_nodes, target_index = np.unique(targets, return_inverse=True)
+        target_spaces = [space(int(node)) for node in target_nodes]
+        bucket_node = np.concatenate([nodes for nodes, _ in target_spaces])
+        bucket_target = np.repeat(
+            np.arange(len(target_nodes)), [len(nodes) for nodes, _ in target_spaces]
+        )
+        bucket_cost = np.concatenate([cost for _, cost in target_spaces])
+        order = np.argsort(bucket_node, kind="stable")
+        bucket_target, bucket_cost = bucket_target[order], bucket_cost[order]
+        bucket_offsets = np.zeros(self.node_count + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(bucket_node, minlength=self.node_count),
+            out=bucket_offsets[1:],
+        )
+
+        pair_order = np.argsort(sources, kind="stable")
+        source_nodes, starts = np.unique(sources[pair_order], return_index=True)
+        bounds = list(starts) + [len(pair_order)]
+        for k, node in enumerate(source_nodes):
+            nodes, cost = space(int(node))
+            # Bucket entries of every node the source's search reached
+            first, counts = bucket_offsets[nodes], np.diff(bucket_offsets)[nodes]
+            entries = np.arange(counts.sum()) + np.repeat(
+                first - (np.cumsum(counts) - counts), counts
+            )
+            row = np.full(len(target_nodes), math.inf)
+            np.minimum.at(
+                row,
+                bucket_target[entries],
+                np.repeat(cost, counts) + bucket_cost[entries],
+            )
+            pairs = pair_order[bounds[k] : bounds[k + 1]]
+            costs[pairs] = row[target_index[pairs]]
+        return costs
+
+    def _upward_space(self, source: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Run an unpruned upward Dijkstra: (nodes settled, their costs)."""
+        offsets, targets, costs = self._offsets, self._targets, self._costs
+        dist = {source: 0.0}
+        heap = [(0.0, source)]
+        nodes: List[int] = []
+        settled: List[float] = []
+        while heap:
+            cost, node = heapq.heappop(heap)
+            if cost > dist[node]:
+                continue
+            nodes.append(node)
+            settled.append(cost)
+            for i in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[i]
+                candidate = cost + costs[i]
+                if candidate < dist.get(neighbor, math.inf):
+                    dist[neighbor] = candidate
+                    heapq.heappush(heap, (candidate, neighbor))
+        return np.array(nodes, dtype=np.int64), np.array(settled)
+
+    def route(self, source: int, target: int) -> Optional[Route]:
+        """
+        Find the shortest path between two nodes as road network edges.
+
+        Args:
+            source: Source node
+            target: Target node
+
+        Returns:
+            Route, or None when the target is unreachable
+        """
+        cost, meeting, forward, backward = self._search(source, target)
+        if math.isinf(cost):
+            return None
+
+        # Upward edges from each end to the meeting node
+        up_edges = []
+        node = meeting
+        while node != source:
+            edge = forward[node]
+            up_edges.append(edge)
+            node = int(self.edge_source[edge])
+        up_edges.reverse()
+        node = meeting
+        while node != target:
+            edge = backward[node]
+            up_edges.append(edge)
+            node = int(self.edge_source[edge])
+
+        nodes: List[int] = [source]
+        road_edges: List[int] = []
+        for edge in up_edges:
+            self._unpack(edge, nodes, road_edges)
+        return Route(
+            nodes,
+            road_edges,
+            float(self.road_length[road_edges].sum()),
+            float(self.road_time[road_edges].sum()),
+        )
+
+    def _unpack(self, edge: int, nodes: List[int], road_edges: List[int]) -> None:
+        """Append an upward edge's road edges, walked from nodes[-1]."""
+        u, w = int(self.edge_source[edge]), int(self.edge_target[edge])
+        end = w if nodes[-1] == u else u
+        middle = int(self.edge_middle[edge])
+        if middle < 0:
+            nodes.append(end)
+            road_edges.append(int(self.edge_road_edge[edge]))
+            return
+
+        if self._edge_by_ends is None:
+            self._edge_by_ends = {
+                (a, b): e
+                for e, (a, b) in enumerate(
+                    zip(self.edge_source.tolist(), self.edge_target.tolist())
+                )
+            }
+        # The bypassed node was contracted first, so it is each half's source
+        self._unpack(self._edge_by_ends[(middle, nodes[-1])], nodes, road_edges)
+        self._unpack(self._edge_by_ends[(middle, end)], nodes, road_edges)
+
+    def tables(self) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Any]]:
+        """
+        Get the hierarchy as binary format tables and header.
+
+        Returns:
+            Tuple of (tables, header) for encode_tables
+        """
+        tables = {
+            "ranks": {
+                "rows": self.node_count,
+                "columns": {"rank": self.rank.tolist()},
+            },
+            "edges": {
+                "rows": len(self.edge_source),
+                "columns": {
+                    "source": self.edge_source.tolist(),
+                    "target": self.edge_target.tolist(),
+                    "cost": self.edge_cost.tolist(),
+                    "middle": self.edge_middle.tolist(),
+                    "road_edge": self.edge_road_edge.tolist(),
+                },
+            },
+            "road_edges": {
+                "rows": len(self.road_length),
+                "columns": {
+                    "length": self.road_length.tolist(),
+                    "time": self.road_time.tolist(),
+                },
+            },
+        }
+        return tables, {"type": "contraction_hierarchy", "weight": self.weight}
+
+    @classmethod
+    def from_tables(
+        cls, tables: Dict[str, Dict[str, Any]], header: Dict[str, Any]
+    ) -> "ContractionHierarchy":
+        """
+        Rebuild a hierarchy from decoded tables.
+
+        Args:
+            tables: Tables as produced by tables(), after decoding
+            header: Header as produced by tables()
+
+        Returns:
+            Hierarchy
+        """
+        edges = tables["edges"]["columns"]
+        road_edges = tables["road_edges"]["columns"]
+        return cls(
+            tables["ranks"]["columns"]["rank"],
+            edges["source"],
+            edges["target"],
+            edges["cost"],
+            edges["middle"],
+            edges["road_edge"],
+            road_edges["length"],
+            road_edges["time"],
+            weight=header["weight"],
+        )
+
+    def to_bytes(self, **options: Any) -> bytes:
+        """
+        Encode the hierarchy in the binary format.
+
+        Args:
+            **options: encode_tables compression and float_dtype; float64
+                (the default here) keeps query costs exact
+
+        Returns:
+            Encoded bytes
+        """
+        tables, header = self.tables()
+        options.setdefault("float_dtype", "float64")
+        return encode_tables(tables, header, **options)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ContractionHierarchy":
+        """
+        Decode a hierarchy written by to_bytes or stored with a city layout.
+
+        Args:
+            data: Encoded bytes
+
+        Returns:
+            Hierarchy
+        """
+        tables, header = decode_tables(data)
+        if header.get("type") == "city":
+            if "routing" not in header:
+                raise ValueError("Metro city file holds no contraction hierarchy")
+            prefix = "routing_"
+            tables = {
+                name[len(prefix) :]: table
+                for name, table in tables.items()
+                if name.startswith(prefix)
+            }
+            header = header["routing"]
+        if header.get("type") != "contraction_hierarchy":
+            raise ValueError("Metro file does not hold a contraction hierarchy")
+        return cls.from_tables(tables, header)
+
+
+def _shortcuts(
+    graph: List[Dict[int, Tuple[float, int, int]]], node: int
+) -> List[Tuple[int, int, float]]:
+    """Find the shortcuts contracting a node needs: (u, w, cost) with u < w."""
+    neighbors = graph[node]
+    if len(neighbors) < 2:
+        return []
+    max_out = max(cost for cost, _, _ in neighbors.values())
+
+    shortcuts = []
+    for u, (cost_u, _, _) in neighbors.items():
+        targets = {w: cost_u + c for w, (c, _, _) in neighbors.items() if w > u}
+        if not targets:
+            continue
+        witness = _witness_search(graph, u, node, cost_u + max_out, targets)
+        for w, via_node in targets.items():
+            if witness.get(w, math.inf) > via_node:
+                shortcuts.append((u, w, via_node))
+    return shortcuts
+
+
+def _witness_search(
+    graph: List[Dict[int, Tuple[float, int, int]]],
+    source: int,
+    excluded: int,
+    limit: float,
+    targets: Dict[int, float],
+) -> Dict[int, float]:
+    """Bounded Dijkstra from source avoiding one node; costs of nodes reached."""
+    dist = {source: 0.0}
+    heap = [(0.0, source)]
+    remaining = set(targets)
+    settled = 0
+    while heap and remaining and settled < WITNESS_SETTLE_LIMIT:
+        cost, node = heapq.heappop(heap)
+        if cost > dist[node]:
+            continue
+        if cost > limit:
+            break
+        settled += 1
+        remaining.discard(node)
+        for neighbor, (edge_cost, _, _) in graph[node].items():
+            if neighbor == excluded:
+                continue
+            candidate = cost + edge_cost
+            if candidate < dist.get(neighbor, math.inf):
+                dist[neighbor] = candidate
+                heapq.heappush(heap, (candidate, neighbor))
+    return dist
@@ -0,0 +1,401 @@
+"""
+Monte Carlo Ensembles of Simulated Cities
+
+This module simulates the same city configuration under many master seeds and
+summarizes how layout metrics such as district count or service count vary
+across seeds. Metrics are aggregated as results arrive: RunningStats keeps
+Welford's running mean and variance, and QuantileSketch is a merging t-digest
+for quantiles, so no layout is kept once its metrics have been measured.
+
+Seeds are simulated in fixed-size rounds, optionally across a process pool,
+and results are aggregated in seed order. The run stops once the confidence
+interval of every metric's mean is within the requested tolerance, so results
+do not depend on the number of workers.
+"""
+
+import bisect
+import math
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .city_simulator import CitySimulator
+from .occupations import load_occupation_table
+
+Metric = Callable[[Any], float]
+
+# Quantiles reported by EnsembleResult.summary
+SUMMARY_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+class RunningStats:
+    """Streaming count, mean, variance and range (Welford's algorithm)."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        """Add one observation."""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "RunningStats") -> None:
+        """Add every observation of another RunningStats (Chan et al.)."""
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        """Sample variance, 0 for fewer than two observations."""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation."""
+        return math.sqrt(self.variance)
+
+    def confidence_half_width(self, confidence: float = 0.95) -> float:
+        """
+        Half-width of the normal confidence interval of the mean.
+
+        Args:
+            confidence: Confidence level
+
+        Returns:
+            Half-width, infinite for fewer than two observations
+        """
+        if self.count < 2:
+            return math.inf
+        z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+        return z * self.std / math.sqrt(self.count)
+
+
+class QuantileSketch:
+    """
+    A merging t-digest estimating quantiles in bounded memory.
+
+    Observations are buffered and periodically merged into at most about
+    ``compression`` weighted centroids. Centroids near the tails stay small,
+    so extreme quantiles remain accurate.
+    """
+
+    def __init__(self, compression: float = 100.0):
+        self.compression = compression
+        self.means: List[float] = []
+        self.weights: List[float] = []
+        self._buffer: List[Tuple[float, float]] = []
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, weight: float = 1.0) -> None:
+        """Add one observation."""
+        self._buffer.append((value, weight))
+        self.count += weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) >= 5 * self.compression:
+            self._compress()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Add every centroid and buffered observation of another sketch."""
+        self._buffer.extend(zip(other.means, other.weights))
+        self._buffer.extend(other._buffer)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+
+    def _k(self, q: float) -> float:
+        """Scale function mapping a quantile to centroid index space."""
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _k_inverse(self, k: float) -> float:
+        """Inverse of the scale function."""
+        return (math.sin(2 * math.pi * k / self.compression) + 1) / 2
+
+    def _compress(self) -> None:
+        """Merge buffered observations into the centroids."""
+        if not self._buffer:
+            return
+        points = sorted(list(zip(self.means, self.weights)) + self._buffer)
+        self._buffer = []
+
+        means, weights = [], []
+        cumulative = 0.0
+        limit = self._k_inverse(self._k(0.0) + 1)
+        mean, weight = points[0]
+        for value, w in points[1:]:
+            if (cumulative + weight + w) / self.count <= limit:
+                # Running weighted mean of the centroid being built
+                weight += w
+                mean += (value - mean) * w / weight
+            else:
+                means.append(mean)
+                weights.append(weight)
+                cumulative += weight
+                limit = self._k_inverse(self._k(cumulative / self.count) + 1)
+                mean, weight = value, w
+        means.append(mean)
+        weights.append(weight)
+        self.means, self.weights = means, weights
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile.
+
+        Args:
+            q: Quantile in [0, 1]
+
+        Returns:
+            Estimated value, NaN when the sketch is empty
+        """
+        self._compress()
+        if not self.means:
+            return math.nan
+        if len(self.means) == 1:
+            return self.means[0]
+
+        # Interpolate between centroid centres, and towards min/max at the ends
+        target = q * self.count
+        centres = []
+        cumulative = 0.0
+        for weight in self.weights:
+            centres.append(cumulative + weight / 2)
+            cumulative += weight
+
+        if target <= centres[0]:
+            return self._interpolate(target, 0.0, self.min, centres[0], self.means[0])
+        if target >= centres[-1]:
+            return self._interpolate(
+                target, centres[-1], self.means[-1], self.count, self.max
+            )
+        i = bisect.bisect_right(centres, target)
+        return self._interpolate(
+            target, centres[i - 1], self.means[i - 1], centres[i], self.means[i]
+        )
+
+    @staticmethod
+    def _interpolate(x: float, x0: float, y0: float, x1: float, y1: float) -> float:
+        """Linearly interpolate between (x0, y0) and (x1, y1)."""
+        if x1 <= x0:
+            return y0
+        return y0 + (y1 - y0) * (x - x0) / (x1 - x0)
+
+
+def district_count(layout: Any) -> float:
+    """Number of districts."""
+    return len(layout.districts)
+
+
+def zone_count(layout: Any) -> float:
+    """Number of zones."""
+    return len(layout.zones)
+
+
+def total_population(layout: Any) -> float:
+    """Sum of district populations."""
+    return float(sum(d.population for d in layout.districts))
+
+
+def mean_zone_population(layout: Any) -> float:
+    """Mean population of a zone."""
+    return float(sum(z.population for z in layout.zones)) / max(len(layout.zones), 1)
+
+
+def road_count(layout: Any) -> float:
+    """Number of roads."""
+    return len(layout.infrastructure["roads"])
+
+
+def service_count(layout: Any) -> float:
+    """Number of public services of every kind."""
+    return sum(len(items) for items in layout.infrastructure["services"].values())
+
+
+def city_area(layout: Any) -> float:
+    """City area in km²."""
+    return float(layout.total_area)
+
+
+DEFAULT_METRICS: Dict[str, Metric] = {
+    "district_count": district_count,
+    "zone_count": zone_count,
+    "total_population": total_population,
+    "mean_zone_population": mean_zone_population,
+    "road_count": road_count,
+    "service_count": service_count,
+    "city_area": city_area,
+}
+
+
+@dataclass
+class MetricAggregate:
+    """Streaming statistics of one metric."""
+
+    stats: RunningStats = field(default_factory=RunningStats)
+    sketch: QuantileSketch = field(default_factory=QuantileSketch)
+
+    def add(self, value: float) -> None:
+        """Add one observation."""
+        self.stats.add(value)
+        self.sketch.add(value)
+
+
+@dataclass
+class EnsembleResult:
+    """Aggregated metrics of an ensemble run."""
+
+    runs: int
+    converged: bool
+    confidence: float
+    metrics: Dict[str, MetricAggregate]
+
+    def summary(self) -> Dict[str, Any]:
+        """Get the statistics of every metric as a JSON-serializable dict."""
+        metrics = {}
+        for name, aggregate in self.metrics.items():
+            stats = aggregate.stats
+            metrics[name] = {
+                "mean": stats.mean,
+                "std": stats.std,
+                "variance": stats.variance,
+                "min": stats.min,
+                "max": stats.max,
+                "ci_half_width": stats.confidence_half_width(self.confidence),
+                "quantiles": {
+                    f"p{round(q * 100)}": aggregate.sketch.quantile(q)
+                    for q in SUMMARY_QUANTILES
+                },
+            }
+        return {
+            "runs": self.runs,
+            "converged": self.converged,
+            "confidence": self.confidence,
+            "metrics": metrics,
+        }
+
+
+class EnsembleRunner:
+    """
+    Simulates a city configuration under consecutive master seeds.
+
+    Args:
+        population: Target population of every city
+        city_size: City size in km; None derives it from each seed
+        config: Base city configuration (e.g. rng_mode)
+        metrics: Metric name to a function of the CityLayout; must be module
+            level functions when workers are used
+        workers: Worker processes to use; None or 1 simulates in-process
+        confidence: Confidence level of the convergence test
+        tolerance: Stop once every metric's confidence half-width is at most
+            this fraction of its absolute mean
+        min_runs: Seeds to simulate before testing convergence
+        max_runs: Seeds to simulate at most
+        round_size: Seeds simulated between convergence tests
+        seed_start: First master seed
+    """
+
+    def __init__(
+        self,
+        population: int,
+        city_size: Optional[float] = None,
+        config: Optional[Dict[str, Any]] = None,
+        metrics: Optional[Dict[str, Metric]] = None,
+        workers: Optional[int] = None,
+        confidence: float = 0.95,
+        tolerance: float = 0.01,
+        min_runs: int = 30,
+        max_runs: int = 1000,
+        round_size: int = 16,
+        seed_start: int = 0,
+    ):
+        self.population = population
+        self.city_size = city_size
+        self.config = dict(config or {})
+        self.metrics = dict(metrics or DEFAULT_METRICS)
+        self.workers = workers
+        self.confidence = confidence
+        self.tolerance = tolerance
+        self.min_runs = min_runs
+        self.max_runs = max_runs
+        self.round_size = round_size
+        self.seed_start = seed_start
+
+    def converged(self, aggregates: Dict[str, MetricAggregate]) -> bool:
+        """Whether every metric's mean is known to within the tolerance."""
+        return all(
+            a.stats.count >= self.min_runs
+            and a.stats.confidence_half_width(self.confidence)
+            <= self.tolerance * abs(a.stats.mean)
+            for a in aggregates.values()
+        )
+
+    def run(self) -> EnsembleResult:
+        """
+        Simulate seeds round by round until convergence or max_runs.
+
+        Returns:
+            Aggregated metrics
+        """
+        aggregates = {name: MetricAggregate() for name in self.metrics}
+        runs = 0
+        converged = False
+
+        executor = None
+        if self.workers is not None and self.workers > 1:
+            executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=load_occupation_table
+            )
+        try:
+            while runs < self.max_runs and not converged:
+                count = min(self.round_size, self.max_runs - runs)
+                tasks = [self._task(self.seed_start + runs + i) for i in range(count)]
+                if executor is None:
+                    results = [_measure_city(task) for task in tasks]
+                else:
+                    results = list(executor.map(_measure_city, tasks))
+
+                # Aggregated in seed order, so results never depend on workers
+                for values in results:
+                    for name, value in values.items():
+                        aggregates[name].add(value)
+                runs += count
+                converged = self.converged(aggregates)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        return EnsembleResult(runs, converged, self.confidence, aggregates)
+
+    def _task(self, seed: int) -> Tuple[Any, ...]:
+        """Build the arguments of _measure_city for one seed."""
+        return (
+            dict(self.config, seed=seed, population=self.population),
+            self.population,
+            self.city_size,
+            self.metrics,
+        )
+
+
+def _measure_city(task: Sequence[Any]) -> Dict[str, float]:
+    """Simulate one city and measure it; module level for worker processes."""
+    config, population, city_size, metrics = task
+    layout = CitySimulator(config).simulate_city(population, city_size)
+    return {name: float(metric(layout)) for name, metric in metrics.items()}
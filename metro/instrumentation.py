@@ -0,0 +1,107 @@
+"""
+Stage Instrumentation for City Simulation
+
+This module times the stages of a simulation. Each stage records wall time,
+CPU time and, optionally, the peak memory allocated while it ran as measured by
+``tracemalloc``. Recorded timings are passed to any registered hooks as soon as
+a stage finishes, e.g. to log them or forward them to a metrics system.
+"""
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+@dataclass
+class StageTiming:
+    """Resources used by one run of a simulation stage."""
+
+    stage: str
+    wall_time: float
+    cpu_time: float
+    # Peak traced memory above the stage's starting point, in bytes, when
+    # memory tracing is enabled
+    peak_memory: Optional[int] = None
+    # Enclosing stage, for stages that run inside another one
+    parent: Optional[str] = None
+
+
+StageHook = Callable[[StageTiming], None]
+
+
+class StageProfiler:
+    """
+    Records a StageTiming for every stage run through ``stage``.
+
+    Stages may be nested; an enclosing stage's times include its children.
+    """
+
+    def __init__(
+        self, trace_memory: bool = False, hooks: Optional[List[StageHook]] = None
+    ):
+        self.trace_memory = trace_memory
+        self.hooks: List[StageHook] = list(hooks or [])
+        self.timings: List[StageTiming] = []
+        # Open stages: [name, running absolute memory peak]
+        self._stack: List[List[Any]] = []
+        self._started_tracing = False
+
+    def add_hook(self, hook: StageHook) -> None:
+        """Register a function called with every recorded StageTiming."""
+        self.hooks.append(hook)
+
+    def reset(self) -> None:
+        """Forget recorded timings."""
+        self.timings = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Time the code run inside the context as stage ``name``.
+
+        Args:
+            name: Stage name
+        """
+        start_memory = None
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                # The parent's peak so far is lost by the reset below
+                self._stack[-1][1] = max(self._stack[-1][1], peak)
+            tracemalloc.reset_peak()
+            start_memory = current
+
+        parent = self._stack[-1][0] if self._stack else None
+        self._stack.append([name, 0])
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - wall_start
+            cpu_time = time.process_time() - cpu_start
+            _, peak = self._stack.pop()
+
+            peak_memory = None
+            if start_memory is not None:
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                peak_memory = max(0, peak - start_memory)
+                if self._stack:
+                    self._stack[-1][1] = max(self._stack[-1][1], peak)
+                elif self._started_tracing:
+                    tracemalloc.stop()
+                    self._started_tracing = False
+
+            timing = StageTiming(name, wall_time, cpu_time, peak_memory, parent)
+            self.timings.append(timing)
+            for hook in self.hooks:
+                hook(timing)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Get the recorded timings as dictionaries, in completion order."""
+        return [asdict(timing) for timing in self.timings]
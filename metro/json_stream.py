@@ -0,0 +1,203 @@
+"""
+Streaming JSON Encoder for City Data
+
+This module serializes city exports to JSON chunk by chunk. It walks
+dataclasses, columnar layout tables and NumPy values directly, so a layout is
+never copied into nested dictionaries first, and output can be written to a
+file object or returned as a WSGI response iterator as it is produced.
+"""
+
+import json
+import math
+from dataclasses import fields, is_dataclass
+from json.encoder import encode_basestring_ascii
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+import numpy as np
+
+from .columnar_layout import ColumnarTable
+
+# Coordinate and size fields of districts, zones, roads and services, for use
+# as JSONStreamEncoder field_decimals.
+COORDINATE_FIELDS = ("x", "y", "width", "height", "x1", "y1", "x2", "y2")
+
+
+class JSONStreamEncoder:
+    """
+    Encode Python objects as compact JSON, yielding it in chunks.
+
+    Without decimals the output equals ``json.dumps(obj, separators=(",",
+    ":"))`` on the ``asdict`` form of the object.
+
+    Args:
+        decimals: Fixed number of decimal places for every float
+        field_decimals: Decimal places for floats under specific keys or
+            dataclass fields (e.g., {"x": 3}), overriding decimals. Applies
+            to list items under the key too.
+        chunk_size: Approximate number of characters per yielded chunk
+    """
+
+    def __init__(
+        self,
+        decimals: Optional[int] = None,
+        field_decimals: Optional[Dict[str, int]] = None,
+        chunk_size: int = 1 << 16,
+    ):
+        self.decimals = decimals
+        self.field_decimals = dict(field_decimals or {})
+        self.chunk_size = chunk_size
+
+    def iterencode(self, obj: Any) -> Iterator[str]:
+        """
+        Encode an object, yielding JSON text in chunks.
+
+        Args:
+            obj: Object to encode
+
+        Yields:
+            Consecutive pieces of the JSON document
+        """
+        buffer: List[str] = []
+        size = 0
+        for piece in self._encode(obj, self.decimals):
+            buffer.append(piece)
+            size += len(piece)
+            if size >= self.chunk_size:
+                yield "".join(buffer)
+                buffer = []
+                size = 0
+        if buffer:
+            yield "".join(buffer)
+
+    def encode(self, obj: Any) -> str:
+        """Encode an object to a JSON string."""
+        return "".join(self.iterencode(obj))
+
+    def dump(self, obj: Any, fp: TextIO) -> None:
+        """
+        Encode an object, writing each chunk to a file object.
+
+        Args:
+            obj: Object to encode
+            fp: Text file object to write to
+        """
+        for chunk in self.iterencode(obj):
+            fp.write(chunk)
+
+    def _decimals_for(self, key: str, default: Optional[int]) -> Optional[int]:
+        """Get the decimal places for values under a key."""
+        return self.field_decimals.get(key, default)
+
+    def _float(self, value: float, decimals: Optional[int]) -> str:
+        """Format a float like json.dumps, or with fixed decimals."""
+        if not math.isfinite(value):
+            return json.dumps(value)
+        if decimals is None:
+            return float.__repr__(value)
+        return f"{value:.{decimals}f}"
+
+    def _encode(self, obj: Any, decimals: Optional[int]) -> Iterator[str]:
+        """Yield the JSON pieces of an object."""
+        if isinstance(obj, str):
+            yield encode_basestring_ascii(obj)
+        elif obj is None:
+            yield "null"
+        elif obj is True or obj is False:
+            yield "true" if obj else "false"
+        elif isinstance(obj, (int, np.integer)):
+            yield int.__repr__(int(obj))
+        elif isinstance(obj, (float, np.floating)):
+            yield self._float(float(obj), decimals)
+        elif isinstance(obj, dict):
+            yield from self._encode_items(obj.items())
+        elif isinstance(obj, ColumnarTable):
+            yield from self._encode_table(obj, decimals)
+        elif is_dataclass(obj) and not isinstance(obj, type):
+            yield from self._encode_items(
+                (f.name, getattr(obj, f.name)) for f in fields(obj)
+            )
+        elif isinstance(obj, (list, tuple, np.ndarray)):
+            yield "["
+            for i, item in enumerate(obj):
+                if i:
+                    yield ","
+                yield from self._encode(item, decimals)
+            yield "]"
+        else:
+            raise TypeError(
+                f"Object of type {type(obj).__name__} is not JSON serializable"
+            )
+
+    def _encode_items(self, items: Any) -> Iterator[str]:
+        """Yield the JSON pieces of an object given its (key, value) pairs."""
+        yield "{"
+        for i, (key, value) in enumerate(items):
+            yield f"{',' if i else ''}{encode_basestring_ascii(_key(key))}:"
+            yield from self._encode(value, self._decimals_for(key, self.decimals))
+        yield "}"
+
+    def _encode_table(
+        self, table: ColumnarTable, decimals: Optional[int]
+    ) -> Iterator[str]:
+        """Yield a columnar table as a list of objects, one row at a time."""
+        names = [f.name for f in fields(table.record_type)]
+        columns = [table.values(name) for name in names]
+        keys = [f"{encode_basestring_ascii(name)}:" for name in names]
+        field_decimals = [self._decimals_for(name, self.decimals) for name in names]
+
+        yield "["
+        for i, row in enumerate(zip(*columns)):
+            yield ",{" if i else "{"
+            for j, value in enumerate(row):
+                yield keys[j] if j == 0 else "," + keys[j]
+                yield from self._encode(value, field_decimals[j])
+            yield "}"
+        yield "]"
+
+
+def _key(key: Any) -> str:
+    """Convert a dictionary key to a string the way json.dumps does."""
+    if isinstance(key, str):
+        return key
+    if key is True or key is False or key is None:
+        return json.dumps(key)
+    if isinstance(key, float):
+        return float.__repr__(key)
+    return str(key)
+
+
+def iter_city_json(
+    simulator: Any, include_timings: bool = False, **options: Any
+) -> Iterator[str]:
+    """
+    Stream a simulated city's export as JSON.
+
+    Args:
+        simulator: CitySimulator that has simulated a city
+        include_timings: Whether to add the stage timings to the metadata,
+            as CitySimulator.export_city_data does
+        **options: JSONStreamEncoder arguments
+
+    Returns:
+        Iterator over chunks of JSON text
+    """
+    data = simulator.export_city_data(
+        copy_layout=False, include_timings=include_timings
+    )
+    return JSONStreamEncoder(**options).iterencode(data)
+
+
+def write_city_json(
+    simulator: Any, fp: TextIO, include_timings: bool = False, **options: Any
+) -> None:
+    """
+    Write a simulated city's export as JSON to a file object.
+
+    Args:
+        simulator: CitySimulator that has simulated a city
+        fp: Text file object to write to
+        include_timings: Whether to add the stage timings to the metadata
+        **options: JSONStreamEncoder arguments
+    """
+    for chunk in iter_city_json(simulator, include_timings, **options):
+        fp.write(chunk)
@@ -1,4 +1,5 @@
 import typer
+from metro.commands.batch import batch
 from metro.commands.generate import generate
 from metro.commands.render import render
 
@@ -6,6 +7,7 @@ app = typer.Typer()
 
 app.command()(generate)
 app.command()(render)
+app.command()(batch)
 
 if __name__ == "__main__":
     app()
@@ -0,0 +1,192 @@
+"""
+Occupation Table for Metro Population Modeling
+
+This module parses the occupation data file used by PopulationModel into a
+compact, array-backed table. Tables are cached once per process and are only
+re-read when the file's modification time changes.
+
+The cached arrays are marked read-only, so worker processes forked after the
+table has been loaded share its pages with the parent instead of re-parsing
+the file.
+"""
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+# Density levels tracked for every zone type, in output order.
+DENSITY_LEVELS = ("L", "M", "H")
+
+DEFAULT_OCCUPATIONS_FILE = Path(__file__).parent / "data" / "occupations.txt"
+
+
+@dataclass(frozen=True)
+class OccupationTable:
+    """
+    Parsed occupation data.
+
+    Row ``i`` of ``male``/``female`` holds the fraction of the male/female
+    workforce employed in occupation ``names[i]``. The ``tally_*`` arrays list
+    every (row, zone type, density) contribution in file order, including
+    repeated zone letters, so zone demand can be accumulated exactly as the
+    file describes it.
+    """
+
+    path: str
+    mtime_ns: int
+    names: Tuple[str, ...]
+    male: np.ndarray
+    female: np.ndarray
+    zone_letters: Tuple[str, ...]
+    density_letters: Tuple[str, ...]
+    zone_types: Tuple[str, ...]
+    occupation_rows: np.ndarray
+    tally_rows: np.ndarray
+    tally_zones: np.ndarray
+    tally_densities: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def scale(self, workforce: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Scale the table to a workforce.
+
+        Args:
+            workforce: Workforce totals as returned by PopulationModel.workforce
+
+        Returns:
+            Tuple of (males, females) arrays with one entry per row
+        """
+        return self.male * workforce["m"], self.female * workforce["f"]
+
+    def occupations(self, workforce: Dict[str, int]) -> Dict[str, Dict[str, float]]:
+        """Get the number of male and female workers in each occupation."""
+        males, females = self.scale(workforce)
+        return {
+            self.names[row]: {"m": float(males[row]), "f": float(females[row])}
+            for row in self.occupation_rows.tolist()
+        }
+
+    def zone_demand(self, workforce: Dict[str, int]) -> Dict[str, Dict[str, float]]:
+        """Get the number of workers demanded by each zone type and density."""
+        males, females = self.scale(workforce)
+        humans = males + females
+
+        # np.add.at applies contributions in order, matching a sequential sum.
+        tally = np.zeros((len(self.zone_types), len(DENSITY_LEVELS)))
+        np.add.at(
+            tally, (self.tally_zones, self.tally_densities), humans[self.tally_rows]
+        )
+
+        return {
+            zone_type: {
+                density: float(tally[z, d]) for d, density in enumerate(DENSITY_LEVELS)
+            }
+            for z, zone_type in enumerate(self.zone_types)
+        }
+
+
+_TABLE_CACHE: Dict[str, OccupationTable] = {}
+
+
+def load_occupation_table(
+    path: Union[str, Path] = DEFAULT_OCCUPATIONS_FILE,
+) -> OccupationTable:
+    """
+    Load an occupation table, reusing the process-wide cached copy.
+
+    Args:
+        path: Path to a tab-separated occupation data file
+
+    Returns:
+        Parsed occupation table
+    """
+    key = os.path.abspath(path)
+    mtime_ns = os.stat(key).st_mtime_ns
+
+    table = _TABLE_CACHE.get(key)
+    if table is None or table.mtime_ns != mtime_ns:
+        table = _parse_occupation_table(key, mtime_ns)
+        _TABLE_CACHE[key] = table
+
+    return table
+
+
+def clear_occupation_table_cache() -> None:
+    """Drop every cached occupation table."""
+    _TABLE_CACHE.clear()
+
+
+def _parse_occupation_table(path: str, mtime_ns: int) -> OccupationTable:
+    """Parse an occupation data file into an OccupationTable."""
+    names: List[str] = []
+    male: List[float] = []
+    female: List[float] = []
+    zone_letters: List[str] = []
+    density_letters: List[str] = []
+    zone_types: List[str] = []
+    occupation_rows: List[int] = []
+    tally: List[Tuple[int, int, int]] = []
+
+    seen = set()
+    with open(path) as fp:
+        for line in fp:
+            line = line.strip()
+            if not line:
+                continue
+
+            parts = line.split("\t")
+            if len(parts) < 5:
+                continue
+
+            name, m, f, zonelist, densitylist = parts
+            row = len(names)
+            names.append(name)
+            male.append(float(m[0:-1]) * 0.01)
+            female.append(float(f[0:-1]) * 0.01)
+            zone_letters.append(zonelist)
+            density_letters.append(densitylist)
+
+            # Only the first row for a name is reported as an occupation.
+            if name not in seen:
+                seen.add(name)
+                occupation_rows.append(row)
+
+            for zone_type in zonelist:
+                if zone_type not in zone_types:
+                    zone_types.append(zone_type)
+                for density in densitylist:
+                    if density in DENSITY_LEVELS:
+                        tally.append(
+                            (
+                                row,
+                                zone_types.index(zone_type),
+                                DENSITY_LEVELS.index(density),
+                            )
+                        )
+
+    tally_array = np.array(tally, dtype=np.intp).reshape(-1, 3)
+    return OccupationTable(
+        path=path,
+        mtime_ns=mtime_ns,
+        names=tuple(names),
+        male=_read_only(np.array(male, dtype=np.float64)),
+        female=_read_only(np.array(female, dtype=np.float64)),
+        zone_letters=tuple(zone_letters),
+        density_letters=tuple(density_letters),
+        zone_types=tuple(zone_types),
+        occupation_rows=_read_only(np.array(occupation_rows, dtype=np.intp)),
+        tally_rows=_read_only(tally_array[:, 0].copy()),
+        tally_zones=_read_only(tally_array[:, 1].copy()),
+        tally_densities=_read_only(tally_array[:, 2].copy()),
+    )
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    """Mark an array read-only so cached tables cannot be mutated."""
+    array.setflags(write=False)
+    return array
@@ -1,20 +1,183 @@
+import math
 import random
-
-# import math
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .occupations import load_occupation_table
+from .seed_system import HierarchicalSeedGenerator
+
+if TYPE_CHECKING:
+    from .population_store import PopulationStore
+
+# Number of five-year age bins in the histogram.
+AGE_BINS = 20
+
+# (mean, standard deviation) of the age bin distribution for each gender.
+MALE_AGE_DISTRIBUTION = (4, 7)
+FEMALE_AGE_DISTRIBUTION = (3.5, 8)
+
+# "legacy" draws one person at a time from the supplied random.Random and is
+# kept for backward-compatible output; "vectorized" draws people in NumPy
+# blocks from a generator seeded with ``seed``; "analytic" computes the exact
+# bin probabilities and makes one multinomial draw per gender, so its cost
+# does not depend on the population size.
+SAMPLING_MODES = ("legacy", "vectorized", "analytic")
+
+# Number of people drawn per NumPy block in vectorized mode.
+SAMPLE_BLOCK_SIZE = 1 << 20
+
+# Histogram bins counted as the workforce (ages 15-59), see workforce().
+WORKFORCE_BINS = range(3, 12)
+
+# Columns of the person chunks yielded by PopulationModel.iter_people. Codes
+# index into the histogram (age_bin), GENDERS (gender), the occupation table
+# rows (occupation), OccupationTable.zone_types (zone_type) and DENSITY_LEVELS
+# (density). People without an occupation have -1 in the last three columns.
+PERSON_COLUMNS = {
+    "age_bin": np.int8,
+    "gender": np.int8,
+    "occupation": np.int16,
+    "zone_type": np.int8,
+    "density": np.int8,
+}
+GENDERS = ("m", "f")
 
 
 class PopulationModel:
-    def __init__(self, r: random.Random, p=100000, occ_file="data/occupations.txt"):
+    def __init__(
+        self,
+        r: random.Random,
+        p=100000,
+        occ_file="data/occupations.txt",
+        mode: str = "legacy",
+        seed: Optional[int] = None,
+    ):
+        if mode not in SAMPLING_MODES:
+            raise ValueError(
+                f"Unknown sampling mode {mode!r}, expected one of {SAMPLING_MODES}"
+            )
+
         self.population = p
+        self.mode = mode
         self.occupations = {}
         self.zones = {}
-        self.histogram = [{"m": 0, "f": 0} for i in range(0, 20)]
+        self.histogram = [{"m": 0, "f": 0} for i in range(0, AGE_BINS)]
         self.random = r
 
+        if mode == "legacy":
+            self._sample_legacy()
+        else:
+            # Derive the NumPy seed from the supplied RNG when no explicit
+            # seed is given so the result is still deterministic.
+            if seed is None:
+                seed = r.getrandbits(64)
+            sampler = _HISTOGRAM_SAMPLERS[mode]
+            self._set_histogram(*sampler(np.random.default_rng(seed), p))
+
+        self._tally_occupations(occ_file)
+
+    @classmethod
+    def from_histogram(
+        cls,
+        histogram: List[Dict[str, int]],
+        r: Optional[random.Random] = None,
+        occ_file: str = "data/occupations.txt",
+        mode: str = "legacy",
+    ) -> "PopulationModel":
+        """
+        Build a model around an already sampled age/gender histogram.
+
+        Args:
+            histogram: AGE_BINS entries of ``{"m": count, "f": count}``
+            r: RNG used by distribution(), if the caller needs it
+            occ_file: Occupation data file, relative to this module
+            mode: Sampling mode recorded on the model
+
+        Returns:
+            PopulationModel with occupations and zones scaled to the histogram
+        """
+        model = cls.__new__(cls)
+        model.population = sum(entry["m"] + entry["f"] for entry in histogram)
+        model.mode = mode
+        model.histogram = [{"m": e["m"], "f": e["f"]} for e in histogram]
+        if r is not None:
+            model.random = r
+        model._tally_occupations(occ_file)
+        return model
+
+    @classmethod
+    def from_shards(
+        cls,
+        seed_generator: HierarchicalSeedGenerator,
+        p: int = 100000,
+        shards: int = 8,
+        workers: Optional[int] = None,
+        mode: str = "vectorized",
+        occ_file: str = "data/occupations.txt",
+    ) -> "PopulationModel":
+        """
+        Sample the histogram in independent shards, optionally in parallel.
+
+        Shard ``i`` holds ``p // shards`` people (plus one for the first
+        ``p % shards`` shards) and draws from the seed at
+        ``population.shard.<i>``. Shard histograms are summed before the
+        occupation and zone tallies are computed, so the result depends on
+        the seed and shard count but never on the number of workers.
+
+        Args:
+            seed_generator: Seed hierarchy the shard seeds are taken from
+            p: Total population
+            shards: Number of shards to split the population into
+            workers: Worker processes to use; None or 1 samples in-process
+            mode: "vectorized" or "analytic"
+            occ_file: Occupation data file, relative to this module
+
+        Returns:
+            PopulationModel for the merged histogram
+        """
+        if mode not in _HISTOGRAM_SAMPLERS:
+            raise ValueError(
+                f"Sharded sampling needs one of {tuple(_HISTOGRAM_SAMPLERS)}, "
+                f"got {mode!r}"
+            )
+
+        tasks = [
+            (
+                mode,
+                p // shards + (1 if i < p % shards else 0),
+                seed_generator.get_seed(f"population.shard.{i}"),
+            )
+            for i in range(shards)
+        ]
+
+        if workers is None or workers <= 1:
+            results = [_sample_shard(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_sample_shard, tasks))
+
+        males = np.stack([m for m, _ in results]).sum(axis=0, dtype=np.int64)
+        females = np.stack([f for _, f in results]).sum(axis=0, dtype=np.int64)
+        histogram = [
+            {"m": int(males[i]), "f": int(females[i])} for i in range(0, AGE_BINS)
+        ]
+        return cls.from_histogram(histogram, occ_file=occ_file, mode=mode)
+
+    def _tally_occupations(self, occ_file: str) -> None:
+        """Scale the process-wide occupation table to this workforce."""
+        wf = self.workforce()
+        self.occupation_table = load_occupation_table(Path(__file__).parent / occ_file)
+        self.occupations = self.occupation_table.occupations(wf)
+        self.zones = self.occupation_table.zone_demand(wf)
+
+    def _sample_legacy(self) -> None:
+        """Fill the histogram one person at a time from ``self.random``."""
         i = 0
         while i < self.population:
-            (gender, pos) = self.distribution()
+            gender, pos = self.distribution()
 
             scale = 1
             if self.population - i > 500000:
@@ -23,36 +186,11 @@ class PopulationModel:
             self.histogram[pos - 1][gender] += scale
             i += scale
 
-        wf = self.workforce()
-
-        # Load occupations file relative to this file.
-        data_path = Path(__file__).parent / occ_file
-        with open(data_path) as fp:
-            for line in fp:
-                line = line.strip()
-                if not line:
-                    continue
-
-                parts = line.split("\t")
-                if len(parts) < 5:
-                    continue
-
-                (name, male, female, zonelist, densitylist) = parts
-                males = float(male[0:-1]) * 0.01 * wf["m"]
-                females = float(female[0:-1]) * 0.01 * wf["f"]
-                humans = males + females
-                if name not in self.occupations:
-                    self.occupations[name] = {"m": males, "f": females}
-
-                densities = [d for d in densitylist]
-                types = [t for t in zonelist]
-                for type in types:
-                    if type not in self.zones:
-                        self.zones[type] = {"L": 0.0, "M": 0.0, "H": 0.0}
-
-                    for density in densities:
-                        if density in self.zones[type]:
-                            self.zones[type][density] += humans
+    def _set_histogram(self, males: np.ndarray, females: np.ndarray) -> None:
+        """Copy per-bin NumPy counts into the histogram as plain ints."""
+        for i in range(0, AGE_BINS):
+            self.histogram[i]["m"] = int(males[i])
+            self.histogram[i]["f"] = int(females[i])
 
     def male_distribution(self):
         return int(self.random.normalvariate(4, 7))
@@ -75,9 +213,124 @@ class PopulationModel:
 
         return (gender, pos)
 
+    def iter_people(
+        self,
+        seed_generator: HierarchicalSeedGenerator,
+        chunk_size: int = 65536,
+        path: str = "population.people",
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Stream individual synthetic residents in fixed-size columnar chunks.
+
+        People are drawn without replacement from the histogram, so the
+        stream contains exactly the histogram's age/gender counts. Workers
+        are drawn without replacement from per-gender occupation pools sized
+        ``floor(fraction * workforce)``; the rest of the workforce and every
+        non-working person has no occupation. Each worker's zone type and
+        density is drawn from the aggregate zone/density tally, so the stream's
+        zone proportions match ``self.zones``. ``self.zones`` counts a worker
+        once per entry of their occupation, which no draw restricted to the
+        worker's own entries can reproduce. People without an occupation, or
+        whose occupation has no entries, get -1 for both.
+
+        Chunk ``k`` draws from the seed at ``{path}.chunk_{k}``, so the stream
+        is reproducible and only one chunk is held in memory at a time.
+
+        Args:
+            seed_generator: Seed hierarchy the chunk seeds are taken from
+            chunk_size: Number of people per chunk (the last may be shorter)
+            path: Seed path prefix for the stream
+
+        Yields:
+            Dictionary mapping each PERSON_COLUMNS name to a NumPy array
+        """
+        table = self.occupation_table
+        remaining = np.array(
+            [self.histogram[i][g] for g in GENDERS for i in range(0, AGE_BINS)],
+            dtype=np.int64,
+        )
+
+        # Per-gender occupation pools, with the unemployed as a final row.
+        wf = self.workforce()
+        pools = []
+        for g, fractions in zip(GENDERS, (table.male, table.female)):
+            counts = np.floor(fractions * wf[g]).astype(np.int64)
+            pools.append(np.append(counts, max(0, wf[g] - int(counts.sum()))))
+
+        # Cumulative tally weights, matching OccupationTable.zone_demand.
+        males, females = table.scale(wf)
+        entry_weight = np.cumsum((males + females)[table.tally_rows])
+        total_weight = float(entry_weight[-1]) if entry_weight.size else 0.0
+        entry_count = np.bincount(table.tally_rows, minlength=len(table))
+
+        chunk = 0
+        while remaining.sum() > 0:
+            seed = seed_generator.get_seed(f"{path}.chunk_{chunk}")
+            rng = np.random.default_rng(seed)
+            size = int(min(chunk_size, remaining.sum()))
+
+            drawn = rng.multivariate_hypergeometric(remaining, size)
+            remaining -= drawn
+            categories = np.repeat(np.arange(remaining.size), drawn)
+            rng.shuffle(categories)
+
+            gender = categories // AGE_BINS
+            age_bin = categories % AGE_BINS
+            occupation = np.full(size, -1, dtype=np.int64)
+
+            working = np.isin(age_bin, WORKFORCE_BINS)
+            for code, pool in enumerate(pools):
+                workers = np.flatnonzero(working & (gender == code))
+                taken = rng.multivariate_hypergeometric(pool, workers.size)
+                pool -= taken
+                rows = np.repeat(np.arange(pool.size), taken)
+                rng.shuffle(rows)
+                rows[rows == len(table)] = -1
+                occupation[workers] = rows
+
+            zone_type = np.full(size, -1, dtype=np.int64)
+            density = np.full(size, -1, dtype=np.int64)
+            employed = np.flatnonzero(occupation >= 0)
+            rows = occupation[employed]
+            has_entries = entry_count[rows] > 0
+            employed, rows = employed[has_entries], rows[has_entries]
+            entries = np.searchsorted(
+                entry_weight, rng.random(rows.size) * total_weight, side="right"
+            )
+            zone_type[employed] = table.tally_zones[entries]
+            density[employed] = table.tally_densities[entries]
+
+            columns = {
+                "age_bin": age_bin,
+                "gender": gender,
+                "occupation": occupation,
+                "zone_type": zone_type,
+                "density": density,
+            }
+            yield {
+                name: columns[name].astype(dtype)
+                for name, dtype in PERSON_COLUMNS.items()
+            }
+            chunk += 1
+
+    @staticmethod
+    def open_people(directory: Union[str, Path]) -> "PopulationStore":
+        """
+        Reopen residents written by write_population_store without copying.
+
+        Args:
+            directory: Store directory
+
+        Returns:
+            PopulationStore backed by memory-mapped column files
+        """
+        from .population_store import PopulationStore
+
+        return PopulationStore(directory)
+
     def workforce(self):
         total = {"m": 0, "f": 0, "t": 0}
-        for i in range(3, 12):
+        for i in WORKFORCE_BINS:
             total["m"] += self.histogram[i]["m"]
             total["f"] += self.histogram[i]["f"]
             total["t"] += self.histogram[i]["f"] + self.histogram[i]["m"]
@@ -103,3 +356,121 @@ class PopulationModel:
         wf = self.workforce()
         workforce = "Male: %d\tFemale: %d\tTotal: %d" % (wf["m"], wf["f"], wf["t"])
         return "%s\n\n%s\n\n%s\n\n%s\n" % (histogram, workforce, zones, occupations)
+
+
+def sample_age_bins(
+    rng: np.random.Generator, mean: float, sd: float, count: int
+) -> np.ndarray:
+    """
+    Draw ``count`` age bins from a truncated normal distribution.
+
+    Mirrors ``PopulationModel.distribution``: each draw is truncated towards
+    zero and redrawn until it lands in ``[1, AGE_BINS]``.
+
+    Args:
+        rng: NumPy generator to draw from
+        mean: Mean of the underlying normal distribution
+        sd: Standard deviation of the underlying normal distribution
+        count: Number of people to draw
+
+    Returns:
+        Array of length AGE_BINS with the number of people in each bin
+    """
+    counts = np.zeros(AGE_BINS, dtype=np.int64)
+    while count > 0:
+        pos = np.trunc(rng.normal(mean, sd, size=count))
+        accepted = pos[(pos >= 1) & (pos <= AGE_BINS)].astype(np.int64)
+        counts += np.bincount(accepted - 1, minlength=AGE_BINS)
+        count -= accepted.size
+
+    return counts
+
+
+def sample_histogram_vectorized(
+    rng: np.random.Generator, population: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sample an age/gender histogram by drawing people in NumPy blocks.
+
+    Args:
+        rng: NumPy generator to draw from
+        population: Number of people to draw
+
+    Returns:
+        Tuple of (males, females) per-bin count arrays
+    """
+    males = np.zeros(AGE_BINS, dtype=np.int64)
+    females = np.zeros(AGE_BINS, dtype=np.int64)
+
+    remaining = population
+    while remaining > 0:
+        block = min(remaining, SAMPLE_BLOCK_SIZE)
+        # Same convention as distribution(): 0 is female, 1 is male.
+        genders = rng.integers(0, 2, size=block)
+        female_count = int(np.count_nonzero(genders == 0))
+        male_count = block - female_count
+
+        males += sample_age_bins(rng, *MALE_AGE_DISTRIBUTION, male_count)
+        females += sample_age_bins(rng, *FEMALE_AGE_DISTRIBUTION, female_count)
+        remaining -= block
+
+    return males, females
+
+
+def sample_histogram_analytic(
+    rng: np.random.Generator, population: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sample an age/gender histogram with one multinomial draw per gender.
+
+    Args:
+        rng: NumPy generator to draw from
+        population: Number of people to draw
+
+    Returns:
+        Tuple of (males, females) per-bin count arrays
+    """
+    male_count = int(rng.binomial(population, 0.5))
+    female_count = population - male_count
+
+    males = rng.multinomial(male_count, age_bin_probabilities(*MALE_AGE_DISTRIBUTION))
+    females = rng.multinomial(
+        female_count, age_bin_probabilities(*FEMALE_AGE_DISTRIBUTION)
+    )
+    return males, females
+
+
+_HISTOGRAM_SAMPLERS = {
+    "vectorized": sample_histogram_vectorized,
+    "analytic": sample_histogram_analytic,
+}
+
+
+def _sample_shard(task: Tuple[str, int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Sample one shard's histogram; module level so worker processes can run it."""
+    mode, population, seed = task
+    return _HISTOGRAM_SAMPLERS[mode](np.random.default_rng(seed), population)
+
+
+def age_bin_probabilities(mean: float, sd: float) -> np.ndarray:
+    """
+    Compute the exact probability of each age bin for a truncated normal.
+
+    ``int()`` truncates towards zero, so bin ``k`` (for ``k >= 1``) receives
+    every draw in ``[k, k + 1)``. Draws outside ``[1, AGE_BINS + 1)`` are
+    redrawn, which amounts to renormalising over the accepted range.
+
+    Args:
+        mean: Mean of the underlying normal distribution
+        sd: Standard deviation of the underlying normal distribution
+
+    Returns:
+        Array of length AGE_BINS with probabilities summing to one
+    """
+
+    def cdf(x: float) -> float:
+        return 0.5 * (1.0 + math.erf((x - mean) / (sd * math.sqrt(2.0))))
+
+    edges = [cdf(k) for k in range(1, AGE_BINS + 2)]
+    probabilities = np.diff(np.array(edges))
+    return np.asarray(probabilities / probabilities.sum())
@@ -0,0 +1,152 @@
+"""
+Columnar On-Disk Store for Synthetic Populations
+
+This module writes the residents streamed by PopulationModel.iter_people to a
+directory holding one ``.npy`` file per column plus a small JSON header, and
+reopens it through ``numpy.memmap``. Filtering a store only touches the pages
+of the columns being filtered, so large populations never have to be loaded
+into memory.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Union
+
+import numpy as np
+
+from .occupations import DENSITY_LEVELS
+from .population import GENDERS, PERSON_COLUMNS, PopulationModel
+from .seed_system import HierarchicalSeedGenerator
+
+HEADER_FILE = "header.json"
+FORMAT_VERSION = 1
+
+
+def write_population_store(
+    directory: Union[str, Path],
+    model: PopulationModel,
+    seed_generator: HierarchicalSeedGenerator,
+    city_id: str,
+    chunk_size: int = 1 << 20,
+) -> Path:
+    """
+    Stream a population model's residents into a columnar store.
+
+    Args:
+        directory: Directory to write the store to (created if missing)
+        model: Population model to draw residents from
+        seed_generator: Seed hierarchy passed to PopulationModel.iter_people
+        city_id: City identifier, e.g. from generate_reproducible_city_id
+        chunk_size: Number of residents generated per chunk
+
+    Returns:
+        Path of the store directory
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    rows = sum(entry["m"] + entry["f"] for entry in model.histogram)
+    columns = {
+        name: np.lib.format.open_memmap(
+            directory / f"{name}.npy", mode="w+", dtype=dtype, shape=(rows,)
+        )
+        for name, dtype in PERSON_COLUMNS.items()
+    }
+
+    offset = 0
+    for chunk in model.iter_people(seed_generator, chunk_size):
+        size = len(chunk["age_bin"])
+        for name, column in columns.items():
+            column[offset : offset + size] = chunk[name]
+        offset += size
+
+    for column in columns.values():
+        column.flush()
+    del columns
+
+    table = model.occupation_table
+    header = {
+        "format_version": FORMAT_VERSION,
+        "city_id": city_id,
+        "master_seed": seed_generator.master_seed,
+        "population": model.population,
+        "rows": rows,
+        "columns": {
+            name: np.dtype(dtype).str for name, dtype in PERSON_COLUMNS.items()
+        },
+        "genders": list(GENDERS),
+        "occupations": list(table.names),
+        "zone_types": list(table.zone_types),
+        "density_levels": list(DENSITY_LEVELS),
+    }
+    with open(directory / HEADER_FILE, "w") as f:
+        json.dump(header, f, indent=2)
+
+    return directory
+
+
+class PopulationStore:
+    """
+    Read-only view of a columnar population store.
+
+    Columns are opened lazily with ``numpy.load(mmap_mode="r")``; nothing is
+    copied into memory until a caller indexes into them.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        with open(self.directory / HEADER_FILE, "r") as f:
+            self.header: Dict[str, Any] = json.load(f)
+
+        if self.header.get("format_version") != FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported population store version "
+                f"{self.header.get('format_version')!r} in {self.directory}"
+            )
+
+        self._columns: Dict[str, np.memmap] = {}
+
+    @property
+    def city_id(self) -> str:
+        """City identifier the store was written for."""
+        return str(self.header["city_id"])
+
+    def __len__(self) -> int:
+        return int(self.header["rows"])
+
+    def column(self, name: str) -> np.memmap:
+        """
+        Get a memory-mapped column.
+
+        Args:
+            name: Column name, one of PERSON_COLUMNS
+
+        Returns:
+            Read-only memory-mapped array
+        """
+        if name not in self.header["columns"]:
+            raise KeyError(f"Unknown population column {name!r}")
+
+        if name not in self._columns:
+            self._columns[name] = np.load(self.directory / f"{name}.npy", mmap_mode="r")
+        return self._columns[name]
+
+    def select(self, **filters: Any) -> np.ndarray:
+        """
+        Find the residents matching every filter.
+
+        Each keyword names a column and gives either a single code or a
+        sequence of accepted codes, e.g. ``select(age_bin=[3, 4], gender=1)``.
+        Only the filtered columns are read.
+
+        Returns:
+            Sorted array of matching row indices
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for name, value in filters.items():
+            mask &= np.isin(self.column(name), value)
+        return np.flatnonzero(mask)
+
+    def take(self, indices: np.ndarray) -> Dict[str, np.ndarray]:
+        """Read the given rows of every column into memory."""
+        return {name: self.column(name)[indices] for name in self.header["columns"]}
@@ -0,0 +1,555 @@
+"""
+Road Network Graph for City Layouts
+
+This module connects the loose road segments of a layout's infrastructure
+into a graph. Intersections between segments are found by bucketing their
+bounding boxes in a SpatialIndex grid: each segment is tested only against
+the segments sharing a grid cell with it whose boxes overlap its own, so
+long parallel avenues that never meet are not paired. Every segment is then
+split at its intersections, giving graph nodes at road ends and crossings and
+one edge per piece.
+
+The graph is undirected. Its adjacency is stored in compressed sparse row
+form: ``offsets[n]:offsets[n + 1]`` slices ``neighbors`` and ``edges`` to the
+nodes adjacent to node ``n`` and the edges leading there. Lengths are in km,
+like layout coordinates, and travel times in minutes.
+"""
+
+import heapq
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .spatial_index import SpatialIndex
+
+# Travel speed of each road type, in km/h
+ROAD_SPEEDS = {"arterial": 50.0, "local": 30.0}
+DEFAULT_SPEED = 30.0
+
+WEIGHTS = ("time", "length")
+
+# Relative tolerance of intersection tests and decimals of node coordinates
+EPSILON = 1e-9
+NODE_DECIMALS = 9
+
+# Candidate segment pairs tested per block of grid cells
+PAIR_BLOCK_SIZE = 1 << 20
+
+
+@dataclass
+class Route:
+    """A shortest path through the road network."""
+
+    nodes: List[int]
+    edges: List[int]
+    length: float
+    travel_time: float
+
+
+def find_intersections(
+    x1: Any, y1: Any, x2: Any, y2: Any
+) -> List[Tuple[int, float, float, float]]:
+    """
+    Find the points where line segments meet.
+
+    Crossings, T-junctions and the ends of collinear overlaps are reported.
+    Segments sharing an endpoint are connected through that endpoint anyway
+    and are not reported.
+
+    Args:
+        x1: Segment start x coordinates
+        y1: Segment start y coordinates
+        x2: Segment end x coordinates
+        y2: Segment end y coordinates
+
+    Returns:
+        List of (segment, position along it from 0 to 1, x, y), one entry per
+        segment for each point where it meets another segment
+    """
+    x1, y1, x2, y2 = (np.asarray(c, dtype=np.float64) for c in (x1, y1, x2, y2))
+    points: List[Tuple[int, float, float, float]] = []
+    for a, b in _candidate_pairs(x1, y1, x2, y2):
+        points.extend(_intersect_pairs(x1, y1, x2, y2, a, b))
+    return points
+
+
+def _candidate_pairs(
+    x1: np.ndarray, y1: np.ndarray, x2: np.ndarray, y2: np.ndarray
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Yield blocks of segment pairs with overlapping boxes."""
+    if len(x1) < 2:
+        return
+
+    # Pad the boxes so rounding never separates touching boxes; candidates
+    # are only a superset, _intersect_pairs tests them exactly
+    x_min, x_max = np.minimum(x1, x2), np.maximum(x1, x2)
+    y_min, y_max = np.minimum(y1, y2), np.maximum(y1, y2)
+    extent = max(float(x_max.max() - x_min.min()), float(y_max.max() - y_min.min()))
+    pad = EPSILON * max(extent, 1.0)
+    x_min, x_max = x_min - pad, x_max + pad
+    y_min, y_max = y_min - pad, y_max + pad
+
+    # Each plan lists segments so that every overlapping pair (a, b) appears
+    # with b among the entries first[p]:last[p] after a = order[p]. Sweeps
+    # degenerate when many long roads run across the swept axis and the grid
+    # when many long roads run side by side, so enumerate the plan with the
+    # fewest raw pairs.
+    plans = [_sweep_plan(x_min, x_max), _sweep_plan(y_min, y_max)]
+    plans.append(_grid_plan(x_min, y_min, x_max, y_max))
+    order, first, last, cells = min(
+        plans, key=lambda plan: int(np.maximum(plan[2] - plan[1], 0).sum())
+    )
+    counts = np.maximum(last - first, 0)
+    total = np.cumsum(counts)
+
+    block_start = 0
+    while block_start < len(order):
+        done = total[block_start - 1] if block_start else 0
+        block_end = max(
+            int(np.searchsorted(total, done + PAIR_BLOCK_SIZE, side="right")),
+            block_start + 1,
+        )
+        block = np.arange(block_start, block_end)
+        block_counts = counts[block]
+        sweep = np.repeat(block, block_counts)
+        local = np.arange(len(sweep)) - np.repeat(
+            np.cumsum(block_counts) - block_counts, block_counts
+        )
+        a = order[sweep]
+        b = order[first[sweep] + local]
+        keep = (
+            (x_min[a] <= x_max[b])
+            & (x_min[b] <= x_max[a])
+            & (y_min[a] <= y_max[b])
+            & (y_min[b] <= y_max[a])
+        )
+        if cells is not None:
+            # Boxes sharing several cells are paired once, in the cell holding
+            # the lower corner of their overlap
+            i0, j0, columns, cell = cells
+            keep &= (np.maximum(i0[a], i0[b]) * columns) + np.maximum(
+                j0[a], j0[b]
+            ) == cell[sweep]
+        yield a[keep], b[keep]
+        block_start = block_end
+
+
+def _sweep_plan(lo: np.ndarray, hi: np.ndarray) -> Tuple[Any, ...]:
+    """Pair segments sorted by lo with those starting before they end."""
+    order = np.argsort(lo, kind="stable")
+    first = np.arange(1, len(order) + 1)
+    last = np.searchsorted(lo[order], hi[order], side="right")
+    return order, first, last, None
+
+
+def _grid_plan(
+    x_min: np.ndarray, y_min: np.ndarray, x_max: np.ndarray, y_max: np.ndarray
+) -> Tuple[Any, ...]:
+    """Pair segments sharing a cell of a SpatialIndex grid over their boxes."""
+    index = SpatialIndex(x_min, y_min, x_max - x_min, y_max - y_min)
+    i0, j0 = index._cell_coords(x_min, y_min)
+
+    cell_sizes = np.diff(index.cell_offsets)
+    entry_cell = np.repeat(np.arange(len(cell_sizes)), cell_sizes)
+    first = np.arange(1, len(index.cell_items) + 1)
+    last = index.cell_offsets[entry_cell + 1]
+    return index.cell_items, first, last, (i0, j0, index.shape[1], entry_cell)
+
+
+def _intersect_pairs(
+    x1: np.ndarray,
+    y1: np.ndarray,
+    x2: np.ndarray,
+    y2: np.ndarray,
+    a: np.ndarray,
+    b: np.ndarray,
+) -> List[Tuple[int, float, float, float]]:
+    """Exactly test candidate pairs (a[i], b[i]) for intersection."""
+    rx, ry = x2[a] - x1[a], y2[a] - y1[a]
+    sx, sy = x2[b] - x1[b], y2[b] - y1[b]
+    qx, qy = x1[b] - x1[a], y1[b] - y1[a]
+    denom = rx * sy - ry * sx
+    scale = np.hypot(rx, ry) * np.hypot(sx, sy)
+    parallel = np.abs(denom) <= EPSILON * scale
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (qx * sy - qy * sx) / denom
+        u = (qx * ry - qy * rx) / denom
+    inside = (
+        ~parallel
+        & (t >= -EPSILON)
+        & (t <= 1 + EPSILON)
+        & (u >= -EPSILON)
+        & (u <= 1 + EPSILON)
+    )
+    t, u = _snap(t), _snap(u)
+
+    # Points at a segment's end are that end exactly, so nodes are shared
+    ends = [u == 0, u == 1, t == 0, t == 1]
+    px = np.select(ends, [x1[b], x2[b], x1[a], x2[a]], x1[a] + t * rx)
+    py = np.select(ends, [y1[b], y2[b], y1[a], y2[a]], y1[a] + t * ry)
+
+    points = []
+    for i in np.flatnonzero(inside):
+        # Segments meeting end to end are already joined by their shared node
+        if t[i] in (0.0, 1.0) and u[i] in (0.0, 1.0):
+            continue
+        x, y = float(px[i]), float(py[i])
+        points.append((int(a[i]), float(t[i]), x, y))
+        points.append((int(b[i]), float(u[i]), x, y))
+
+    # Collinear overlaps split each segment at the other's endpoints
+    collinear = parallel & (np.abs(qx * ry - qy * rx) <= EPSILON * scale)
+    for i in np.flatnonzero(collinear):
+        for seg, other in ((int(a[i]), int(b[i])), (int(b[i]), int(a[i]))):
+            dx, dy = x2[seg] - x1[seg], y2[seg] - y1[seg]
+            squared = dx * dx + dy * dy
+            if squared == 0:
+                continue
+            for x, y in ((x1[other], y1[other]), (x2[other], y2[other])):
+                position = ((x - x1[seg]) * dx + (y - y1[seg]) * dy) / squared
+                if EPSILON < position < 1 - EPSILON:
+                    points.append((seg, float(position), float(x), float(y)))
+    return points
+
+
+def _snap(position: np.ndarray) -> np.ndarray:
+    """Clip positions along segments to [0, 1], snapping near ends to them."""
+    position = np.where(position < EPSILON, 0.0, position)
+    return np.where(position > 1 - EPSILON, 1.0, position)
+
+
+class RoadNetwork:
+    """
+    An undirected graph of road pieces between road ends and crossings.
+
+    Args:
+        node_x: Node x coordinates in km
+        node_y: Node y coordinates in km
+        edge_source: First node of every edge
+        edge_target: Second node of every edge
+        edge_length: Edge lengths in km
+        edge_time: Edge travel times in minutes
+        edge_road: Index of the road each edge is a piece of
+    """
+
+    def __init__(
+        self,
+        node_x: Any,
+        node_y: Any,
+        edge_source: Any,
+        edge_target: Any,
+        edge_length: Any,
+        edge_time: Any,
+        edge_road: Any,
+    ):
+        self.node_x = np.asarray(node_x, dtype=np.float64)
+        self.node_y = np.asarray(node_y, dtype=np.float64)
+        self.edge_source = np.asarray(edge_source, dtype=np.int64)
+        self.edge_target = np.asarray(edge_target, dtype=np.int64)
+        self.edge_length = np.asarray(edge_length, dtype=np.float64)
+        self.edge_time = np.asarray(edge_time, dtype=np.float64)
+        self.edge_road = np.asarray(edge_road, dtype=np.int64)
+
+        # Fastest speed in km/min, bounding the A* travel time heuristic
+        with np.errstate(divide="ignore", invalid="ignore"):
+            speeds = self.edge_length / self.edge_time
+        speeds = speeds[np.isfinite(speeds)]
+        self.max_speed = float(speeds.max()) if len(speeds) else 0.0
+
+        self._build_adjacency()
+        # Python lists of the adjacency and weights, built on first search
+        self._search_lists: Dict[str, Tuple[List[Any], ...]] = {}
+        self._node_index: Optional[SpatialIndex] = None
+
+    @classmethod
+    def from_roads(
+        cls, roads: Sequence[Dict[str, Any]], speeds: Optional[Dict[str, float]] = None
+    ) -> "RoadNetwork":
+        """
+        Build the network of road segments.
+
+        Args:
+            roads: Road dictionaries with "type", "x1", "y1", "x2" and "y2"
+            speeds: Road type to speed in km/h (defaults to ROAD_SPEEDS)
+
+        Returns:
+            Network whose edge_road indexes ``roads``
+        """
+        speeds = dict(ROAD_SPEEDS, **(speeds or {}))
+        x1 = np.array([r["x1"] for r in roads], dtype=np.float64)
+        y1 = np.array([r["y1"] for r in roads], dtype=np.float64)
+        x2 = np.array([r["x2"] for r in roads], dtype=np.float64)
+        y2 = np.array([r["y2"] for r in roads], dtype=np.float64)
+
+        # Every segment is split at its ends and the points it meets others
+        splits: List[List[Tuple[float, float, float]]] = [
+            [(0.0, x1[i], y1[i]), (1.0, x2[i], y2[i])] for i in range(len(roads))
+        ]
+        for segment, position, x, y in find_intersections(x1, y1, x2, y2):
+            splits[segment].append((position, x, y))
+
+        nodes: Dict[Tuple[float, float], int] = {}
+
+        def node(x: float, y: float) -> int:
+            key = (round(x, NODE_DECIMALS), round(y, NODE_DECIMALS))
+            return nodes.setdefault(key, len(nodes))
+
+        sources, targets, lengths, times, edge_roads = [], [], [], [], []
+        for road, points in enumerate(splits):
+            speed = speeds.get(roads[road].get("type", ""), DEFAULT_SPEED)
+            points.sort()
+            previous = node(points[0][1], points[0][2])
+            previous_xy = points[0][1:]
+            for _, x, y in points[1:]:
+                current = node(x, y)
+                if current == previous:
+                    continue
+                length = math.hypot(x - previous_xy[0], y - previous_xy[1])
+                sources.append(previous)
+                targets.append(current)
+                lengths.append(length)
+                times.append(length / speed * 60)
+                edge_roads.append(road)
+                previous, previous_xy = current, (x, y)
+
+        coordinates = np.array(list(nodes), dtype=np.float64).reshape(-1, 2)
+        return cls(
+            coordinates[:, 0],
+            coordinates[:, 1],
+            sources,
+            targets,
+            lengths,
+            times,
+            edge_roads,
+        )
+
+    @classmethod
+    def from_layout(
+        cls, layout: Any, speeds: Optional[Dict[str, float]] = None
+    ) -> "RoadNetwork":
+        """
+        Build the network of a layout's roads.
+
+        Args:
+            layout: CityLayout or ColumnarLayout
+            speeds: Road type to speed in km/h (defaults to ROAD_SPEEDS)
+
+        Returns:
+            Network whose edge_road indexes ``layout.infrastructure["roads"]``
+        """
+        return cls.from_roads(layout.infrastructure.get("roads", []), speeds)
+
+    @property
+    def node_count(self) -> int:
+        return len(self.node_x)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.edge_source)
+
+    def _build_adjacency(self) -> None:
+        """Build the CSR adjacency, both directions of every edge."""
+        edges = np.arange(self.edge_count)
+        tails = np.concatenate([self.edge_source, self.edge_target])
+        heads = np.concatenate([self.edge_target, self.edge_source])
+        edges = np.concatenate([edges, edges])
+
+        order = np.lexsort((heads, tails))
+        self.neighbors = heads[order]
+        self.edges = edges[order]
+        self.offsets = np.zeros(self.node_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(tails, minlength=self.node_count), out=self.offsets[1:])
+
+    def weights(self, weight: str = "time") -> np.ndarray:
+        """
+        Get the cost of every edge.
+
+        Args:
+            weight: "time" for minutes or "length" for km
+
+        Returns:
+            Edge costs indexed by edge
+        """
+        if weight not in WEIGHTS:
+            raise ValueError(f"Unknown weight {weight!r}, expected one of {WEIGHTS}")
+        return self.edge_time if weight == "time" else self.edge_length
+
+    def _lists(self, weight: str) -> Tuple[List[Any], ...]:
+        """Get the adjacency as Python lists, which searches index fastest."""
+        lists = self._search_lists.get(weight)
+        if lists is None:
+            costs = self.weights(weight)[self.edges]
+            lists = (
+                self.offsets.tolist(),
+                self.neighbors.tolist(),
+                self.edges.tolist(),
+                costs.tolist(),
+            )
+            self._search_lists[weight] = lists
+        return lists
+
+    def nearest_node(self, x: float, y: float) -> int:
+        """
+        Find the node nearest to a point.
+
+        Args:
+            x: Point x coordinate
+            y: Point y coordinate
+
+        Returns:
+            Node index, or -1 for an empty network
+        """
+        if self.node_count == 0:
+            return -1
+        return int(self._nodes_index().nearest(x, y, 1)[0])
+
+    def nearest_nodes(self, xs: Any, ys: Any) -> np.ndarray:
+        """
+        Find the node nearest to each of many points.
+
+        Args:
+            xs: Point x coordinates
+            ys: Point y coordinates
+
+        Returns:
+            Node index per point, -1 for an empty network
+        """
+        if self.node_count == 0:
+            return np.full(len(xs), -1, dtype=np.int64)
+        return self._nodes_index().nearest_batch(xs, ys, 1)[:, 0]
+
+    def _nodes_index(self) -> SpatialIndex:
+        """Get the spatial index over the nodes, built on first use."""
+        if self._node_index is None:
+            zeros = np.zeros(self.node_count)
+            self._node_index = SpatialIndex(self.node_x, self.node_y, zeros, zeros)
+        return self._node_index
+
+    def distances(self, source: int, weight: str = "time") -> np.ndarray:
+        """
+        Find the cost of the shortest paths from a node to every node (Dijkstra).
+
+        Args:
+            source: Source node
+            weight: "time" or "length"
+
+        Returns:
+            Costs indexed by node, infinite for unreachable nodes
+        """
+        offsets, neighbors, _, costs = self._lists(weight)
+        best = [math.inf] * self.node_count
+        best[source] = 0.0
+        heap = [(0.0, source)]
+        while heap:
+            cost, node = heapq.heappop(heap)
+            if cost > best[node]:
+                continue
+            for i in range(offsets[node], offsets[node + 1]):
+                candidate = cost + costs[i]
+                neighbor = neighbors[i]
+                if candidate < best[neighbor]:
+                    best[neighbor] = candidate
+                    heapq.heappush(heap, (candidate, neighbor))
+        return np.array(best)
+
+    def shortest_path(
+        self, source: int, target: int, weight: str = "time", method: str = "astar"
+    ) -> Optional[Route]:
+        """
+        Find the shortest path between two nodes.
+
+        A* uses the straight-line distance to the target, divided by the
+        fastest speed for travel times, as its heuristic; both methods find
+        paths of the same cost.
+
+        Args:
+            source: Source node
+            target: Target node
+            weight: "time" or "length"
+            method: "astar" or "dijkstra"
+
+        Returns:
+            Route, or None when the target is unreachable
+        """
+        if method not in ("astar", "dijkstra"):
+            raise ValueError(
+                f"Unknown method {method!r}, expected 'astar' or 'dijkstra'"
+            )
+        offsets, neighbors, edges, costs = self._lists(weight)
+
+        if method == "dijkstra":
+            scale = 0.0
+        elif weight == "length":
+            scale = 1.0
+        else:
+            scale = 1.0 / self.max_speed if self.max_speed > 0 else 0.0
+        tx, ty = self.node_x[target], self.node_y[target]
+        node_x, node_y = self.node_x, self.node_y
+
+        def estimate(node: int) -> float:
+            return scale * math.hypot(node_x[node] - tx, node_y[node] - ty)
+
+        best = {source: 0.0}
+        via: Dict[int, Tuple[int, int]] = {}
+        done = set()
+        heap = [(estimate(source), source)]
+        while heap:
+            _, node = heapq.heappop(heap)
+            if node == target:
+                break
+            if node in done:
+                continue
+            done.add(node)
+            cost = best[node]
+            for i in range(offsets[node], offsets[node + 1]):
+                neighbor = neighbors[i]
+                candidate = cost + costs[i]
+                if candidate < best.get(neighbor, math.inf):
+                    best[neighbor] = candidate
+                    via[neighbor] = (node, edges[i])
+                    heapq.heappush(heap, (candidate + estimate(neighbor), neighbor))
+        else:
+            return None
+
+        return self._route(source, target, via)
+
+    def _route(
+        self, source: int, target: int, via: Dict[int, Tuple[int, int]]
+    ) -> Route:
+        """Rebuild a route from each node's predecessor and edge."""
+        nodes, edges = [target], []
+        while nodes[-1] != source:
+            node, edge = via[nodes[-1]]
+            nodes.append(node)
+            edges.append(edge)
+        nodes.reverse()
+        edges.reverse()
+        return Route(
+            nodes,
+            edges,
+            float(self.edge_length[edges].sum()),
+            float(self.edge_time[edges].sum()),
+        )
+
+    def travel_time(self, x1: float, y1: float, x2: float, y2: float) -> float:
+        """
+        Estimate the travel time between two points over the roads.
+
+        Points are snapped to their nearest nodes.
+
+        Args:
+            x1: Origin x coordinate
+            y1: Origin y coordinate
+            x2: Destination x coordinate
+            y2: Destination y coordinate
+
+        Returns:
+            Travel time in minutes, infinite when no road connects the points
+        """
+        if self.node_count == 0:
+            return math.inf
+        route = self.shortest_path(self.nearest_node(x1, y1), self.nearest_node(x2, y2))
+        return math.inf if route is None else route.travel_time
@@ -18,9 +18,63 @@ This allows for:
 
 import hashlib
 import random
-from typing import Dict, Any, Optional, List
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import (
+    Callable,
+    Dict,
+    Any,
+    ItemsView,
+    Iterator,
+    KeysView,
+    Optional,
+    List,
+    Sequence,
+    Tuple,
+)
 from dataclasses import dataclass
 
+import numpy as np
+
+# What happens to an RNG evicted from a bounded cache when its path is
+# requested again: "replay" recreates it from its seed and fast-forwards past
+# the draws it had already made, so the stream continues exactly where it left
+# off; "fresh" restarts the stream from its seed.
+RNG_EVICTION_POLICIES = ("replay", "fresh")
+
+# Bit generators available to get_numpy_rng / spawn_numpy_rngs.
+NUMPY_BIT_GENERATORS = {
+    "pcg64": np.random.PCG64,
+    "philox": np.random.Philox,
+}
+
+# Hashes turning "<master_seed>:<path>" into 8 digest bytes, by derivation
+# version. Version 1 is the original MD5 scheme; seeds from a version never
+# change, so new schemes get a new version instead of replacing an old one.
+SEED_DERIVATIONS: Dict[int, Callable[[bytes], bytes]] = {
+    1: lambda data: hashlib.md5(data).digest()[:8],
+    2: lambda data: hashlib.blake2b(data, digest_size=8).digest(),
+}
+
+_MASK64 = (1 << 64) - 1
+
+
+def splitmix64(value: int) -> int:
+    """Apply the SplitMix64 finalizer to a 64-bit integer."""
+    value = (value + 0x9E3779B97F4A7C15) & _MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+
+def _splitmix64_array(values: np.ndarray) -> np.ndarray:
+    """Apply the SplitMix64 finalizer element-wise to a uint64 array."""
+    values = values + np.uint64(0x9E3779B97F4A7C15)
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return np.asarray(values ^ (values >> np.uint64(31)))
+
 
 @dataclass
 class SeedNode:
@@ -36,6 +90,394 @@ class SeedNode:
             self.children = {}
 
 
+class SeedTree:
+    """
+    Compact trie of every seed path derived by a generator.
+
+    Path segments are interned once; nodes are rows in parallel integer
+    arrays (parent, segment id, seed, first child, last child, next
+    sibling), so the tree costs a few machine words per node instead of a
+    full path string per entry. Node 0 is the root. Nodes that are only
+    prefixes of derived paths have a seed of -1.
+    """
+
+    def __init__(self) -> None:
+        self.segments: List[str] = []
+        self._segment_ids: Dict[str, int] = {}
+        self.parent = array("i", [-1])
+        self.segment = array("i", [-1])
+        self.seed = array("q", [-1])
+        self.first_child = array("i", [-1])
+        self.last_child = array("i", [-1])
+        self.next_sibling = array("i", [-1])
+        # (parent << 32 | segment id) -> node, for O(1) child lookups
+        self._child_index: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        """Number of derived paths in the tree."""
+        return sum(1 for seed in self.seed if seed >= 0)
+
+    def insert(self, path: str, seed: int) -> None:
+        """Record the seed derived for a path."""
+        node = self._node(path, create=True)
+        if node is not None:
+            self.seed[node] = seed
+
+    def get(self, path: str) -> Optional[int]:
+        """Get the seed recorded for a path, if any."""
+        node = self._node(path, create=False)
+        if node is None or self.seed[node] < 0:
+            return None
+        return self.seed[node]
+
+    def paths(self, path: str = "") -> Iterator[Tuple[str, int]]:
+        """Iterate over (path, seed) for every derived path under ``path``."""
+        root = self._node(path, create=False) if path else 0
+        if root is None:
+            return
+
+        stack = [(root, path)]
+        while stack:
+            node, node_path = stack.pop()
+            if node != 0 and self.seed[node] >= 0:
+                yield node_path, self.seed[node]
+
+            children = []
+            child = self.first_child[node]
+            while child >= 0:
+                name = self.segments[self.segment[child]]
+                children.append((child, f"{node_path}.{name}" if node else name))
+                child = self.next_sibling[child]
+            stack.extend(reversed(children))
+
+    def export(
+        self,
+        path: str = "",
+        max_depth: Optional[int] = None,
+        include_seeds: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Export a subtree in columnar form.
+
+        Args:
+            path: Root of the subtree to export ("" for the whole tree)
+            max_depth: Number of levels below the root to include
+            include_seeds: Whether to include the seed column; seeds can
+                always be recomputed from the master seed and the path
+
+        Returns:
+            Dictionary with the segments used and parallel node columns.
+            Node 0 is the subtree root; ``seed`` is None for prefix-only
+            nodes.
+        """
+        root = self._node(path, create=False) if path else 0
+        exported: Dict[str, Any] = {
+            "root": path,
+            "segments": [],
+            "parent": [],
+            "segment": [],
+            "seed": [],
+        }
+        if root is None:
+            if not include_seeds:
+                del exported["seed"]
+            return exported
+
+        segment_ids: Dict[int, int] = {}
+        queue = [(root, -1, 0)]
+        for node, parent, depth in queue:
+            index = len(exported["parent"])
+            segment = self.segment[node]
+            if node == root:
+                local_segment = -1
+            else:
+                if segment not in segment_ids:
+                    segment_ids[segment] = len(exported["segments"])
+                    exported["segments"].append(self.segments[segment])
+                local_segment = segment_ids[segment]
+
+            exported["parent"].append(parent)
+            exported["segment"].append(local_segment)
+            exported["seed"].append(self.seed[node] if self.seed[node] >= 0 else None)
+
+            if max_depth is None or depth < max_depth:
+                child = self.first_child[node]
+                while child >= 0:
+                    queue.append((child, index, depth + 1))
+                    child = self.next_sibling[child]
+
+        if not include_seeds:
+            del exported["seed"]
+        return exported
+
+    def diff(self, other: "SeedTree") -> Dict[str, Any]:
+        """
+        Compare the derived paths of two trees.
+
+        Returns:
+            Dictionary with paths only in ``other`` ("added"), paths only in
+            this tree ("removed") and paths whose seeds differ ("changed",
+            mapping path to [this seed, other seed])
+        """
+        mine = dict(self.paths())
+        theirs = dict(other.paths())
+        return {
+            "added": sorted(set(theirs) - set(mine)),
+            "removed": sorted(set(mine) - set(theirs)),
+            "changed": {
+                path: [seed, theirs[path]]
+                for path, seed in sorted(mine.items())
+                if path in theirs and theirs[path] != seed
+            },
+        }
+
+    def to_seed_node(self, master_seed: int) -> "SeedNode":
+        """Materialize the tree as linked SeedNode objects."""
+        root = SeedNode("master", master_seed)
+        nodes = {0: root}
+        for node in range(1, len(self.parent)):
+            parent = nodes[self.parent[node]]
+            name = self.segments[self.segment[node]]
+            seed_node = SeedNode(name, self.seed[node], parent)
+            parent.children[name] = seed_node
+            nodes[node] = seed_node
+        return root
+
+    def _node(self, path: str, create: bool) -> Optional[int]:
+        """Find (or create) the node for a path."""
+        node = 0
+        for name in path.split("."):
+            segment = self._segment_ids.get(name)
+            if segment is None:
+                if not create:
+                    return None
+                segment = len(self.segments)
+                self.segments.append(name)
+                self._segment_ids[name] = segment
+
+            key = (node << 32) | segment
+            child = self._child_index.get(key)
+            if child is None:
+                if not create:
+                    return None
+                child = len(self.parent)
+                self.parent.append(node)
+                self.segment.append(segment)
+                self.seed.append(-1)
+                self.first_child.append(-1)
+                self.last_child.append(-1)
+                self.next_sibling.append(-1)
+                # Append to the end of the parent's child list in O(1), as
+                # zone-heavy districts have thousands of children
+                last = self.last_child[node]
+                if last < 0:
+                    self.first_child[node] = child
+                else:
+                    self.next_sibling[last] = child
+                self.last_child[node] = child
+                self._child_index[key] = child
+            node = child
+
+        return node
+
+
+class LRUCache:
+    """
+    Dictionary-like cache that evicts its least recently used entries.
+
+    With ``maxsize=None`` the cache is unbounded. Hits, misses and evictions
+    are counted so long-running processes can monitor cache behaviour.
+    """
+
+    def __init__(
+        self,
+        maxsize: Optional[int] = None,
+        on_evict: Optional[Callable[[Any, Any], None]] = None,
+    ):
+        if maxsize is not None and maxsize < 1:
+            raise ValueError(f"Cache size must be positive, got {maxsize}")
+
+        self.maxsize = maxsize
+        self.on_evict = on_evict
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "OrderedDict[Any, Any]" = OrderedDict()
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """Get a cached value, marking it as most recently used."""
+        if key in self._data:
+            self.hits += 1
+            self._data.move_to_end(key)
+            return self._data[key]
+
+        self.misses += 1
+        return default
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+
+        while self.maxsize is not None and len(self._data) > self.maxsize:
+            evicted_key, evicted_value = self._data.popitem(last=False)
+            self.evictions += 1
+            if self.on_evict is not None:
+                self.on_evict(evicted_key, evicted_value)
+
+    def peek(self, key: Any, default: Any = None) -> Any:
+        """Get a cached value without marking it used or counting a hit."""
+        return self._data.get(key, default)
+
+    def pop(self, key: Any, default: Any = None) -> Any:
+        """Remove an entry and return its value, without counting a hit."""
+        return self._data.pop(key, default)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._data)
+
+    def keys(self) -> KeysView[Any]:
+        return self._data.keys()
+
+    def items(self) -> ItemsView[Any, Any]:
+        return self._data.items()
+
+    def clear(self) -> None:
+        """Remove every entry; counters are kept."""
+        self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the cache size and hit/miss/eviction counters."""
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class CountingRandom(random.Random):
+    """
+    random.Random that counts the 32-bit Mersenne Twister words it consumes.
+
+    ``random()`` consumes two words and ``getrandbits(k)`` consumes
+    ``ceil(k / 32)``; every other method is built on those two. The count
+    lets an evicted stream be rebuilt from its seed and fast-forwarded.
+    """
+
+    gauss_next: Optional[float]
+
+    def __init__(self, x: Any = None):
+        self.words_consumed = 0
+        super().__init__(x)
+
+    def seed(self, *args: Any, **kwargs: Any) -> None:
+        self.words_consumed = 0
+        super().seed(*args, **kwargs)
+
+    def random(self) -> float:
+        self.words_consumed += 2
+        return super().random()
+
+    def getrandbits(self, k: int) -> int:
+        self.words_consumed += (k + 31) // 32
+        return super().getrandbits(k)
+
+    def fast_forward(self, words: int) -> None:
+        """Skip ``words`` 32-bit words of output."""
+        while words > 0:
+            step = min(words, 1 << 16)
+            super().getrandbits(32 * step)
+            self.words_consumed += step
+            words -= step
+
+
+class CounterRNG:
+    """
+    Counter-based random number generator.
+
+    Every value is a pure function of ``(key, entity_index, draw_index)``:
+    the entity index is mixed into the key with SplitMix64 and the draw index
+    is mixed into the result, in the spirit of Philox/Threefry. Any draw of
+    any entity can therefore be recomputed in O(1) without replaying the
+    draws that came before it. Indices may be ints or NumPy integer arrays.
+    """
+
+    def __init__(self, key: int):
+        self.key = key & _MASK64
+
+    def bits(self, entity_index: Any, draw_index: Any) -> Any:
+        """Get 64 random bits for an entity and draw index."""
+        if isinstance(entity_index, np.ndarray) or isinstance(draw_index, np.ndarray):
+            entity = np.asarray(entity_index, dtype=np.uint64)
+            draw = np.asarray(draw_index, dtype=np.uint64)
+            entity_key = _splitmix64_array(
+                np.uint64(self.key) ^ _splitmix64_array(entity)
+            )
+            return _splitmix64_array(entity_key ^ draw)
+
+        key = splitmix64(self.key ^ splitmix64(entity_index & _MASK64))
+        return splitmix64(key ^ (draw_index & _MASK64))
+
+    def random(self, entity_index: Any, draw_index: Any) -> Any:
+        """Get a float in [0, 1) for an entity and draw index."""
+        bits = self.bits(entity_index, draw_index)
+        if isinstance(bits, np.ndarray):
+            return (bits >> np.uint64(11)).astype(np.float64) * 2.0**-53
+        return (bits >> 11) * 2.0**-53
+
+    def stream(self, entity_index: int) -> "KeyedRandom":
+        """Get a random.Random-compatible stream over one entity's draws."""
+        return KeyedRandom(self, entity_index)
+
+
+class KeyedRandom(random.Random):
+    """
+    random.Random whose output comes from a CounterRNG entity.
+
+    ``random()`` and ``getrandbits()`` read consecutive draw indices of the
+    entity, so every other random.Random method (uniform, choice, randint,
+    shuffle, ...) works unchanged. Set ``draw_index`` to jump within the
+    stream.
+    """
+
+    def __init__(self, counter_rng: CounterRNG, entity_index: int):
+        self.counter_rng = counter_rng
+        self.entity_index = entity_index
+        self.draw_index = 0
+        super().__init__()
+
+    def seed(self, *args: Any, **kwargs: Any) -> None:
+        # The stream is fully determined by the counter key and entity.
+        self.gauss_next = None
+
+    def random(self) -> float:
+        value: float = self.counter_rng.random(self.entity_index, self.draw_index)
+        self.draw_index += 1
+        return value
+
+    def getrandbits(self, k: int) -> int:
+        value = 0
+        for shift in range(0, k, 64):
+            bits = self.counter_rng.bits(self.entity_index, self.draw_index)
+            self.draw_index += 1
+            value |= bits << shift
+        return value & ((1 << k) - 1)
+
+    def getstate(self) -> Any:
+        return (self.counter_rng.key, self.entity_index, self.draw_index)
+
+    def setstate(self, state: Any) -> None:
+        key, self.entity_index, self.draw_index = state
+        self.counter_rng = CounterRNG(key)
+
+
 class HierarchicalSeedGenerator:
     """
     A hierarchical seed generator that creates deterministic random seeds
@@ -47,37 +489,136 @@ class HierarchicalSeedGenerator:
     - Leaf seeds determine specific features within sections
     """
 
-    def __init__(self, master_seed: int = 0):
+    def __init__(
+        self,
+        master_seed: int = 0,
+        seed_cache_size: Optional[int] = None,
+        rng_cache_size: Optional[int] = None,
+        rng_eviction_policy: str = "replay",
+        branch_overrides: Optional[Dict[str, int]] = None,
+        track_paths: bool = True,
+        derivation_version: int = 1,
+    ):
+        if rng_eviction_policy not in RNG_EVICTION_POLICIES:
+            raise ValueError(
+                f"Unknown RNG eviction policy {rng_eviction_policy!r}, "
+                f"expected one of {RNG_EVICTION_POLICIES}"
+            )
+        if derivation_version not in SEED_DERIVATIONS:
+            raise ValueError(
+                f"Unknown seed derivation version {derivation_version!r}, "
+                f"expected one of {tuple(SEED_DERIVATIONS)}"
+            )
+
         self.master_seed = master_seed
+        self.seed_cache_size = seed_cache_size
+        self.rng_cache_size = rng_cache_size
+        self.rng_eviction_policy = rng_eviction_policy
+        self.track_paths = track_paths
+        self.derivation_version = derivation_version
         self.root = SeedNode("master", master_seed)
-        self._seed_cache: Dict[str, int] = {}
-        self._rng_cache: Dict[str, random.Random] = {}
+        # Every path ever derived, independent of cache eviction. The tree
+        # grows with the number of distinct paths, so long-running processes
+        # with bounded caches can turn it off with track_paths=False.
+        self.tree = SeedTree()
+        self._seed_cache = LRUCache(seed_cache_size)
+        self._rng_cache = LRUCache(rng_cache_size, self._on_rng_evicted)
+        # Draw offsets of evicted RNGs under the "replay" policy:
+        # path -> (words consumed, pending gauss() value). Offsets are kept
+        # for at most seed_cache_size paths; a stream whose offset was
+        # dropped restarts from its seed, as under the "fresh" policy.
+        self._rng_offsets = LRUCache(seed_cache_size)
+        # NumPy generators share the RNG cache bound. Their bit generator
+        # state is only a few words, so "replay" simply keeps it on eviction,
+        # under the same bound as the offsets.
+        self._numpy_rng_cache = LRUCache(rng_cache_size, self._on_numpy_rng_evicted)
+        self._numpy_rng_states = LRUCache(seed_cache_size)
+        # Branches whose seed is pinned instead of derived from the master
+        # seed. Paths below a pinned branch are derived from the branch seed
+        # by a generator rooted at it.
+        self.branch_overrides = dict(branch_overrides or {})
+        # Lists collecting the paths requested inside record_paths() blocks
+        self._path_recorders: List[List[str]] = []
+        self._branch_generators = {
+            branch: HierarchicalSeedGenerator(
+                seed,
+                seed_cache_size=seed_cache_size,
+                track_paths=False,
+                derivation_version=derivation_version,
+            )
+            for branch, seed in self.branch_overrides.items()
+        }
+
+    def settings(self) -> Dict[str, Any]:
+        """Get the constructor arguments other than the master seed."""
+        return {
+            "seed_cache_size": self.seed_cache_size,
+            "rng_cache_size": self.rng_cache_size,
+            "rng_eviction_policy": self.rng_eviction_policy,
+            "branch_overrides": dict(self.branch_overrides),
+            "track_paths": self.track_paths,
+            "derivation_version": self.derivation_version,
+        }
 
     def set_master_seed(self, seed: int) -> None:
         """Set the master seed and clear all caches."""
         self.master_seed = seed
         self.root = SeedNode("master", seed)
+        self.tree = SeedTree()
         self._seed_cache.clear()
         self._rng_cache.clear()
+        self._rng_offsets.clear()
+        self._numpy_rng_cache.clear()
+        self._numpy_rng_states.clear()
 
-    def get_seed(self, path: str) -> int:
+    def get_seed(self, path: str, record: bool = True) -> int:
         """
         Get a deterministic seed for the given path.
 
         Args:
             path: Dot-separated path (e.g., "districts.north.residential")
+            record: Whether the request counts as deriving the path. Seeds
+                looked up with ``record=False`` are not added to the tree,
+                to record_paths() blocks or to the seed cache.
 
         Returns:
             Deterministic seed for the given path
         """
-        if path in self._seed_cache:
-            return self._seed_cache[path]
+        seed: Optional[int]
+        if not record:
+            seed = self._seed_cache.get(path)
+            return seed if seed is not None else self._generate_seed_for_path(path)
+
+        for recorder in self._path_recorders:
+            recorder.append(path)
+
+        seed = self._seed_cache.get(path)
+        if seed is not None:
+            return seed
 
         # Generate seed by hashing the master seed with the path
         seed = self._generate_seed_for_path(path)
         self._seed_cache[path] = seed
+        if self.track_paths:
+            self.tree.insert(path, seed)
         return seed
 
+    @contextmanager
+    def record_paths(self) -> Iterator[List[str]]:
+        """
+        Record every path whose seed is requested inside the block.
+
+        Yields:
+            List that collects the paths in request order; a path requested
+            more than once appears more than once
+        """
+        paths: List[str] = []
+        self._path_recorders.append(paths)
+        try:
+            yield paths
+        finally:
+            self._path_recorders.pop()
+
     def get_rng(self, path: str) -> random.Random:
         """
         Get a random number generator for the given path.
@@ -88,21 +629,230 @@ class HierarchicalSeedGenerator:
         Returns:
             Seeded random number generator
         """
-        if path in self._rng_cache:
-            return self._rng_cache[path]
+        rng: Optional[random.Random] = self._rng_cache.get(path)
+        if rng is not None:
+            return rng
 
         seed = self.get_seed(path)
-        rng = random.Random(seed)
+        if self.rng_cache_size is None or self.rng_eviction_policy == "fresh":
+            rng = random.Random(seed)
+        else:
+            rng = CountingRandom(seed)
+            offset = self._rng_offsets.pop(path, None)
+            if offset is not None:
+                words, gauss_next = offset
+                rng.fast_forward(words)
+                rng.gauss_next = gauss_next
+
         self._rng_cache[path] = rng
         return rng
 
+    def _on_rng_evicted(self, path: str, rng: random.Random) -> None:
+        """Record where an evicted stream stopped so it can be replayed."""
+        if isinstance(rng, CountingRandom):
+            self._rng_offsets[path] = (rng.words_consumed, rng.gauss_next)
+
+    def get_rng_state(self, path: str) -> Optional[Tuple[Any, int]]:
+        """
+        Get where the RNG for a path currently stands, without deriving it.
+
+        Cache order and statistics are left untouched, so the state can be
+        handed to another process without changing this generator.
+
+        Args:
+            path: Dot-separated path (e.g., "districts.north.residential")
+
+        Returns:
+            (random.Random state, words consumed) for set_rng_state, or None
+            if get_rng would start the stream at its seed
+        """
+        rng = self._rng_cache.peek(path)
+        if rng is not None:
+            return rng.getstate(), getattr(rng, "words_consumed", 0)
+
+        offset = self._rng_offsets.peek(path)
+        if offset is None or self.rng_eviction_policy == "fresh":
+            return None
+        words, gauss_next = offset
+        rng = CountingRandom(self.get_seed(path, record=False))
+        rng.fast_forward(words)
+        rng.gauss_next = gauss_next
+        return rng.getstate(), words
+
+    def set_rng_state(self, path: str, state: Tuple[Any, int]) -> None:
+        """
+        Move the RNG for a path to a state taken with get_rng_state.
+
+        Args:
+            path: Dot-separated path (e.g., "districts.north.residential")
+            state: (random.Random state, words consumed)
+        """
+        rng_state, words = state
+        rng = self._rng_cache.peek(path)
+        if rng is None:
+            rng = self.get_rng(path)
+        rng.setstate(rng_state)
+        if isinstance(rng, CountingRandom):
+            rng.words_consumed = words
+
+    def rng_states(self) -> Dict[str, Tuple[Any, int]]:
+        """
+        Get the state of every RNG that no longer starts at its seed.
+
+        Like get_rng_state, this leaves cache order and statistics untouched.
+
+        Returns:
+            Mapping of path to (random.Random state, words consumed)
+        """
+        states = {}
+        for path in list(self._rng_cache.keys()) + list(self._rng_offsets.keys()):
+            state = self.get_rng_state(path)
+            if state is not None:
+                states[path] = state
+        return states
+
+    def get_seed_sequence(self, path: str) -> np.random.SeedSequence:
+        """
+        Get the NumPy SeedSequence for the given path.
+
+        The entropy combines the path's seed with the master seed, so the
+        sequence is deterministic for a (master seed, path) pair.
+
+        Args:
+            path: Dot-separated path (e.g., "districts.north.residential")
+
+        Returns:
+            Root SeedSequence for the path, with no children spawned yet
+        """
+        return np.random.SeedSequence([self.get_seed(path), self.master_seed & _MASK64])
+
+    def get_numpy_rng(
+        self, path: str, bit_generator: str = "pcg64"
+    ) -> np.random.Generator:
+        """
+        Get a NumPy random generator for the given path.
+
+        Like get_rng, the generator is cached, so repeated calls continue the
+        same stream.
+
+        Args:
+            path: Dot-separated path (e.g., "districts.north.residential")
+            bit_generator: Name of a bit generator in NUMPY_BIT_GENERATORS
+
+        Returns:
+            Seeded numpy.random.Generator
+        """
+        if bit_generator not in NUMPY_BIT_GENERATORS:
+            raise ValueError(
+                f"Unknown bit generator {bit_generator!r}, "
+                f"expected one of {tuple(NUMPY_BIT_GENERATORS)}"
+            )
+
+        key = (path, bit_generator)
+        rng: Optional[np.random.Generator] = self._numpy_rng_cache.get(key)
+        if rng is not None:
+            return rng
+
+        bits = NUMPY_BIT_GENERATORS[bit_generator](self.get_seed_sequence(path))
+        state = self._numpy_rng_states.pop(key, None)
+        if state is not None:
+            bits.state = state
+
+        rng = np.random.Generator(bits)
+        self._numpy_rng_cache[key] = rng
+        return rng
+
+    def spawn_numpy_rngs(
+        self, path: str, count: int, start: int = 0, bit_generator: str = "pcg64"
+    ) -> List[np.random.Generator]:
+        """
+        Spawn independent child NumPy generators for parallel workers.
+
+        Child ``i`` uses spawn key ``(i,)`` under the path's SeedSequence, so
+        a worker can rebuild its own stream with ``start=i, count=1`` without
+        creating its siblings. Children are not cached.
+
+        Args:
+            path: Dot-separated parent path
+            count: Number of child generators to create
+            start: Index of the first child
+            bit_generator: Name of a bit generator in NUMPY_BIT_GENERATORS
+
+        Returns:
+            List of independent numpy.random.Generator objects
+        """
+        if bit_generator not in NUMPY_BIT_GENERATORS:
+            raise ValueError(
+                f"Unknown bit generator {bit_generator!r}, "
+                f"expected one of {tuple(NUMPY_BIT_GENERATORS)}"
+            )
+
+        entropy = self.get_seed_sequence(path).entropy
+        bits_class = NUMPY_BIT_GENERATORS[bit_generator]
+        return [
+            np.random.Generator(
+                bits_class(np.random.SeedSequence(entropy, spawn_key=(index,)))
+            )
+            for index in range(start, start + count)
+        ]
+
+    def get_counter_rng(self, path: str) -> CounterRNG:
+        """
+        Get a counter-based random access generator for the given path.
+
+        Unlike get_rng, draws are addressed by (entity index, draw index), so
+        any entity under the path can be regenerated without its siblings.
+
+        Args:
+            path: Dot-separated path (e.g., "districts.district_3")
+
+        Returns:
+            CounterRNG keyed by the path seed and the master seed
+        """
+        return CounterRNG(((self.master_seed & 0xFFFFFFFF) << 32) | self.get_seed(path))
+
+    def _on_numpy_rng_evicted(
+        self, key: Tuple[str, str], rng: np.random.Generator
+    ) -> None:
+        """Keep an evicted NumPy generator's state under the replay policy."""
+        if self.rng_eviction_policy == "replay":
+            self._numpy_rng_states[key] = rng.bit_generator.state
+
+    def overridden_branch(self, path: str) -> Optional[str]:
+        """
+        Find the pinned branch a path falls under.
+
+        Args:
+            path: Dot-separated path (e.g., "districts.north.residential")
+
+        Returns:
+            The deepest branch in branch_overrides that is the path itself or
+            one of its prefixes, or None
+        """
+        if not self.branch_overrides:
+            return None
+
+        prefix = path
+        while prefix:
+            if prefix in self.branch_overrides:
+                return prefix
+            prefix = prefix.rpartition(".")[0]
+        return None
+
     def _generate_seed_for_path(self, path: str) -> int:
         """Generate a deterministic seed for the given path."""
-        # Create a hash of the master seed and path
+        branch = self.overridden_branch(path)
+        if branch is not None:
+            if path == branch:
+                return self.branch_overrides[branch]
+            return self._branch_generators[branch].get_seed(path[len(branch) + 1 :])
+
+        # Create a hash of the master seed and path. One hash call over the
+        # whole path is cheaper in CPython than resuming cached per-prefix
+        # hash states, so seeds are not derived segment by segment.
         combined = f"{self.master_seed}:{path}"
-        hash_obj = hashlib.md5(combined.encode())
-        # Convert first 8 bytes to integer
-        return int.from_bytes(hash_obj.digest()[:8], byteorder="big") % (2**32)
+        digest = SEED_DERIVATIONS[self.derivation_version](combined.encode())
+        return int.from_bytes(digest, byteorder="big") % (2**32)
 
     def get_branch_seeds(self, parent_path: str) -> Dict[str, int]:
         """
@@ -152,14 +902,26 @@ class HierarchicalSeedGenerator:
         # Combine base and variation seeds
         return (base_seed + variation_seed) % (2**32)
 
-    def get_city_metadata(self) -> Dict[str, Any]:
+    def get_city_metadata(self, include_branches: bool = True) -> Dict[str, Any]:
         """Get metadata about the seed system for debugging/display."""
-        return {
+        metadata = {
             "master_seed": self.master_seed,
+            "derivation_version": self.derivation_version,
+            "branch_overrides": dict(self.branch_overrides),
             "cached_seeds": len(self._seed_cache),
             "cached_rngs": len(self._rng_cache),
-            "available_branches": list(self._seed_cache.keys()),
+            "derived_paths": len(self.tree),
+            "cache_stats": {
+                "seeds": self._seed_cache.stats(),
+                "rngs": self._rng_cache.stats(),
+                "numpy_rngs": self._numpy_rng_cache.stats(),
+                "rng_eviction_policy": self.rng_eviction_policy,
+                "replayable_rngs": len(self._rng_offsets),
+            },
         }
+        if include_branches:
+            metadata["available_branches"] = list(self._seed_cache.keys())
+        return metadata
 
 
 class CitySeedManager:
@@ -170,8 +932,8 @@ class CitySeedManager:
     different aspects of city generation.
     """
 
-    def __init__(self, master_seed: int = 0):
-        self.generator = HierarchicalSeedGenerator(master_seed)
+    def __init__(self, master_seed: int = 0, **cache_options: Any):
+        self.generator = HierarchicalSeedGenerator(master_seed, **cache_options)
 
     def get_district_seed(self, district_name: str) -> int:
         """Get seed for a specific district."""
@@ -197,9 +959,13 @@ class CitySeedManager:
 
     def get_population_seed(self, target_population: int) -> int:
         """Get seed for population generation based on target size."""
+        return self.generator.get_seed(self.get_population_seed_path(target_population))
+
+    def get_population_seed_path(self, target_population: int) -> str:
+        """Get the seed path used for population generation."""
         # Use population size to create different seeds for different scales
         pop_tier = self._get_population_tier(target_population)
-        return self.generator.get_seed(f"population.tier_{pop_tier}")
+        return f"population.tier_{pop_tier}"
 
     def _get_population_tier(self, population: int) -> str:
         """Determine population tier for seed generation."""
@@ -215,7 +981,10 @@ class CitySeedManager:
             return "megalopolis"
 
     def create_city_variation(
-        self, variation_type: str, variation_value: str
+        self,
+        variation_type: str,
+        variation_value: str,
+        branches: Optional[Sequence[str]] = None,
     ) -> "CitySeedManager":
         """
         Create a new CitySeedManager with a variation of the current seed.
@@ -223,22 +992,75 @@ class CitySeedManager:
         Args:
             variation_type: Type of variation (e.g., "density", "layout")
             variation_value: Specific variation value (e.g., "high", "grid")
+            branches: Seed paths to vary (e.g., ["infrastructure"]). When
+                given, the master seed is kept and only these branches and
+                the paths below them get new seeds.
 
         Returns:
-            New CitySeedManager with modified master seed
+            New CitySeedManager with modified master seed, or with the
+            given branches overridden
         """
+        if branches is not None:
+            settings = self.generator.settings()
+            for branch in branches:
+                settings["branch_overrides"][branch] = self.generator.create_variation(
+                    branch, f"{variation_type}.{variation_value}"
+                )
+            return CitySeedManager(self.generator.master_seed, **settings)
+
         variation_seed = self.generator.create_variation(
             "master", f"{variation_type}.{variation_value}"
         )
-        return CitySeedManager(variation_seed)
+        return CitySeedManager(variation_seed, **self.generator.settings())
 
-    def export_seed_tree(self) -> Dict[str, Any]:
-        """Export the current seed tree for debugging or persistence."""
-        return {
+    def export_seed_tree(
+        self,
+        path: str = "",
+        max_depth: Optional[int] = None,
+        include_seeds: bool = True,
+        include_metadata: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Export the current seed tree for debugging or persistence.
+
+        Args:
+            path: Root of the subtree to export ("" for the whole tree)
+            max_depth: Number of levels below the root to include
+            include_seeds: Whether to include per-node seeds
+            include_metadata: Whether to include the seed system metadata,
+                whose cache sizes and counters depend on runtime state
+
+        Returns:
+            Master seed, compact tree (see SeedTree.export) and
+            seed system metadata
+        """
+        exported = {
             "master_seed": self.generator.master_seed,
-            "seed_cache": self.generator._seed_cache,
-            "metadata": self.generator.get_city_metadata(),
+            "tree": self.generator.tree.export(path, max_depth, include_seeds),
         }
+        if include_metadata:
+            exported["metadata"] = self.generator.get_city_metadata(
+                include_branches=False
+            )
+        return exported
+
+    def diff_seed_tree(self, other_master_seed: int) -> Dict[str, Any]:
+        """
+        Compare this seed tree with the one another master seed produces.
+
+        Every path derived so far is derived again under the other master
+        seed, using the same cache settings.
+
+        Args:
+            other_master_seed: Master seed to compare against
+
+        Returns:
+            Diff as returned by SeedTree.diff
+        """
+        other = CitySeedManager(other_master_seed, **self.generator.settings())
+        for path, _ in self.generator.tree.paths():
+            other.generator.get_seed(path)
+        return self.generator.tree.diff(other.generator.tree)
 
 
 # Utility functions for common seed operations
@@ -253,7 +1075,14 @@ def create_city_seed_manager(city_config: Dict[str, Any]) -> CitySeedManager:
         CitySeedManager configured for the city
     """
     master_seed = city_config.get("seed", 0)
-    return CitySeedManager(master_seed)
+    return CitySeedManager(
+        master_seed,
+        seed_cache_size=city_config.get("seed_cache_size"),
+        rng_cache_size=city_config.get("rng_cache_size"),
+        rng_eviction_policy=city_config.get("rng_eviction_policy", "replay"),
+        track_paths=city_config.get("track_seed_paths", True),
+        derivation_version=city_config.get("seed_derivation_version", 1),
+    )
 
 
 def generate_reproducible_city_id(city_config: Dict[str, Any]) -> str:
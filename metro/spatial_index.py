@@ -0,0 +1,391 @@
+"""
+Spatial Index for City Layouts
+
+This module indexes the rectangles of districts or zones in a uniform grid.
+Each grid cell lists the rectangles overlapping it, stored in compressed sparse
+row form: ``cell_offsets[c]:cell_offsets[c + 1]`` slices ``cell_items`` to the
+rectangles of cell ``c``. Point, window and k-nearest queries only test the
+rectangles of the cells they touch.
+"""
+
+import math
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Grid cells per block of points sharing candidates in nearest_batch, at least
+BATCH_BLOCK_CELLS = 64
+
+
+class SpatialIndex:
+    """
+    A uniform grid index over axis-aligned rectangles.
+
+    Rectangles are given by their lower corner and size, like District and
+    Zone. Query results are arrays of rectangle indices in ascending order,
+    except for nearest-neighbour queries which are ordered by distance.
+    """
+
+    def __init__(
+        self,
+        x: Any,
+        y: Any,
+        width: Any,
+        height: Any,
+        cell_size: Optional[float] = None,
+    ) -> None:
+        self.x0 = np.asarray(x, dtype=np.float64)
+        self.y0 = np.asarray(y, dtype=np.float64)
+        self.x1 = self.x0 + np.asarray(width, dtype=np.float64)
+        self.y1 = self.y0 + np.asarray(height, dtype=np.float64)
+
+        count = len(self.x0)
+        if count:
+            self.origin = (float(self.x0.min()), float(self.y0.min()))
+            extent = (
+                max(float(self.x1.max()) - self.origin[0], 1e-9),
+                max(float(self.y1.max()) - self.origin[1], 1e-9),
+            )
+        else:
+            self.origin = (0.0, 0.0)
+            extent = (1.0, 1.0)
+
+        if cell_size is None:
+            # Roughly one rectangle per cell
+            cell_size = (extent[0] * extent[1] / max(count, 1)) ** 0.5
+        self.cell_size = float(cell_size)
+        self.shape = (
+            max(1, int(np.ceil(extent[0] / self.cell_size))),
+            max(1, int(np.ceil(extent[1] / self.cell_size))),
+        )
+
+        self._build()
+
+    @classmethod
+    def from_layout(
+        cls, layout: Any, kind: str = "zones", cell_size: Optional[float] = None
+    ) -> "SpatialIndex":
+        """
+        Index the districts or zones of a city layout.
+
+        Args:
+            layout: CityLayout or ColumnarLayout
+            kind: "districts" or "zones"
+            cell_size: Grid cell size in km (defaults to one rectangle per cell)
+
+        Returns:
+            Index whose rectangle indices match the order of the layout list
+        """
+        if kind not in ("districts", "zones"):
+            raise ValueError(f"Unknown kind {kind!r}, expected 'districts' or 'zones'")
+
+        records = getattr(layout, kind)
+        columns = getattr(records, "columns", None)
+        if columns is not None:
+            return cls(
+                columns["x"],
+                columns["y"],
+                columns["width"],
+                columns["height"],
+                cell_size,
+            )
+
+        return cls(
+            [r.x for r in records],
+            [r.y for r in records],
+            [r.width for r in records],
+            [r.height for r in records],
+            cell_size,
+        )
+
+    def __len__(self) -> int:
+        return len(self.x0)
+
+    def _build(self) -> None:
+        """Assign every rectangle to the grid cells it overlaps."""
+        i0, j0 = self._cell_coords(self.x0, self.y0)
+        i1, j1 = self._cell_coords(self.x1, self.y1)
+        columns = i1 - i0 + 1
+        cells_per_item = columns * (j1 - j0 + 1)
+
+        # One (item, cell) pair per overlapped cell
+        items = np.repeat(np.arange(len(self.x0)), cells_per_item)
+        local = np.arange(len(items)) - np.repeat(
+            np.cumsum(cells_per_item) - cells_per_item, cells_per_item
+        )
+        cells = (i0[items] + local % columns[items]) * self.shape[1] + (
+            j0[items] + local // columns[items]
+        )
+
+        order = np.lexsort((items, cells))
+        self.cell_items = items[order]
+        self.cell_offsets = np.zeros(self.shape[0] * self.shape[1] + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(cells, minlength=self.shape[0] * self.shape[1]),
+            out=self.cell_offsets[1:],
+        )
+
+    def _cell_coords(self, x: Any, y: Any) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the grid column and row of points, clamped to the grid."""
+        i = np.floor((np.asarray(x) - self.origin[0]) / self.cell_size)
+        j = np.floor((np.asarray(y) - self.origin[1]) / self.cell_size)
+        return (
+            np.clip(i, 0, self.shape[0] - 1).astype(np.int64),
+            np.clip(j, 0, self.shape[1] - 1).astype(np.int64),
+        )
+
+    def _cell_candidates(self, i: int, j: int) -> np.ndarray:
+        """Get the rectangles overlapping cell (i, j)."""
+        cell = i * self.shape[1] + j
+        return self.cell_items[self.cell_offsets[cell] : self.cell_offsets[cell + 1]]
+
+    def query_point(self, x: float, y: float) -> np.ndarray:
+        """
+        Find the rectangles containing a point, edges included.
+
+        Args:
+            x: Point x coordinate
+            y: Point y coordinate
+
+        Returns:
+            Indices of the containing rectangles
+        """
+        offsets, indices = self.query_points([x], [y])
+        return indices[offsets[0] : offsets[1]]
+
+    def query_points(self, xs: Any, ys: Any) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the rectangles containing each of many points.
+
+        Args:
+            xs: Point x coordinates
+            ys: Point y coordinates
+
+        Returns:
+            Tuple of (offsets, indices): the rectangles containing point ``p``
+            are ``indices[offsets[p]:offsets[p + 1]]``
+        """
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        i, j = self._cell_coords(xs, ys)
+        cells = i * self.shape[1] + j
+        starts = self.cell_offsets[cells]
+        counts = self.cell_offsets[cells + 1] - starts
+
+        # One (point, candidate) pair per rectangle in the point's cell
+        points = np.repeat(np.arange(len(xs)), counts)
+        local = np.arange(len(points)) - np.repeat(np.cumsum(counts) - counts, counts)
+        candidates = self.cell_items[starts[points] + local]
+
+        hit = (
+            (self.x0[candidates] <= xs[points])
+            & (xs[points] <= self.x1[candidates])
+            & (self.y0[candidates] <= ys[points])
+            & (ys[points] <= self.y1[candidates])
+        )
+        offsets = np.zeros(len(xs) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(points[hit], minlength=len(xs)), out=offsets[1:])
+        return offsets, candidates[hit]
+
+    def query_window(self, x0: float, y0: float, x1: float, y1: float) -> np.ndarray:
+        """
+        Find the rectangles intersecting a window, edges included.
+
+        Args:
+            x0: Window minimum x
+            y0: Window minimum y
+            x1: Window maximum x
+            y1: Window maximum y
+
+        Returns:
+            Indices of the intersecting rectangles
+        """
+        ci0, cj0 = self._cell_coords(x0, y0)
+        ci1, cj1 = self._cell_coords(x1, y1)
+        candidates = np.unique(
+            np.concatenate(
+                [self.cell_items[0:0]]
+                + [
+                    self._cell_candidates(i, j)
+                    for i in range(ci0, ci1 + 1)
+                    for j in range(cj0, cj1 + 1)
+                ]
+            )
+        )
+        hit = (
+            (self.x0[candidates] <= x1)
+            & (x0 <= self.x1[candidates])
+            & (self.y0[candidates] <= y1)
+            & (y0 <= self.y1[candidates])
+        )
+        return np.asarray(candidates[hit])
+
+    def distances(self, x: float, y: float, indices: Any = None) -> np.ndarray:
+        """
+        Get the distance from a point to rectangles, 0 inside them.
+
+        Args:
+            x: Point x coordinate
+            y: Point y coordinate
+            indices: Rectangles to measure (defaults to all)
+
+        Returns:
+            Euclidean distances
+        """
+        if indices is None:
+            indices = slice(None)
+        dx = np.maximum(np.maximum(self.x0[indices] - x, x - self.x1[indices]), 0.0)
+        dy = np.maximum(np.maximum(self.y0[indices] - y, y - self.y1[indices]), 0.0)
+        return np.asarray(np.hypot(dx, dy))
+
+    def nearest(self, x: float, y: float, k: int = 1) -> np.ndarray:
+        """
+        Find the k rectangles nearest to a point.
+
+        Rings of grid cells around the point's cell are searched outward until
+        no unsearched cell can hold a closer rectangle.
+
+        Args:
+            x: Point x coordinate
+            y: Point y coordinate
+            k: Number of rectangles to return
+
+        Returns:
+            Up to k rectangle indices, nearest first, ties broken by index
+        """
+        k = min(k, len(self))
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64)
+
+        ci, cj = (int(c) for c in self._cell_coords(x, y))
+        seen = np.zeros(len(self), dtype=bool)
+        found: List[np.ndarray] = []
+        max_ring = max(ci, cj, self.shape[0] - 1 - ci, self.shape[1] - 1 - cj)
+
+        for ring in range(max_ring + 1):
+            for i, j in self._ring_cells(ci, cj, ring):
+                candidates = self._cell_candidates(i, j)
+                candidates = candidates[~seen[candidates]]
+                seen[candidates] = True
+                found.append(candidates)
+
+            indices = np.concatenate(found)
+            if len(indices) >= k:
+                distances = self.distances(x, y, indices)
+                # Unsearched cells are at least `ring` cells away
+                if np.partition(distances, k - 1)[k - 1] <= ring * self.cell_size:
+                    break
+
+        indices = np.concatenate(found)
+        distances = self.distances(x, y, indices)
+        return indices[np.lexsort((indices, distances))[:k]]
+
+    def nearest_batch(self, xs: Any, ys: Any, k: int = 1) -> np.ndarray:
+        """
+        Find the k rectangles nearest to each of many points.
+
+        Args:
+            xs: Point x coordinates
+            ys: Point y coordinates
+            k: Number of rectangles per point
+
+        Returns:
+            Array of shape (len(xs), k), nearest first, padded with -1 when
+            there are fewer than k rectangles
+        """
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        result = np.full((len(xs), k), -1, dtype=np.int64)
+        k = min(k, len(self))
+        if k <= 0 or len(xs) == 0:
+            return result
+
+        # Points in the same block of cells share their candidate rectangles;
+        # a block of n cells holds about n rectangles
+        block = math.isqrt(max(k, BATCH_BLOCK_CELLS))
+        ci, cj = self._cell_coords(xs, ys)
+        blocks = (ci // block) * (self.shape[1] // block + 1) + cj // block
+        order = np.argsort(blocks, kind="stable")
+        _, starts = np.unique(blocks[order], return_index=True)
+
+        for points in np.split(order, starts[1:]):
+            i0 = int(ci[points[0]]) // block * block
+            j0 = int(cj[points[0]]) // block * block
+            i1, j1 = i0 + block - 1, j0 + block - 1
+            ring = 1
+            while len(points):
+                window = (
+                    max(i0 - ring, 0),
+                    max(j0 - ring, 0),
+                    min(i1 + ring, self.shape[0] - 1),
+                    min(j1 + ring, self.shape[1] - 1),
+                )
+                candidates = self._window_candidates(*window)
+                if len(candidates) >= k:
+                    dx = np.maximum(
+                        np.maximum(
+                            self.x0[candidates] - xs[points, None],
+                            xs[points, None] - self.x1[candidates],
+                        ),
+                        0.0,
+                    )
+                    dy = np.maximum(
+                        np.maximum(
+                            self.y0[candidates] - ys[points, None],
+                            ys[points, None] - self.y1[candidates],
+                        ),
+                        0.0,
+                    )
+                    distances = np.hypot(dx, dy)
+                    # Candidates are in index order, so ties stay in index order
+                    nearest = np.argsort(distances, axis=1, kind="stable")[:, :k]
+                    kth = np.take_along_axis(distances, nearest[:, -1:], axis=1)[:, 0]
+                    done = kth <= self._window_margin(window, xs[points], ys[points])
+                    result[points[done], :k] = candidates[nearest[done]]
+                    points = points[~done]
+                ring *= 2
+        return result
+
+    def _window_margin(
+        self, window: Tuple[int, int, int, int], xs: np.ndarray, ys: np.ndarray
+    ) -> np.ndarray:
+        """Distance from points to the nearest grid cell outside a window."""
+        i0, j0, i1, j1 = window
+        size = self.cell_size
+        margin = np.full(len(xs), np.inf)
+        # Sides on the grid's border have no cells beyond them
+        if i0 > 0:
+            margin = np.minimum(margin, xs - (self.origin[0] + i0 * size))
+        if i1 < self.shape[0] - 1:
+            margin = np.minimum(margin, self.origin[0] + (i1 + 1) * size - xs)
+        if j0 > 0:
+            margin = np.minimum(margin, ys - (self.origin[1] + j0 * size))
+        if j1 < self.shape[1] - 1:
+            margin = np.minimum(margin, self.origin[1] + (j1 + 1) * size - ys)
+        return margin
+
+    def _window_candidates(self, i0: int, j0: int, i1: int, j1: int) -> np.ndarray:
+        """Get the rectangles in a window of grid cells, in index order."""
+        rows = np.arange(i0, i1 + 1) * self.shape[1]
+        starts = self.cell_offsets[rows + j0]
+        ends = self.cell_offsets[rows + j1 + 1]
+        return np.unique(
+            np.concatenate([self.cell_items[s:e] for s, e in zip(starts, ends)])
+        )
+
+    def _ring_cells(self, ci: int, cj: int, ring: int) -> List[Tuple[int, int]]:
+        """Get the grid cells at Chebyshev distance ``ring`` from (ci, cj)."""
+        if ring == 0:
+            return [(ci, cj)]
+
+        cells: List[Tuple[int, int]] = []
+        for i in range(ci - ring, ci + ring + 1):
+            if not 0 <= i < self.shape[0]:
+                continue
+            rows: Sequence[int]
+            if i in (ci - ring, ci + ring):
+                rows = range(cj - ring, cj + ring + 1)
+            else:
+                rows = (cj - ring, cj + ring)
+            cells.extend((i, j) for j in rows if 0 <= j < self.shape[1])
+        return cells
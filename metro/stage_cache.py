@@ -0,0 +1,153 @@
+"""
+Content-Addressed Stage Cache for Metro City Generation
+
+This module caches the output of individual CitySimulator stages on local
+disk. Each entry is addressed by a hash of the stage name, the seed path the
+stage draws from, the seed derived for that path and the stage's other input
+parameters, so re-simulating a known (seed, population, size) combination can
+skip generation entirely.
+
+Entries are pickled and zlib-compressed. Once the cache directory grows past
+its size limit, the least recently used entries are deleted.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, Union
+
+# Bump when a stage's generation logic changes, so stale entries are ignored.
+CACHE_VERSION = 3
+
+ENTRY_SUFFIX = ".stage"
+
+logger = logging.getLogger(__name__)
+
+
+class StageCache:
+    """
+    Size-bounded on-disk cache for simulation stage outputs.
+
+    Reading an entry refreshes its modification time, which is used as the
+    recency order for eviction.
+    """
+
+    def __init__(self, directory: Union[str, Path], max_bytes: int = 256 * 2**20):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, stage: str, seed_path: str, seed: int, params: Dict[str, Any]) -> str:
+        """
+        Compute the content address for a stage invocation.
+
+        Args:
+            stage: Stage name (e.g., "districts")
+            seed_path: Seed path the stage draws from
+            seed: Seed derived for ``seed_path``
+            params: Every other input that affects the stage output; must be
+                JSON-serializable
+
+        Returns:
+            Hex digest identifying the entry
+        """
+        payload = json.dumps(
+            [CACHE_VERSION, stage, seed_path, seed, params],
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a cached value, or ``default`` if there is no usable entry."""
+        path = self._entry_path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            self.misses += 1
+            return default
+
+        try:
+            value = pickle.loads(zlib.decompress(data))
+        except Exception:
+            # Truncated or stale entries can fail in many ways (AttributeError
+            # or ImportError for renamed classes, ValueError, ...); a broken
+            # entry is only ever a miss
+            logger.warning(
+                "Ignoring unreadable stage cache entry %s", path, exc_info=True
+            )
+            self.misses += 1
+            return default
+
+        os.utime(path)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a value and evict old entries if the cache is over its limit."""
+        data = zlib.compress(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+        # Write to a temporary file first so readers never see partial data
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._entry_path(key))
+
+        self._evict()
+
+    def clear(self) -> None:
+        """Delete every entry."""
+        for entry in self.directory.glob(f"*{ENTRY_SUFFIX}"):
+            entry.unlink()
+
+    def size_bytes(self) -> int:
+        """Get the total size of all entries."""
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the cache size and hit/miss/eviction counters."""
+        entries = list(self._entries())
+        return {
+            "entries": len(entries),
+            "bytes": sum(entry.stat().st_size for entry in entries),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / f"{key}{ENTRY_SUFFIX}"
+
+    def _entries(self) -> Iterator["os.DirEntry[str]"]:
+        return (
+            entry
+            for entry in os.scandir(self.directory)
+            if entry.name.endswith(ENTRY_SUFFIX)
+        )
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until under the size limit."""
+        entries = [(entry.stat(), entry.path) for entry in self._entries()]
+        total = sum(stat.st_size for stat, _ in entries)
+        if total <= self.max_bytes:
+            return
+
+        for stat, path in sorted(entries, key=lambda item: item[0].st_mtime_ns):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                continue
+            total -= stat.st_size
+            self.evictions += 1
@@ -0,0 +1,416 @@
+"""
+Travel Demand for Simulated Cities
+
+This module estimates zone-to-zone commuter flows with a doubly constrained
+gravity model. Each zone produces commuters in proportion to its population
+and the city's workforce share, and attracts them in proportion to its jobs,
+estimated from its area and zone type. The flow between two zones is
+
+    T[i, j] = r[i] * c[j] * exp(-beta * cost[i, j])
+
+where cost is the straight-line or road distance in km, and the balancing
+factors r and c are fitted by iterative proportional fitting so every row sums
+to the zone's productions and every column to its attractions.
+
+The dense mode fits a full NumPy matrix. For cities with many zones, the top-k
+mode only keeps each origin's k nearest destinations, found with a
+SpatialIndex, and stores flows in compressed sparse row form:
+``indices[indptr[i]:indptr[i + 1]]`` are the destinations of origin ``i`` and
+``flows`` the matching flows.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .spatial_index import SpatialIndex
+
+COST_MODES = ("euclidean", "network")
+
+# Jobs per km² of each zone type, relative to commercial zones
+JOB_WEIGHTS = {
+    "commercial": 1.0,
+    "industrial": 0.8,
+    "service": 0.6,
+    "mixed": 0.5,
+    "residential": 0.05,
+    "park": 0.0,
+}
+
+# Distance decay per km
+DEFAULT_BETA = 0.3
+
+# Road distance relative to straight-line distance for pairs no road connects
+DETOUR_FACTOR = 1.3
+
+
+@dataclass
+class ODMatrix:
+    """Commuter flows between zones, in compressed sparse row form."""
+
+    zone_ids: List[str]
+    productions: np.ndarray
+    attractions: np.ndarray
+    indptr: np.ndarray
+    indices: np.ndarray
+    flows: np.ndarray
+    iterations: int
+    converged: bool
+
+    def to_dense(self) -> np.ndarray:
+        """Get the flows as a zones x zones matrix."""
+        n = len(self.zone_ids)
+        matrix = np.zeros((n, n))
+        rows = np.repeat(np.arange(n), np.diff(self.indptr))
+        matrix[rows, self.indices] = self.flows
+        return matrix
+
+    def row_sums(self) -> np.ndarray:
+        """Get the total flow leaving every zone."""
+        n = len(self.zone_ids)
+        origins = np.repeat(np.arange(n), np.diff(self.indptr))
+        return np.bincount(origins, self.flows, minlength=n)
+
+    def column_sums(self) -> np.ndarray:
+        """Get the total flow entering every zone."""
+        return np.bincount(self.indices, self.flows, minlength=len(self.zone_ids))
+
+    def top_flows(self, count: int = 10) -> List[Tuple[str, str, float]]:
+        """
+        Get the largest flows.
+
+        Args:
+            count: Number of flows to return
+
+        Returns:
+            List of (origin zone id, destination zone id, flow), largest first
+        """
+        count = min(count, len(self.flows))
+        candidates = np.arange(0)
+        if count:
+            candidates = np.argpartition(-self.flows, count - 1)[:count]
+        largest = sorted(candidates, key=lambda i: (-self.flows[i], i))
+        origins = np.searchsorted(self.indptr, largest, side="right") - 1
+        return [
+            (
+                self.zone_ids[origin],
+                self.zone_ids[self.indices[i]],
+                float(self.flows[i]),
+            )
+            for origin, i in zip(origins, largest)
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the matrix as a JSON-serializable dict."""
+        return {
+            "zone_ids": self.zone_ids,
+            "productions": self.productions.tolist(),
+            "attractions": self.attractions.tolist(),
+            "indptr": self.indptr.tolist(),
+            "indices": self.indices.tolist(),
+            "flows": self.flows.tolist(),
+            "iterations": self.iterations,
+            "converged": self.converged,
+        }
+
+
+def zone_productions(zones: Any, workforce_rate: float) -> np.ndarray:
+    """
+    Estimate the commuters living in every zone.
+
+    Args:
+        zones: Zones of a CityLayout or ColumnarLayout
+        workforce_rate: Share of the population of working age
+
+    Returns:
+        Commuters per zone
+    """
+    return np.asarray(_field(zones, "population"), dtype=np.float64) * workforce_rate
+
+
+def zone_attractions(
+    zones: Any, total: float, job_weights: Optional[Dict[str, float]] = None
+) -> np.ndarray:
+    """
+    Distribute jobs over zones by area and zone type.
+
+    Args:
+        zones: Zones of a CityLayout or ColumnarLayout
+        total: Total jobs, normally the total productions
+        job_weights: Zone type to relative jobs per km² (defaults to
+            JOB_WEIGHTS; unknown types get none)
+
+    Returns:
+        Jobs per zone, summing to total
+    """
+    weights = dict(JOB_WEIGHTS, **(job_weights or {}))
+    # Weigh each distinct zone type once rather than looking up every zone
+    types, codes = np.unique(
+        np.asarray(_field(zones, "zone_type"), dtype=str), return_inverse=True
+    )
+    type_weights = np.array([weights.get(t, 0.0) for t in types.tolist()])
+    area = np.asarray(_field(zones, "area"), dtype=np.float64)
+    capacity = type_weights[codes.reshape(-1)] * area
+    if capacity.sum() <= 0:
+        capacity = np.ones(len(capacity))
+    return np.asarray(total * capacity / capacity.sum())
+
+
+def gravity_model(
+    zones: Any,
+    workforce_rate: float,
+    job_weights: Optional[Dict[str, float]] = None,
+    costs: str = "euclidean",
+    network: Any = None,
+    hierarchy: Any = None,
+    beta: float = DEFAULT_BETA,
+    top_k: Optional[int] = None,
+    max_iterations: int = 100,
+    tolerance: float = 1e-6,
+) -> ODMatrix:
+    """
+    Estimate commuter flows between zones with a doubly constrained gravity model.
+
+    Args:
+        zones: Zones of a CityLayout or ColumnarLayout
+        workforce_rate: Share of the population of working age
+        job_weights: Zone type to relative jobs per km²
+        costs: "euclidean" for straight-line distances between zone centres,
+            or "network" for road distances over ``network``
+        network: RoadNetwork of the city, for network costs
+        hierarchy: ContractionHierarchy of ``network`` by length. Network
+            costs are then found with one batched many-to-many query instead
+            of a Dijkstra search per origin, which pays off once the
+            hierarchy is reused
+        beta: Distance decay per km
+        top_k: Keep only each origin's k nearest destinations; None fits the
+            dense matrix. Zones without jobs are never destinations, so they
+            do not take up an origin's k. Zones outside every origin's top k
+            attract nobody, and the other attractions are scaled up to match.
+        max_iterations: Balancing iterations at most
+        tolerance: Largest row sum error accepted, relative to the largest
+            production; column sums match exactly after every iteration
+
+    Returns:
+        Flows between zones
+    """
+    if costs not in COST_MODES:
+        raise ValueError(f"Unknown costs {costs!r}, expected one of {COST_MODES}")
+    if costs == "network" and network is None:
+        raise ValueError("Network costs require a road network")
+    if hierarchy is not None and hierarchy.weight != "length":
+        raise ValueError("Network costs require a hierarchy by length")
+
+    ids = list(_field(zones, "id"))
+    x, y = (np.asarray(_field(zones, name), dtype=np.float64) for name in "xy")
+    width = np.asarray(_field(zones, "width"), dtype=np.float64)
+    height = np.asarray(_field(zones, "height"), dtype=np.float64)
+    cx, cy = x + width / 2, y + height / 2
+    n = len(ids)
+
+    productions = zone_productions(zones, workforce_rate)
+    attractions = zone_attractions(zones, productions.sum(), job_weights)
+
+    # Candidate destinations of every origin, in CSR form
+    if top_k is None or top_k >= n:
+        indptr = np.arange(n + 1, dtype=np.int64) * n
+        indices = np.tile(np.arange(n, dtype=np.int64), n)
+    else:
+        indptr, indices = _nearest_pairs(
+            cx, cy, top_k, productions > 0, attractions > 0
+        )
+    origins = np.repeat(np.arange(n), np.diff(indptr))
+
+    distance = np.hypot(cx[origins] - cx[indices], cy[origins] - cy[indices])
+    if costs == "network":
+        distance = _network_distances(
+            network, hierarchy, cx, cy, origins, indices, distance
+        )
+    # Trips within a zone travel about half its size
+    intrazonal = origins == indices
+    distance[intrazonal] = np.sqrt(width * height)[origins[intrazonal]] / 2
+    deterrence = np.exp(-beta * distance)
+
+    if top_k is None or top_k >= n:
+        flows, iterations, converged = _balance_dense(
+            deterrence.reshape(n, n),
+            productions,
+            attractions,
+            max_iterations,
+            tolerance,
+        )
+        flows = flows.reshape(-1)
+    else:
+        flows, iterations, converged = _balance_sparse(
+            origins,
+            indices,
+            deterrence,
+            productions,
+            attractions,
+            max_iterations,
+            tolerance,
+        )
+
+    return ODMatrix(
+        ids, productions, attractions, indptr, indices, flows, iterations, converged
+    )
+
+
+def _nearest_pairs(
+    cx: np.ndarray,
+    cy: np.ndarray,
+    k: int,
+    producing: np.ndarray,
+    attracting: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pair every producing zone with its k nearest attracting zones, and every
+    attracting zone with its k nearest producing zones.
+
+    Only zones with jobs are destinations: an origin whose k nearest zones
+    were all parks would have no flows to meet its productions with. Keeping
+    each destination's k nearest origins as well lets every zone attract
+    commuters from its surroundings, which the balancing needs to meet both
+    productions and attractions.
+    """
+    n = len(cx)
+    sources, targets = np.flatnonzero(producing), np.flatnonzero(attracting)
+    outbound = _nearest_of(cx, cy, sources, targets, k)
+    inbound = _nearest_of(cx, cy, targets, sources, k)
+    codes = np.concatenate([outbound[0] * n + outbound[1], inbound[1] * n + inbound[0]])
+    codes.sort()
+    codes = codes[np.concatenate([[True], codes[1:] != codes[:-1]])]
+    origins, indices = np.divmod(codes, n)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(origins, minlength=n), out=indptr[1:])
+    return indptr, indices
+
+
+def _nearest_of(
+    cx: np.ndarray, cy: np.ndarray, queries: np.ndarray, candidates: np.ndarray, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Pair every query zone with its k nearest candidate zones: (queries, found)."""
+    if len(queries) == 0 or len(candidates) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    zeros = np.zeros(len(candidates))
+    nearest = SpatialIndex(cx[candidates], cy[candidates], zeros, zeros).nearest_batch(
+        cx[queries], cy[queries], k
+    )
+    # Rows are padded with -1 when there are fewer than k candidates
+    found = nearest >= 0
+    return np.repeat(queries, k)[found.reshape(-1)], candidates[nearest[found]]
+
+
+def _balance_dense(
+    deterrence: np.ndarray,
+    productions: np.ndarray,
+    attractions: np.ndarray,
+    max_iterations: int,
+    tolerance: float,
+) -> Tuple[np.ndarray, int, bool]:
+    """Fit row and column factors of a dense matrix: (flows, iterations, converged)."""
+    row = np.ones(len(productions))
+    column = np.ones(len(attractions))
+    for iteration in range(1, max_iterations + 1):
+        row = _ratio(productions, deterrence @ column)
+        column = _ratio(attractions, deterrence.T @ row)
+        # Columns match exactly after their update; rows are checked
+        if _relative_error(row * (deterrence @ column), productions) <= tolerance:
+            return row[:, None] * deterrence * column, iteration, True
+    return row[:, None] * deterrence * column, max_iterations, False
+
+
+def _balance_sparse(
+    origins: np.ndarray,
+    destinations: np.ndarray,
+    deterrence: np.ndarray,
+    productions: np.ndarray,
+    attractions: np.ndarray,
+    max_iterations: int,
+    tolerance: float,
+) -> Tuple[np.ndarray, int, bool]:
+    """Fit row and column factors of sparse pairs: (flows, iterations, converged)."""
+    n = len(productions)
+    row = np.ones(n)
+    column = np.ones(n)
+
+    # Zones no origin reaches cannot attract anyone
+    reached = np.bincount(destinations, minlength=n) > 0
+    attractions = np.where(reached, attractions, 0.0)
+    attractions *= productions.sum() / max(attractions.sum(), 1e-300)
+
+    for iteration in range(1, max_iterations + 1):
+        row_totals = np.bincount(
+            origins, deterrence * column[destinations], minlength=n
+        )
+        row = _ratio(productions, row_totals)
+        column_totals = np.bincount(
+            destinations, deterrence * row[origins], minlength=n
+        )
+        column = _ratio(attractions, column_totals)
+        flows = row[origins] * deterrence * column[destinations]
+        if (
+            _relative_error(np.bincount(origins, flows, minlength=n), productions)
+            <= tolerance
+        ):
+            return flows, iteration, True
+    return row[origins] * deterrence * column[destinations], max_iterations, False
+
+
+def _network_distances(
+    network: Any,
+    hierarchy: Any,
+    cx: np.ndarray,
+    cy: np.ndarray,
+    origins: np.ndarray,
+    destinations: np.ndarray,
+    straight: np.ndarray,
+) -> np.ndarray:
+    """Road distances between zone centres, via their nearest road nodes."""
+    if network.node_count == 0:
+        return straight * DETOUR_FACTOR
+
+    nodes = network.nearest_nodes(cx, cy)
+    access = np.hypot(network.node_x[nodes] - cx, network.node_y[nodes] - cy)
+
+    if hierarchy is not None:
+        road = hierarchy.pair_costs(nodes[origins], nodes[destinations])
+    else:
+        road = np.empty(len(origins))
+        # One Dijkstra search per road node some origin starts from
+        pair_order = np.argsort(nodes[origins], kind="stable")
+        start_nodes, starts = np.unique(nodes[origins][pair_order], return_index=True)
+        bounds = list(starts) + [len(pair_order)]
+        for k, node in enumerate(start_nodes):
+            pairs = pair_order[bounds[k] : bounds[k + 1]]
+            road[pairs] = network.distances(int(node), "length")[
+                nodes[destinations[pairs]]
+            ]
+    distance = access[origins] + road + access[destinations]
+
+    # Pairs the roads do not connect are costed as a detour
+    unconnected = ~np.isfinite(distance)
+    distance[unconnected] = straight[unconnected] * DETOUR_FACTOR
+    return np.asarray(distance)
+
+
+def _ratio(target: np.ndarray, total: np.ndarray) -> np.ndarray:
+    """Divide target by total, with 0 where total is 0."""
+    return np.asarray(
+        np.divide(target, total, out=np.zeros_like(target), where=total > 0)
+    )
+
+
+def _relative_error(actual: np.ndarray, target: np.ndarray) -> float:
+    """Largest deviation relative to the largest target."""
+    scale = max(float(np.abs(target).max(initial=0.0)), 1e-300)
+    return float(np.abs(actual - target).max(initial=0.0)) / scale
+
+
+def _field(zones: Any, name: str) -> List[Any]:
+    """Get a field of every zone, from a list of Zones or a ColumnarTable."""
+    if hasattr(zones, "values"):
+        values: List[Any] = zones.values(name)
+        return values
+    return [getattr(zone, name) for zone in zones]
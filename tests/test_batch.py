@@ -0,0 +1,85 @@
+"""
+Tests for Metro batch simulation.
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from metro import batch
+from metro.batch import parameter_grid, run_batch
+from metro.city_simulator import CitySimulator
+
+
+def read_lines(path):
+    """Helper method to read a JSON lines file keyed by job index."""
+    with open(path) as f:
+        return {line["index"]: line for line in map(json.loads, f)}
+
+
+class TestBatch:
+    """Test cases for batch simulation."""
+
+    def test_parameter_grid(self):
+        """Test the grid holds every combination of parameters."""
+        jobs = parameter_grid([1, 2], [1000, 5000], [None, 8.0])
+
+        assert len(jobs) == 8
+        assert jobs[0] == {"seed": 1, "population": 1000, "city_size": None}
+        assert jobs[-1] == {"seed": 2, "population": 5000, "city_size": 8.0}
+
+    def test_results_match_single_runs(self, tmp_path):
+        """Test serial and pooled batches write the same cities as single runs."""
+        jobs = parameter_grid([3, 4], [20000, 120000])
+        serial = run_batch(jobs, tmp_path / "serial.jsonl")
+        pooled = run_batch(jobs, tmp_path / "pooled.jsonl", workers=2)
+
+        assert (serial.cities, serial.failed) == (4, 0)
+        assert pooled.cities_per_second > 0
+        lines = read_lines(tmp_path / "serial.jsonl")
+        assert lines == read_lines(tmp_path / "pooled.jsonl")
+
+        simulator = CitySimulator({"seed": 4, "population": 120000})
+        simulator.simulate_city(120000)
+        assert lines[3]["job"] == jobs[3]
+        assert lines[3]["city"] == json.loads(json.dumps(simulator.export_city_data()))
+
+    def test_failures_and_metadata_only(self, tmp_path):
+        """Test failed jobs are recorded and metadata-only output is small."""
+        jobs = [{"seed": 1, "population": 1000}, {"seed": 1, "population": -5}]
+        seen = []
+        summary = run_batch(
+            jobs, tmp_path / "out.jsonl", include_layout=False, on_result=seen.append
+        )
+
+        assert (summary.cities, summary.failed) == (1, 1)
+        lines = read_lines(tmp_path / "out.jsonl")
+        assert list(lines[0]["city"]) == ["metadata"]
+        assert "error" in lines[1]
+        assert [line["index"] for line in seen] == [0, 1]
+
+    def test_pool_window(self, tmp_path, monkeypatch):
+        """Test pooled batches keep a bounded number of jobs in flight."""
+        in_flight = []
+
+        class CountingExecutor(ThreadPoolExecutor):
+            """Thread pool recording how many jobs are unfinished on submit."""
+
+            def submit(self, fn, *args, **kwargs):
+                future = super().submit(fn, *args, **kwargs)
+                self.futures = getattr(self, "futures", []) + [future]
+                in_flight.append(sum(not f.done() for f in self.futures))
+                return future
+
+        monkeypatch.setattr(batch, "ProcessPoolExecutor", CountingExecutor)
+        jobs = parameter_grid(range(10), [1000])
+        summary = run_batch(
+            jobs, tmp_path / "out.jsonl", workers=2, config={"rng_mode": "keyed"}
+        )
+
+        assert summary.cities == 10
+        assert len(in_flight) == 10
+        assert max(in_flight) <= batch.JOBS_IN_FLIGHT_PER_WORKER * 2
+        run_batch(jobs, tmp_path / "serial.jsonl", config={"rng_mode": "keyed"})
+        assert read_lines(tmp_path / "out.jsonl") == read_lines(
+            tmp_path / "serial.jsonl"
+        )
@@ -0,0 +1,43 @@
+"""
+Tests for the Metro benchmark suite.
+"""
+
+from benchmarks.suite import TIERS, compare, run_case
+from metro.seed_system import CitySeedManager
+
+
+class TestBenchmarkSuite:
+    """Test cases for the benchmark suite helpers."""
+
+    def test_tiers_match_seed_tiers(self):
+        """Test every benchmark tier is the population tier it is named after."""
+        manager = CitySeedManager(0)
+        for tier, population in TIERS.items():
+            assert manager._get_population_tier(population) == tier
+
+    def test_run_case(self):
+        """Test a case reports time, peak RSS and output size."""
+        result = run_case("population_model", "small", repeat=2)
+
+        assert result["population"] == 1000
+        assert 0 < result["time"] <= result["median_time"]
+        assert result["peak_rss"] > 0
+        assert result["output_bytes"] > 0
+
+    def test_compare(self):
+        """Test regressions are reported past relative and absolute limits."""
+        baseline = {
+            "a/small": {"time": 1.0, "peak_rss": 100},
+            "b/small": {"time": 0.001, "peak_rss": 100},
+        }
+        results = {
+            "a/small": {"time": 1.3, "peak_rss": 110},
+            "b/small": {"time": 0.002, "peak_rss": 100},
+            "c/small": {"time": 9.0, "peak_rss": 100},
+        }
+        thresholds = {"time": 0.25, "peak_rss": 0.25}
+
+        assert compare(results, baseline, thresholds, {"time": 0.005}) == [
+            ("a/small", "time", 1.0, 1.3)
+        ]
+        assert len(compare(results, baseline, thresholds)) == 2
@@ -0,0 +1,95 @@
+"""
+Tests for Metro binary export format.
+"""
+
+import json
+from dataclasses import asdict
+
+import numpy as np
+import pytest
+
+from metro import binary_format
+from metro.binary_format import (
+    decode_city_layout,
+    decode_tables,
+    decode_temporal_data,
+    encode_tables,
+    encode_temporal_data,
+    records_table,
+    table_records,
+)
+from metro.city_simulator import CitySimulator
+from metro.temporal_simulator import TemporalCitySimulator
+
+
+@pytest.fixture(scope="module")
+def simulator():
+    """A simulated 600k city."""
+    simulator = CitySimulator({"seed": 42})
+    simulator.simulate_city(600000, 10.0)
+    return simulator
+
+
+class TestBinaryFormat:
+    """Test cases for the binary export format."""
+
+    @pytest.mark.parametrize("compression", ["none", "zlib"])
+    def test_lossless_round_trip(self, simulator, compression):
+        """Test float64 output decodes to the same layout."""
+        data = simulator.export_city_binary(
+            compression=compression, float_dtype="float64"
+        )
+        layout, metadata = decode_city_layout(data)
+
+        assert asdict(layout) == asdict(simulator.city_layout)
+        assert metadata == simulator.export_city_data()["metadata"]
+
+    def test_float32_round_trip(self, simulator):
+        """Test float32 output keeps floats to single precision."""
+        layout, _ = decode_city_layout(simulator.export_city_binary())
+        original = simulator.city_layout
+
+        assert [z.seed for z in layout.zones] == [z.seed for z in original.zones]
+        assert [z.zone_type for z in layout.zones] == [
+            z.zone_type for z in original.zones
+        ]
+        np.testing.assert_allclose(
+            [z.x for z in layout.zones], [z.x for z in original.zones], rtol=1e-6
+        )
+        assert len(simulator.export_city_binary()) < len(
+            json.dumps(simulator.export_city_data()["layout"])
+        )
+
+    def test_missing_fields(self):
+        """Test records lacking fields decode without them."""
+        records = [{"a": 1, "b": "x"}, {"a": 2.5}, {"c": [1, 2], "b": "y"}]
+        data = encode_tables({"t": records_table(records)}, {"note": "hi"})
+        tables, header = decode_tables(data)
+
+        assert table_records(tables["t"]) == records
+        assert header == {"note": "hi"}
+
+    def test_invalid_data(self, simulator):
+        """Test foreign, newer and truncated files are rejected."""
+        data = simulator.export_city_binary(compression="none")
+        newer = data[:8] + (binary_format.FORMAT_VERSION + 1).to_bytes(2, "little")
+
+        for bad in [b"PK\x03\x04" + data[4:], newer + data[10:], data[:-8]]:
+            with pytest.raises(ValueError):
+                decode_city_layout(bad)
+
+    def test_zstd_optional(self, simulator, monkeypatch):
+        """Test zstd compression reports the missing optional dependency."""
+        monkeypatch.setattr(binary_format, "zstandard", None)
+        with pytest.raises(ImportError):
+            simulator.export_city_binary(compression="zstd")
+
+    def test_temporal_round_trip(self):
+        """Test temporal data decodes to its JSON export."""
+        temporal = TemporalCitySimulator({"seed": 3, "population": 100000})
+        temporal.simulate_city_evolution()
+        data = encode_temporal_data(temporal, float_dtype="float64")
+
+        assert json.loads(json.dumps(decode_temporal_data(data))) == json.loads(
+            json.dumps(temporal.export_temporal_data())
+        )
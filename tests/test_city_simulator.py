@@ -0,0 +1,111 @@
+"""
+Tests for Metro CitySimulator class.
+"""
+
+from dataclasses import asdict
+
+import pytest
+
+from metro.city_simulator import CitySimulator
+from metro.seed_system import CitySeedManager
+
+
+def simulate(population=120000, city_size=10.0, **config):
+    """Helper method to simulate a city with the given config overrides."""
+    simulator = CitySimulator(dict({"seed": 42, "population": population}, **config))
+    simulator.simulate_city(population, city_size)
+    return simulator
+
+
+class TestCitySimulator:
+    """Test cases for CitySimulator class."""
+
+    def test_reproducible(self):
+        """Test the same seed produces the same layout."""
+        first = simulate().export_city_data()["layout"]
+        again = simulate().export_city_data()["layout"]
+
+        assert first == again
+
+    def test_keyed_simulate_district(self):
+        """Test keyed districts can be regenerated without their siblings."""
+        city = simulate(600000, rng_mode="keyed")
+        layout = city.city_layout
+        simulator = CitySimulator({"seed": 42, "rng_mode": "keyed"})
+
+        for index, district in enumerate(layout.districts):
+            alone, zones = simulator.simulate_district(index, 600000, 10.0)
+            assert asdict(alone) == asdict(district)
+            assert zones == [z for z in layout.zones if z.district_id == district.id]
+
+        with pytest.raises(IndexError):
+            simulator.simulate_district(len(layout.districts), 600000, 10.0)
+
+    def test_simulate_district_requires_keyed(self):
+        """Test sequential mode cannot regenerate a single district."""
+        with pytest.raises(ValueError):
+            CitySimulator({"seed": 42}).simulate_district(0)
+
+    def test_population_shards_require_numpy_mode(self):
+        """Test sharded sampling is rejected rather than coerced in legacy mode."""
+        with pytest.raises(ValueError, match="population_shards"):
+            CitySimulator({"seed": 42, "population_shards": 4})
+
+        config = {"seed": 42, "population_shards": 4, "population_mode": "analytic"}
+        assert CitySimulator(config).config["population_shards"] == 4
+
+    @pytest.mark.parametrize(
+        "rng_mode, branches, stages",
+        [
+            ("sequential", ["infrastructure"], ["infrastructure"]),
+            # Sequential zones are drawn per district name, keyed ones per id
+            ("sequential", ["districts.north_heights"], ["zones"]),
+            ("sequential", ["districts.district_0"], []),
+            ("keyed", ["districts.north_heights"], []),
+            ("keyed", ["districts.district_0"], ["zones"]),
+            (
+                "keyed",
+                ["demographics", "roman_grid"],
+                ["infrastructure", "demographics"],
+            ),
+            (
+                "keyed",
+                ["city.districts"],
+                ["districts", "zones", "infrastructure", "demographics"],
+            ),
+        ],
+    )
+    def test_simulate_variation(self, rng_mode, branches, stages):
+        """Test a branch variation matches a full re-simulation."""
+        base = simulate(600000, rng_mode=rng_mode)
+        variant = base.simulate_variation("layout", "grid", branches)
+
+        full = CitySimulator(base.config)
+        full.seed_manager = CitySeedManager(
+            42, **variant.seed_manager.generator.settings()
+        )
+        full.simulate_city(600000, 10.0)
+
+        assert asdict(variant.city_layout) == asdict(full.city_layout)
+        assert variant.regenerated_stages == stages
+
+    @pytest.mark.parametrize("rng_mode", ["sequential", "keyed"])
+    def test_parallel_zones(self, rng_mode):
+        """Test zones generated by worker processes match serial generation."""
+        serial = simulate(1000000, rng_mode=rng_mode)
+        parallel = CitySimulator(serial.config)
+        parallel.simulate_city(1000000, 10.0, workers=2)
+
+        assert parallel.export_city_data() == serial.export_city_data()
+
+    @pytest.mark.parametrize("rng_mode", ["sequential", "keyed"])
+    def test_parallel_zones_repeated(self, rng_mode):
+        """Test repeated runs on one simulator match serial runs."""
+        serial = simulate(1000000, rng_mode=rng_mode, rng_cache_size=2)
+        parallel = CitySimulator(serial.config)
+        parallel.simulate_city(1000000, 10.0, workers=2)
+
+        for _ in range(2):
+            serial.simulate_city(1000000, 10.0)
+            parallel.simulate_city(1000000, 10.0, workers=2)
+            assert parallel.export_city_data() == serial.export_city_data()
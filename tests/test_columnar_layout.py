@@ -0,0 +1,63 @@
+"""
+Tests for Metro columnar city layouts.
+"""
+
+from dataclasses import asdict
+
+import numpy as np
+import pytest
+
+from metro.city_simulator import CitySimulator, District
+from metro.columnar_layout import ColumnarLayout, ColumnarTable
+
+
+def simulate(**config):
+    """Helper method to simulate a 600k city with the given config overrides."""
+    simulator = CitySimulator(dict({"seed": 42, "population": 600000}, **config))
+    simulator.simulate_city(600000, 10.0)
+    return simulator
+
+
+class TestColumnarLayout:
+    """Test cases for ColumnarLayout and ColumnarTable."""
+
+    def test_export_matches_dataclass_backend(self):
+        """Test both layout backends export the same city."""
+        columnar = simulate(layout_backend="columnar")
+
+        assert isinstance(columnar.city_layout, ColumnarLayout)
+        assert columnar.export_city_data() == simulate().export_city_data()
+
+    def test_views(self):
+        """Test records are handed out as dataclass instances."""
+        layout = simulate().city_layout
+        table = ColumnarTable.from_records(District, layout.districts)
+
+        assert len(table) == len(layout.districts)
+        assert table[0] == layout.districts[0]
+        assert table[-1] == layout.districts[-1]
+        assert list(table) == layout.districts
+        assert table.columns["seed"].dtype == np.uint32
+        with pytest.raises(IndexError):
+            table[len(table)]
+
+        # Views are copies
+        table[0].population = 0
+        assert table[0].population == layout.districts[0].population
+
+    def test_stats(self):
+        """Test vectorized statistics match a scan over the records."""
+        layout = simulate().city_layout
+        columnar = ColumnarLayout.from_layout(layout)
+        zones = columnar.zones
+
+        expected = {}
+        for zone in layout.zones:
+            expected[zone.zone_type] = expected.get(zone.zone_type, 0) + zone.population
+        assert zones.group_sum("population", "zone_type") == expected
+        assert zones.sum("population") == sum(expected.values())
+        assert zones.mask(zone_type="park").sum() == sum(
+            zone.zone_type == "park" for zone in layout.zones
+        )
+        assert not zones.mask(zone_type="unknown").any()
+        assert asdict(columnar.to_layout()) == asdict(layout)
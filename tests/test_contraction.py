@@ -0,0 +1,111 @@
+"""
+Tests for Metro contraction hierarchies.
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from metro.binary_format import decode_city_layout
+from metro.city_simulator import CitySimulator
+from metro.contraction import ContractionHierarchy
+from metro.road_network import RoadNetwork
+
+
+@pytest.fixture(scope="module")
+def network():
+    """A network of random roads, mostly connected."""
+    rng = np.random.default_rng(5)
+    x, y = rng.uniform(0, 20, (2, 150))
+    angle, length = rng.uniform(0, math.pi, 150), rng.uniform(1, 8, 150)
+    types = rng.choice(["arterial", "local"], 150)
+    roads = [
+        {
+            "type": str(types[i]),
+            "x1": x[i],
+            "y1": y[i],
+            "x2": x[i] + length[i] * math.cos(angle[i]),
+            "y2": y[i] + length[i] * math.sin(angle[i]),
+        }
+        for i in range(150)
+    ]
+    return RoadNetwork.from_roads(roads)
+
+
+class TestContractionHierarchy:
+    """Test cases for ContractionHierarchy class."""
+
+    @pytest.mark.parametrize("weight", ["time", "length"])
+    def test_queries_match_dijkstra(self, network, weight):
+        """Test query costs equal Dijkstra's for every pair from some sources."""
+        hierarchy = ContractionHierarchy.build(network, weight)
+        assert sorted(hierarchy.rank) == list(range(network.node_count))
+
+        for source in range(0, network.node_count, 41):
+            distances = network.distances(source, weight)
+            costs = [hierarchy.query(source, t) for t in range(network.node_count)]
+            assert costs == pytest.approx(distances.tolist())
+
+    def test_pair_costs(self, network):
+        """Test batched pair costs equal single queries, repeated nodes included."""
+        hierarchy = ContractionHierarchy.build(network, "length")
+        rng = np.random.default_rng(7)
+        sources, targets = rng.integers(0, network.node_count, (2, 500))
+        sources[:50] = targets[:50]
+
+        costs = hierarchy.pair_costs(sources, targets)
+        assert costs.tolist() == pytest.approx(
+            [hierarchy.query(int(s), int(t)) for s, t in zip(sources, targets)]
+        )
+        assert len(hierarchy.pair_costs([], [])) == 0
+
+    def test_routes(self, network):
+        """Test unpacked routes are connected paths of road network edges."""
+        hierarchy = ContractionHierarchy.build(network)
+        rng = np.random.default_rng(6)
+        for source, target in rng.integers(0, network.node_count, (200, 2)):
+            route = hierarchy.route(int(source), int(target))
+            expected = network.shortest_path(int(source), int(target))
+            if expected is None:
+                assert route is None
+                continue
+
+            assert route.travel_time == pytest.approx(expected.travel_time)
+            assert (route.nodes[0], route.nodes[-1]) == (source, target)
+            for a, b, edge in zip(route.nodes, route.nodes[1:], route.edges):
+                ends = {network.edge_source[edge], network.edge_target[edge]}
+                assert ends == {a, b}
+
+    def test_serialization(self, network):
+        """Test a decoded hierarchy answers queries like the original."""
+        hierarchy = ContractionHierarchy.build(network)
+        decoded = ContractionHierarchy.from_bytes(hierarchy.to_bytes())
+
+        assert decoded.weight == "time"
+        for source in range(0, network.node_count, 97):
+            for target in range(0, network.node_count, 13):
+                assert decoded.query(source, target) == hierarchy.query(source, target)
+
+    def test_stored_with_layout(self):
+        """Test the simulator stores its hierarchy with the binary layout."""
+        simulator = CitySimulator({"seed": 42})
+        simulator.simulate_city(1000000)
+        hierarchy = simulator.contraction_hierarchy()
+        assert simulator.contraction_hierarchy() is hierarchy
+
+        data = simulator.export_city_binary(include_routing=True)
+        layout, _ = decode_city_layout(data)
+        assert len(layout.infrastructure["roads"]) == len(
+            simulator.city_layout.infrastructure["roads"]
+        )
+        decoded = ContractionHierarchy.from_bytes(data)
+        network = simulator.road_network()
+        distances = network.distances(0)
+        for target in range(network.node_count):
+            assert decoded.query(0, target) == pytest.approx(
+                distances[target], rel=1e-6
+            )
+
+        with pytest.raises(ValueError, match="no contraction hierarchy"):
+            ContractionHierarchy.from_bytes(simulator.export_city_binary())
@@ -0,0 +1,95 @@
+"""
+Tests for Metro ensemble statistics.
+"""
+
+import random
+import statistics
+
+import numpy as np
+import pytest
+
+from metro.city_simulator import CitySimulator
+from metro.ensemble import (
+    EnsembleRunner,
+    QuantileSketch,
+    RunningStats,
+    district_count,
+    zone_count,
+)
+
+
+class TestEnsemble:
+    """Test cases for streaming statistics and ensemble runs."""
+
+    def test_running_stats(self):
+        """Test Welford statistics match batch statistics, also when merged."""
+        rng = random.Random(1)
+        values = [rng.gauss(100, 15) for _ in range(1000)]
+        whole, left, right = RunningStats(), RunningStats(), RunningStats()
+        for i, value in enumerate(values):
+            whole.add(value)
+            (left if i < 300 else right).add(value)
+        left.merge(right)
+
+        for stats in (whole, left):
+            assert stats.count == 1000
+            assert stats.mean == pytest.approx(statistics.mean(values))
+            assert stats.variance == pytest.approx(statistics.variance(values))
+            assert (stats.min, stats.max) == (min(values), max(values))
+        assert RunningStats().confidence_half_width() == float("inf")
+
+    def test_quantile_sketch(self):
+        """Test sketch quantiles are close to exact ones in bounded memory."""
+        rng = random.Random(2)
+        values = [rng.lognormvariate(0, 1) for _ in range(20000)]
+        whole, left, right = QuantileSketch(), QuantileSketch(), QuantileSketch()
+        for i, value in enumerate(values):
+            whole.add(value)
+            (left if i % 2 else right).add(value)
+        left.merge(right)
+
+        for sketch in (whole, left):
+            for q in (0.01, 0.25, 0.5, 0.75, 0.99):
+                exact = np.quantile(values, q)
+                assert sketch.quantile(q) == pytest.approx(exact, rel=0.05)
+            assert sketch.quantile(0) == min(values)
+            assert sketch.quantile(1) == max(values)
+            assert len(sketch.means) <= 100
+        assert np.isnan(QuantileSketch().quantile(0.5))
+
+    def test_ensemble_matches_single_runs(self):
+        """Test ensemble statistics equal those of the individual cities."""
+        metrics = {"district_count": district_count, "zone_count": zone_count}
+        result = EnsembleRunner(
+            20000, metrics=metrics, max_runs=10, round_size=4, seed_start=5
+        ).run()
+
+        counts = []
+        for seed in range(5, 15):
+            layout = CitySimulator({"seed": seed}).simulate_city(20000)
+            counts.append(len(layout.districts))
+        summary = result.summary()
+        assert (result.runs, result.converged) == (10, False)
+        assert summary["metrics"]["district_count"]["mean"] == pytest.approx(
+            statistics.mean(counts)
+        )
+        assert summary["metrics"]["district_count"]["min"] == min(counts)
+        assert set(summary["metrics"]["zone_count"]["quantiles"]) == {
+            "p5",
+            "p25",
+            "p50",
+            "p75",
+            "p95",
+        }
+
+    def test_early_stop_and_workers(self):
+        """Test runs stop once converged, with the same results on workers."""
+        runner = EnsembleRunner(10000, tolerance=0.2, min_runs=8, round_size=8)
+        serial = runner.run()
+        runner.workers = 2
+        pooled = runner.run()
+
+        assert serial.converged
+        assert serial.runs < runner.max_runs
+        assert serial.runs % 8 == 0
+        assert pooled.summary() == serial.summary()
@@ -0,0 +1,61 @@
+"""
+Tests for Metro stage instrumentation.
+"""
+
+import tracemalloc
+
+from metro.city_simulator import CitySimulator
+from metro.instrumentation import StageProfiler
+
+STAGES = ["population", "districts", "zones", "roman_grid", "infrastructure"]
+
+
+class TestStageProfiler:
+    """Test cases for StageProfiler and its use in CitySimulator."""
+
+    def test_nested_stages(self):
+        """Test nested stages record their parent and memory peaks."""
+        profiler = StageProfiler(trace_memory=True)
+        seen = []
+        profiler.add_hook(seen.append)
+
+        with profiler.stage("outer"):
+            with profiler.stage("inner"):
+                block = bytearray(1 << 20)
+            del block
+            small = bytearray(1 << 10)
+
+        inner, outer = profiler.timings
+        assert seen == profiler.timings
+        assert (inner.stage, inner.parent) == ("inner", "outer")
+        assert (outer.stage, outer.parent) == ("outer", None)
+        assert inner.peak_memory >= 1 << 20
+        assert outer.peak_memory >= inner.peak_memory
+        assert outer.wall_time >= inner.wall_time
+        assert not tracemalloc.is_tracing()
+        del small
+
+    def test_disabled_by_default(self):
+        """Test simulations are not instrumented unless configured."""
+        simulator = CitySimulator({"seed": 42})
+        simulator.simulate_city(100000, 10.0)
+
+        assert simulator.profiler is None
+        assert simulator.stage_timings == []
+        assert "stage_timings" not in simulator.export_city_data()["metadata"]
+
+    def test_simulator_stages(self):
+        """Test every simulation stage is timed and exported on request."""
+        simulator = CitySimulator({"seed": 42, "profile_stages": True})
+        finished = []
+        simulator.add_stage_hook(lambda timing: finished.append(timing.stage))
+        simulator.simulate_city(100000, 10.0)
+        simulator.simulate_city(100000, 10.0)
+
+        assert finished == (STAGES + ["demographics"]) * 2
+        assert [t.stage for t in simulator.stage_timings] == STAGES + ["demographics"]
+        assert all(t.peak_memory is None for t in simulator.stage_timings)
+
+        metadata = simulator.export_city_data(include_timings=True)["metadata"]
+        assert metadata["stage_timings"][0]["stage"] == "population"
+        assert metadata["stage_timings"][0]["cpu_time"] >= 0
@@ -0,0 +1,84 @@
+"""
+Tests for Metro streaming JSON encoder.
+"""
+
+import io
+import json
+from dataclasses import dataclass
+
+import numpy as np
+import pytest
+
+from metro.city_simulator import CitySimulator
+from metro.json_stream import JSONStreamEncoder, write_city_json
+
+
+@dataclass
+class Point:
+    """Small dataclass to encode."""
+
+    x: float
+    y: float
+    label: str
+
+
+class TestJSONStreamEncoder:
+    """Test cases for JSONStreamEncoder class."""
+
+    def test_matches_json_dumps(self):
+        """Test the default output equals compact json.dumps output."""
+        value = {
+            "a": [1, 2.5, None, True, "é\\n"],
+            1: {"nested": (0.1, float("inf"))},
+            "numpy": [np.int64(3), np.float32(0.5)],
+        }
+        expected = json.dumps({**value, "numpy": [3, 0.5]}, separators=(",", ":"))
+
+        assert JSONStreamEncoder().encode(value) == expected
+
+    def test_chunks(self):
+        """Test output is yielded in chunks of about chunk_size characters."""
+        value = list(range(10000))
+        chunks = list(JSONStreamEncoder(chunk_size=1000).iterencode(value))
+
+        assert len(chunks) > 10
+        assert all(len(chunk) < 1010 for chunk in chunks)
+        assert json.loads("".join(chunks)) == value
+
+    def test_decimals(self):
+        """Test fixed decimal places, globally and per field."""
+        value = {"point": Point(1.23456, 2.0, "a"), "xs": [0.5], "x": [1.0, 2.25]}
+        encoder = JSONStreamEncoder(decimals=1, field_decimals={"x": 3})
+
+        assert encoder.encode(value) == (
+            '{"point":{"x":1.235,"y":2.0,"label":"a"},"xs":[0.5],"x":[1.000,2.250]}'
+        )
+
+    def test_unsupported_type(self):
+        """Test unsupported objects raise TypeError like json.dumps."""
+        with pytest.raises(TypeError):
+            JSONStreamEncoder().encode({"a": object()})
+
+    @pytest.mark.parametrize("layout_backend", ["dataclass", "columnar"])
+    def test_city_export(self, layout_backend):
+        """Test a streamed city equals its json.dumps export."""
+        simulator = CitySimulator({"seed": 42, "layout_backend": layout_backend})
+        simulator.simulate_city(300000, 10.0)
+        fp = io.StringIO()
+        write_city_json(simulator, fp)
+
+        assert fp.getvalue() == json.dumps(
+            simulator.export_city_data(), separators=(",", ":")
+        )
+
+    def test_city_export_timings(self):
+        """Test stage timings are streamed when requested."""
+        simulator = CitySimulator({"seed": 42, "profile_stages": True})
+        simulator.simulate_city(300000, 10.0)
+        fp = io.StringIO()
+        write_city_json(simulator, fp, include_timings=True)
+
+        metadata = json.loads(fp.getvalue())["metadata"]
+        assert [t["stage"] for t in metadata["stage_timings"]] == [
+            t.stage for t in simulator.stage_timings
+        ]
@@ -0,0 +1,69 @@
+"""
+Tests for Metro occupation table.
+"""
+
+import os
+
+import pytest
+
+from metro.occupations import (
+    DENSITY_LEVELS,
+    clear_occupation_table_cache,
+    load_occupation_table,
+)
+
+
+class TestOccupationTable:
+    """Test cases for OccupationTable and its process-wide cache."""
+
+    def write_table(self, path, lines):
+        """Helper method to write an occupation data file."""
+        path.write_text("\n".join("\t".join(line) for line in lines) + "\n")
+        return path
+
+    def test_parse(self, tmp_path):
+        """Test rows, first-occurrence names and repeated zone letters."""
+        path = self.write_table(
+            tmp_path / "occupations.txt",
+            [
+                ("Legal", "10.00%", "20.00%", "CC", "LH"),
+                ("Legal", "1.00%", "1.00%", "S", "M"),
+                ("Incomplete", "1.00%", "1.00%", "R"),
+            ],
+        )
+        table = load_occupation_table(path)
+
+        assert len(table) == 2
+        assert table.zone_types == ("C", "S")
+
+        occupations = table.occupations({"m": 100, "f": 10})
+        assert occupations == {"Legal": {"m": 10.0, "f": 2.0}}
+
+        zones = table.zone_demand({"m": 100, "f": 10})
+        assert zones["C"] == {"L": 24.0, "M": 0.0, "H": 24.0}
+        assert zones["S"] == {"L": 0.0, "M": 1.1, "H": 0.0}
+        assert set(zones["C"]) == set(DENSITY_LEVELS)
+
+    def test_cache(self, tmp_path):
+        """Test tables are cached until the file's mtime changes."""
+        clear_occupation_table_cache()
+        path = self.write_table(
+            tmp_path / "occupations.txt", [("Legal", "1.00%", "1.00%", "C", "L")]
+        )
+
+        table = load_occupation_table(path)
+        assert load_occupation_table(path) is table
+
+        self.write_table(path, [("Sales", "2.00%", "2.00%", "C", "L")])
+        os.utime(path, ns=(table.mtime_ns + 10**9, table.mtime_ns + 10**9))
+
+        reloaded = load_occupation_table(path)
+        assert reloaded is not table
+        assert reloaded.names == ("Sales",)
+
+    def test_read_only(self):
+        """Test cached arrays cannot be modified in place."""
+        table = load_occupation_table()
+
+        with pytest.raises(ValueError):
+            table.male[0] = 1.0
@@ -0,0 +1,151 @@
+"""
+Tests for Metro PopulationModel class.
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from metro.population import (
+    AGE_BINS,
+    MALE_AGE_DISTRIBUTION,
+    PERSON_COLUMNS,
+    PopulationModel,
+    age_bin_probabilities,
+    sample_age_bins,
+)
+from metro.seed_system import HierarchicalSeedGenerator
+
+
+def histogram_total(model):
+    """Helper method to count everyone in a model's histogram."""
+    return sum(entry["m"] + entry["f"] for entry in model.histogram)
+
+
+class TestPopulationModel:
+    """Test cases for PopulationModel class."""
+
+    def test_legacy_mode(self):
+        """Test the default mode draws from the supplied RNG."""
+        model = PopulationModel(random.Random(42), 1000)
+        again = PopulationModel(random.Random(42), 1000)
+
+        assert model.mode == "legacy"
+        assert len(model.histogram) == AGE_BINS
+        assert histogram_total(model) == 1000
+        assert model.histogram == again.histogram
+
+    def test_vectorized_mode(self):
+        """Test vectorized sampling is exact and deterministic per seed."""
+        model = PopulationModel(random.Random(0), 1000000, mode="vectorized", seed=7)
+        again = PopulationModel(random.Random(1), 1000000, mode="vectorized", seed=7)
+        other = PopulationModel(random.Random(0), 1000000, mode="vectorized", seed=8)
+
+        assert histogram_total(model) == 1000000
+        assert model.histogram == again.histogram
+        assert model.histogram != other.histogram
+        assert model.zones.keys() == again.zones.keys()
+
+    def test_vectorized_seed_from_rng(self):
+        """Test vectorized sampling derives its seed from the RNG by default."""
+        model = PopulationModel(random.Random(3), 5000, mode="vectorized")
+        again = PopulationModel(random.Random(3), 5000, mode="vectorized")
+
+        assert model.histogram == again.histogram
+
+    def test_vectorized_matches_legacy_shape(self):
+        """Test both modes agree on the overall age distribution."""
+        legacy = PopulationModel(random.Random(5), 200000)
+        vectorized = PopulationModel(random.Random(5), 200000, mode="vectorized")
+
+        for a, b in zip(legacy.histogram, vectorized.histogram):
+            for gender in ("m", "f"):
+                assert abs(a[gender] - b[gender]) < 0.01 * 200000
+
+    def test_unknown_mode(self):
+        """Test an unknown sampling mode is rejected."""
+        with pytest.raises(ValueError):
+            PopulationModel(random.Random(0), 10, mode="bogus")
+
+    def test_analytic_mode(self):
+        """Test analytic sampling is exact and deterministic per seed."""
+        model = PopulationModel(random.Random(0), 50000000, mode="analytic", seed=7)
+        again = PopulationModel(random.Random(0), 50000000, mode="analytic", seed=7)
+
+        assert histogram_total(model) == 50000000
+        assert model.histogram == again.histogram
+
+    def test_age_bin_probabilities(self):
+        """Test exact bin probabilities match the rejection sampler."""
+        probabilities = age_bin_probabilities(*MALE_AGE_DISTRIBUTION)
+        rng = np.random.default_rng(11)
+        counts = sample_age_bins(rng, *MALE_AGE_DISTRIBUTION, 1000000)
+
+        assert probabilities.sum() == pytest.approx(1.0)
+        assert np.allclose(counts / 1000000, probabilities, atol=0.002)
+
+    def test_iter_people(self):
+        """Test streamed people match the histogram and occupation pools."""
+        model = PopulationModel(random.Random(0), 100000, mode="analytic", seed=1)
+        chunks = list(model.iter_people(HierarchicalSeedGenerator(9), 30000))
+
+        assert [len(chunk["age_bin"]) for chunk in chunks] == [30000] * 3 + [10000]
+        assert all(set(chunk) == set(PERSON_COLUMNS) for chunk in chunks)
+
+        people = {
+            name: np.concatenate([chunk[name] for chunk in chunks])
+            for name in PERSON_COLUMNS
+        }
+        males = np.bincount(people["age_bin"][people["gender"] == 0], minlength=20)
+        assert males.tolist() == [entry["m"] for entry in model.histogram]
+
+        first = model.occupation_table.occupation_rows[0]
+        workers = np.count_nonzero(people["occupation"] == first)
+        expected = model.occupations[model.occupation_table.names[first]]
+        assert abs(workers - (expected["m"] + expected["f"])) <= 2
+
+        unemployed = people["occupation"] == -1
+        assert (people["zone_type"][unemployed] == -1).all()
+        assert (people["zone_type"][~unemployed] >= 0).all()
+
+    def test_iter_people_zone_proportions(self):
+        """Test streamed zone types follow the aggregate zone demand."""
+        model = PopulationModel(random.Random(0), 200000, mode="analytic", seed=1)
+        zone_type = np.concatenate(
+            [
+                chunk["zone_type"]
+                for chunk in model.iter_people(HierarchicalSeedGenerator(9))
+            ]
+        )
+
+        zone_types = model.occupation_table.zone_types
+        counts = np.bincount(zone_type[zone_type >= 0], minlength=len(zone_types))
+        demand = np.array([sum(model.zones[z].values()) for z in zone_types])
+        assert np.allclose(counts / counts.sum(), demand / demand.sum(), atol=0.01)
+
+    def test_iter_people_deterministic(self):
+        """Test the person stream is reproducible per seed path."""
+        model = PopulationModel(random.Random(0), 5000)
+        first = next(model.iter_people(HierarchicalSeedGenerator(9), 1000))
+        again = next(model.iter_people(HierarchicalSeedGenerator(9), 1000))
+        other = next(model.iter_people(HierarchicalSeedGenerator(9), 1000, "other"))
+
+        assert all((first[name] == again[name]).all() for name in PERSON_COLUMNS)
+        assert not (first["age_bin"] == other["age_bin"]).all()
+
+    def test_from_shards(self):
+        """Test sharded sampling does not depend on the worker count."""
+        generator = HierarchicalSeedGenerator(4)
+        serial = PopulationModel.from_shards(generator, 100003, shards=4)
+        parallel = PopulationModel.from_shards(generator, 100003, shards=4, workers=2)
+
+        assert histogram_total(serial) == 100003
+        assert serial.histogram == parallel.histogram
+        assert serial.occupations == parallel.occupations
+        assert serial.zones == parallel.zones
+
+    def test_from_shards_rejects_legacy(self):
+        """Test sharded sampling needs a NumPy sampling mode."""
+        with pytest.raises(ValueError):
+            PopulationModel.from_shards(HierarchicalSeedGenerator(), mode="legacy")
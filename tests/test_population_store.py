@@ -0,0 +1,54 @@
+"""
+Tests for Metro columnar population store.
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from metro.population import PERSON_COLUMNS, PopulationModel
+from metro.population_store import HEADER_FILE, write_population_store
+from metro.seed_system import HierarchicalSeedGenerator
+
+
+class TestPopulationStore:
+    """Test cases for write_population_store and PopulationStore."""
+
+    def test_round_trip(self, tmp_path):
+        """Test a written store reopens as memory-mapped columns."""
+        model = PopulationModel(random.Random(0), 20000, mode="analytic", seed=3)
+        write_population_store(
+            tmp_path, model, HierarchicalSeedGenerator(5), "metro_test", 7000
+        )
+        expected = list(model.iter_people(HierarchicalSeedGenerator(5), 7000))
+
+        store = PopulationModel.open_people(tmp_path)
+        assert store.city_id == "metro_test"
+        assert len(store) == 20000
+
+        for name in PERSON_COLUMNS:
+            column = store.column(name)
+            assert isinstance(column, np.memmap)
+            assert not column.flags.writeable
+            assert (column == np.concatenate([c[name] for c in expected])).all()
+
+    def test_select(self, tmp_path):
+        """Test filtering by several columns."""
+        model = PopulationModel(random.Random(0), 5000)
+        write_population_store(tmp_path, model, HierarchicalSeedGenerator(1), "c")
+        store = PopulationModel.open_people(tmp_path)
+
+        rows = store.select(age_bin=[3, 4], gender=1)
+        people = store.take(rows)
+
+        assert len(rows) == sum(model.histogram[i]["f"] for i in (3, 4))
+        assert set(people["age_bin"].tolist()) <= {3, 4}
+        assert (people["gender"] == 1).all()
+
+    def test_version_check(self, tmp_path):
+        """Test stores with an unknown format version are rejected."""
+        (tmp_path / HEADER_FILE).write_text('{"format_version": 99}')
+
+        with pytest.raises(ValueError):
+            PopulationModel.open_people(tmp_path)
@@ -0,0 +1,139 @@
+"""
+Tests for Metro road network.
+"""
+
+import itertools
+import math
+
+import numpy as np
+import pytest
+
+from metro.city_simulator import CitySimulator
+from metro import road_network
+from metro.road_network import RoadNetwork, find_intersections
+
+
+def road(x1, y1, x2, y2, type="local"):
+    """Helper method to build a road dictionary."""
+    return {"type": type, "x1": x1, "y1": y1, "x2": x2, "y2": y2}
+
+
+@pytest.fixture
+def grid_roads():
+    """A 3x3 grid of crossing arterials plus a diagonal local road."""
+    roads = [road(0, y, 4, y, "arterial") for y in (1, 2, 3)]
+    roads += [road(x, 0, x, 4, "arterial") for x in (1, 2, 3)]
+    roads.append(road(0, 0, 4, 4))
+    return roads
+
+
+class TestRoadNetwork:
+    """Test cases for road intersections and shortest paths."""
+
+    def test_find_intersections(self):
+        """Test intersections match a pairwise check of every segment."""
+        rng = np.random.default_rng(4)
+        x1, y1, x2, y2 = rng.uniform(0, 10, (4, 300))
+        found = {
+            frozenset(pair)
+            for pair in itertools.combinations(range(300), 2)
+            if self._crosses(x1, y1, x2, y2, *pair)
+        }
+
+        points = find_intersections(x1, y1, x2, y2)
+        assert len(points) == 2 * len(found)
+        for segment, position, x, y in points:
+            assert x == pytest.approx(
+                x1[segment] + position * (x2[segment] - x1[segment])
+            )
+            assert y == pytest.approx(
+                y1[segment] + position * (y2[segment] - y1[segment])
+            )
+
+    def test_long_parallel_roads(self, monkeypatch):
+        """Test long roads side by side are not all paired as candidates."""
+        monkeypatch.setattr(road_network, "PAIR_BLOCK_SIZE", 1000)
+        avenues = np.arange(2000) * 0.01
+        streets = np.array([2.5, 7.5])
+        x1 = np.concatenate([np.zeros(2000), streets])
+        x2 = np.concatenate([np.full(2000, 10.0), streets])
+        y1 = np.concatenate([avenues, np.zeros(2)])
+        y2 = np.concatenate([avenues, np.full(2, 20.0)])
+
+        blocks = list(road_network._candidate_pairs(x1, y1, x2, y2))
+        assert sum(len(a) for a, _ in blocks) == 4000
+        # A sweep over x would test all 2 million avenue pairs
+        assert len(blocks) < 20
+        assert len(find_intersections(x1, y1, x2, y2)) == 8000
+
+    @staticmethod
+    def _crosses(x1, y1, x2, y2, a, b):
+        """Helper method testing two segments for a proper crossing."""
+        rx, ry = x2[a] - x1[a], y2[a] - y1[a]
+        sx, sy = x2[b] - x1[b], y2[b] - y1[b]
+        denom = rx * sy - ry * sx
+        t = ((x1[b] - x1[a]) * sy - (y1[b] - y1[a]) * sx) / denom
+        u = ((x1[b] - x1[a]) * ry - (y1[b] - y1[a]) * rx) / denom
+        return 0 <= t <= 1 and 0 <= u <= 1
+
+    def test_junctions_and_overlaps(self):
+        """Test T-junctions, shared ends and collinear overlaps split roads."""
+        network = RoadNetwork.from_roads(
+            [
+                road(0, 0, 2, 0),
+                road(1, 0, 1, 1),  # T-junction at (1, 0)
+                road(2, 0, 3, 1),  # Shares the end (2, 0)
+                road(1.5, 0, 4, 0),  # Overlaps the first road
+            ]
+        )
+
+        coordinates = set(zip(network.node_x.tolist(), network.node_y.tolist()))
+        assert coordinates == {(0, 0), (1, 0), (1, 1), (1.5, 0), (2, 0), (3, 1), (4, 0)}
+        assert network.edge_count == 7
+        assert network.edge_length.sum() == pytest.approx(2 + 1 + math.sqrt(2) + 2.5)
+
+    def test_shortest_paths(self, grid_roads):
+        """Test A* and Dijkstra agree and prefer fast roads."""
+        network = RoadNetwork.from_roads(grid_roads)
+        source = network.nearest_node(0, 0)
+        target = network.nearest_node(4, 4)
+        assert (network.node_x[target], network.node_y[target]) == (4, 4)
+
+        by_length = network.shortest_path(source, target, "length")
+        assert by_length.length == pytest.approx(4 * math.sqrt(2))
+        assert set(network.edge_road[by_length.edges]) == {6}
+
+        astar = network.shortest_path(source, target)
+        dijkstra = network.shortest_path(source, target, method="dijkstra")
+        assert astar.travel_time == pytest.approx(dijkstra.travel_time)
+        assert astar.travel_time == pytest.approx(network.distances(source)[target])
+        # Arterials at 50 km/h beat the 30 km/h diagonal
+        assert astar.travel_time < by_length.travel_time
+        assert astar.nodes[0] == source and astar.nodes[-1] == target
+        for node, edge in zip(astar.nodes, astar.edges):
+            assert node in (network.edge_source[edge], network.edge_target[edge])
+
+        unreachable = RoadNetwork.from_roads([road(0, 0, 1, 0), road(5, 5, 6, 5)])
+        assert unreachable.shortest_path(0, 3) is None
+        assert unreachable.travel_time(0, 0, 6, 5) == math.inf
+
+    def test_simulated_city(self):
+        """Test the simulator's cached network matches its layout's roads."""
+        simulator = CitySimulator({"seed": 42})
+        simulator.simulate_city(1000000)
+        network = simulator.road_network()
+        assert simulator.road_network() is network
+
+        roads = simulator.city_layout.infrastructure["roads"]
+        lengths = np.bincount(
+            network.edge_road, network.edge_length, minlength=len(roads)
+        )
+        expected = [math.hypot(r["x2"] - r["x1"], r["y2"] - r["y1"]) for r in roads]
+        assert lengths == pytest.approx(expected)
+        offsets = network.offsets
+        assert offsets[-1] == 2 * network.edge_count
+
+        distances = network.distances(0)
+        for target in np.flatnonzero(np.isfinite(distances))[:20]:
+            route = network.shortest_path(0, int(target))
+            assert route.travel_time == pytest.approx(distances[target])
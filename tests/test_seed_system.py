@@ -0,0 +1,360 @@
+"""
+Tests for Metro hierarchical seed system.
+"""
+
+import hashlib
+
+import numpy as np
+import pytest
+
+from metro.seed_system import (
+    CitySeedManager,
+    CounterRNG,
+    HierarchicalSeedGenerator,
+    LRUCache,
+    SeedTree,
+    create_city_seed_manager,
+)
+
+
+def legacy_seed(master_seed, path):
+    """Helper method computing a seed the way the original MD5 scheme did."""
+    digest = hashlib.md5(f"{master_seed}:{path}".encode()).digest()
+    return int.from_bytes(digest[:8], byteorder="big") % (2**32)
+
+
+class TestHierarchicalSeedGenerator:
+    """Test cases for HierarchicalSeedGenerator class."""
+
+    @pytest.mark.parametrize(
+        "path", ["", "districts", "districts.north.zones.residential", "a..b", ".a."]
+    )
+    def test_md5_matches_legacy(self, path):
+        """Test MD5 seeds match the legacy derivation."""
+        generator = HierarchicalSeedGenerator(2944957927)
+        generator.get_seed("districts.north")
+
+        assert generator.get_seed(path) == legacy_seed(2944957927, path)
+
+    def test_derivation_version(self):
+        """Test seed derivation schemes are selected by version."""
+        digest = hashlib.blake2b(b"7:districts.north", digest_size=8).digest()
+        blake2b = HierarchicalSeedGenerator(7, derivation_version=2)
+
+        assert HierarchicalSeedGenerator(7).derivation_version == 1
+        assert blake2b.get_seed("districts.north") == int.from_bytes(
+            digest, byteorder="big"
+        ) % (2**32)
+        with pytest.raises(ValueError, match="derivation version"):
+            HierarchicalSeedGenerator(7, derivation_version=0)
+
+    def test_set_master_seed(self):
+        """Test changing the master seed drops cached seeds."""
+        generator = HierarchicalSeedGenerator(1)
+        generator.get_seed("districts.north")
+        generator.set_master_seed(2)
+
+        assert generator.get_seed("districts.north") == legacy_seed(
+            2, "districts.north"
+        )
+
+    def test_rng_replay_after_eviction(self):
+        """Test evicted RNGs continue their stream under the replay policy."""
+        unbounded = HierarchicalSeedGenerator(3)
+        bounded = HierarchicalSeedGenerator(3, rng_cache_size=1)
+
+        for path in ["a", "b", "a", "b", "a"]:
+            expected = unbounded.get_rng(path)
+            actual = bounded.get_rng(path)
+            assert [actual.random(), actual.gauss(0, 1), actual.randint(0, 9)] == [
+                expected.random(),
+                expected.gauss(0, 1),
+                expected.randint(0, 9),
+            ]
+
+        stats = bounded.get_city_metadata()["cache_stats"]["rngs"]
+        assert stats["size"] == 1
+        assert stats["evictions"] == 4
+
+    def test_rng_fresh_after_eviction(self):
+        """Test evicted RNGs restart from their seed under the fresh policy."""
+        generator = HierarchicalSeedGenerator(
+            3, rng_cache_size=1, rng_eviction_policy="fresh"
+        )
+        first = generator.get_rng("a").random()
+        generator.get_rng("b")
+
+        assert generator.get_rng("a").random() == first
+
+    def test_rng_states(self):
+        """Test every replayable stream is reported, evicted ones included."""
+        generator = HierarchicalSeedGenerator(3, rng_cache_size=1)
+        generator.get_rng("a").random()
+        generator.get_rng("b")
+
+        states = generator.rng_states()
+        assert set(states) == {"a", "b"}
+        assert states["a"][1] == 2
+        assert generator.get_city_metadata()["cache_stats"]["rngs"]["hits"] == 0
+
+    def test_bounded_seed_cache(self):
+        """Test evicted seeds are recomputed identically."""
+        generator = HierarchicalSeedGenerator(3, seed_cache_size=2)
+        seeds = [generator.get_seed(f"districts.d{i}.zones") for i in range(5)]
+
+        assert len(generator._seed_cache) == 2
+        assert seeds == [generator.get_seed(f"districts.d{i}.zones") for i in range(5)]
+
+    def test_bounded_replay_state(self):
+        """Test replay state of evicted RNGs stays within the seed cache bound."""
+        generator = HierarchicalSeedGenerator(3, seed_cache_size=8, rng_cache_size=2)
+        for i in range(100):
+            generator.get_rng(f"zones.z{i}").random()
+            generator.get_numpy_rng(f"zones.z{i}").random()
+
+        assert len(generator._seed_cache) <= 8
+        assert len(generator._rng_cache) <= 2
+        assert len(generator._numpy_rng_cache) <= 2
+        assert len(generator._rng_offsets) <= 8
+        assert len(generator._numpy_rng_states) <= 8
+
+        # The most recent evicted streams still continue where they stopped
+        expected = HierarchicalSeedGenerator(3).get_rng("zones.z97")
+        expected.random()
+        assert generator.get_rng("zones.z97").random() == expected.random()
+
+    def test_numpy_rng(self):
+        """Test NumPy generators are keyed by path and bit generator."""
+        generator = HierarchicalSeedGenerator(3)
+        rng = generator.get_numpy_rng("districts")
+        first = rng.random(4)
+
+        assert generator.get_numpy_rng("districts") is rng
+        assert (
+            HierarchicalSeedGenerator(3).get_numpy_rng("districts").random(4) == first
+        ).all()
+        assert not (
+            HierarchicalSeedGenerator(3).get_numpy_rng("zones").random(4) == first
+        ).all()
+        assert isinstance(
+            generator.get_numpy_rng("districts", "philox").bit_generator,
+            np.random.Philox,
+        )
+
+        with pytest.raises(ValueError):
+            generator.get_numpy_rng("districts", "mt19937")
+
+    def test_numpy_rng_replay_after_eviction(self):
+        """Test evicted NumPy generators resume from their saved state."""
+        generator = HierarchicalSeedGenerator(3, rng_cache_size=1)
+        expected = HierarchicalSeedGenerator(3).get_numpy_rng("a").random(6)
+
+        first = generator.get_numpy_rng("a").random(3)
+        generator.get_numpy_rng("b")
+        rest = generator.get_numpy_rng("a").random(3)
+
+        assert (np.concatenate([first, rest]) == expected).all()
+
+    def test_spawn_numpy_rngs(self):
+        """Test spawned children are independent and individually rebuildable."""
+        generator = HierarchicalSeedGenerator(3)
+        children = generator.spawn_numpy_rngs("workers", 3)
+        draws = [child.random() for child in children]
+
+        assert len(set(draws)) == 3
+        assert generator.spawn_numpy_rngs("workers", 1, start=2)[0].random() == draws[2]
+
+
+class TestCounterRNG:
+    """Test cases for CounterRNG and KeyedRandom classes."""
+
+    def test_random_access(self):
+        """Test draws depend only on the key, entity and draw index."""
+        rng = CounterRNG(HierarchicalSeedGenerator(3).get_seed("zones"))
+        stream = rng.stream(37)
+        values = [stream.random() for _ in range(5)]
+
+        assert values[3] == rng.random(37, 3)
+        assert rng.stream(37).random() == values[0]
+        assert rng.random(36, 0) != values[0]
+        assert all(0.0 <= value < 1.0 for value in values)
+
+    def test_vectorized(self):
+        """Test array indices give the same values as scalar indices."""
+        rng = CounterRNG(2**63 + 5)
+        entities = np.arange(100, dtype=np.uint64)
+        draws = np.full(100, 7, dtype=np.uint64)
+
+        expected = [rng.random(int(entity), 7) for entity in entities]
+        assert rng.random(entities, draws).tolist() == expected
+
+    def test_stream_methods(self):
+        """Test random.Random helpers work on keyed streams."""
+        generator = HierarchicalSeedGenerator(3)
+        first = generator.get_counter_rng("districts").stream(2)
+        again = generator.get_counter_rng("districts").stream(2)
+
+        assert [first.uniform(1, 2), first.choice("abc"), first.randint(0, 10**30)] == [
+            again.uniform(1, 2),
+            again.choice("abc"),
+            again.randint(0, 10**30),
+        ]
+
+
+class TestSeedTree:
+    """Test cases for SeedTree class."""
+
+    def build_tree(self):
+        """Helper method to build a small tree."""
+        tree = SeedTree()
+        tree.insert("districts.north.zones.residential", 4)
+        tree.insert("districts", 1)
+        tree.insert("districts.south", 2)
+        tree.insert("population.tier_small", 3)
+        return tree
+
+    def test_paths(self):
+        """Test derived paths are recorded once and prefixes have no seed."""
+        tree = self.build_tree()
+
+        assert len(tree) == 4
+        assert tree.get("districts.south") == 2
+        assert tree.get("districts.north") is None
+        assert tree.get("missing") is None
+        assert dict(tree.paths("districts")) == {
+            "districts": 1,
+            "districts.north.zones.residential": 4,
+            "districts.south": 2,
+        }
+
+    def test_export_depth(self):
+        """Test subtree export with a depth limit."""
+        exported = self.build_tree().export("districts", max_depth=1)
+
+        assert exported["segments"] == ["north", "south"]
+        assert exported["parent"] == [-1, 0, 0]
+        assert exported["segment"] == [-1, 0, 1]
+        assert exported["seed"] == [1, None, 2]
+        assert "seed" not in self.build_tree().export(include_seeds=False)
+
+    def test_diff(self):
+        """Test diffing two trees."""
+        other = self.build_tree()
+        other.insert("districts.south", 5)
+        other.insert("infrastructure", 6)
+        diff = self.build_tree().diff(other)
+
+        assert diff == {
+            "added": ["infrastructure"],
+            "removed": [],
+            "changed": {"districts.south": [2, 5]},
+        }
+
+    def test_generator_tree(self):
+        """Test generators record every derived path, even after eviction."""
+        manager = CitySeedManager(1, seed_cache_size=1)
+        seeds = {path: manager.generator.get_seed(path) for path in ["a.b", "a", "c"]}
+
+        assert dict(manager.generator.tree.paths()) == seeds
+        assert manager.export_seed_tree()["tree"]["segments"] == ["a", "c", "b"]
+        root = manager.generator.tree.to_seed_node(1)
+        assert root.children["a"].children["b"].seed == seeds["a.b"]
+
+        diff = manager.diff_seed_tree(2)
+        assert sorted(diff["changed"]) == sorted(seeds)
+
+    def test_children_keep_insertion_order(self):
+        """Test children are appended in order under a wide parent."""
+        tree = SeedTree()
+        for i in range(1000):
+            tree.insert(f"districts.d{i}", i)
+            tree.insert(f"districts.d{i}.zones", i)
+
+        assert [path for path, _ in tree.paths("districts")][:4] == [
+            "districts.d0",
+            "districts.d0.zones",
+            "districts.d1",
+            "districts.d1.zones",
+        ]
+        assert tree.export("districts", max_depth=1)["segments"][-1] == "d999"
+
+    def test_untracked_paths(self):
+        """Test generators can skip recording derived paths."""
+        manager = create_city_seed_manager(
+            {"seed": 1, "seed_cache_size": 4, "track_seed_paths": False}
+        )
+        generator = manager.generator
+        seeds = [generator.get_seed(f"zones.z{i}") for i in range(100)]
+
+        assert len(generator.tree) == 0
+        assert len(generator._seed_cache) <= 4
+        assert seeds[0] == HierarchicalSeedGenerator(1).get_seed("zones.z0")
+        assert not manager.create_city_variation(
+            "density", "high"
+        ).generator.track_paths
+
+
+class TestLRUCache:
+    """Test cases for LRUCache class."""
+
+    def test_eviction_order(self):
+        """Test the least recently used entry is evicted first."""
+        evicted = []
+        cache = LRUCache(2, lambda key, value: evicted.append(key))
+        cache["a"] = 1
+        cache["b"] = 2
+        cache.get("a")
+        cache["c"] = 3
+
+        assert evicted == ["b"]
+        assert list(cache) == ["a", "c"]
+        assert cache.stats() == {
+            "size": 2,
+            "maxsize": 2,
+            "hits": 1,
+            "misses": 0,
+            "evictions": 1,
+        }
+
+
+class TestCitySeedManager:
+    """Test cases for CitySeedManager class."""
+
+    def test_cache_options_from_config(self):
+        """Test cache options are taken from the config and kept by variations."""
+        manager = create_city_seed_manager(
+            {"seed": 5, "rng_cache_size": 4, "rng_eviction_policy": "fresh"}
+        )
+        variation = manager.create_city_variation("density", "high")
+
+        assert variation.generator.rng_cache_size == 4
+        assert variation.generator.rng_eviction_policy == "fresh"
+        assert manager.generator.settings() == variation.generator.settings()
+
+    def test_derivation_version_from_config(self):
+        """Test the derivation version is taken from the config and kept."""
+        manager = create_city_seed_manager({"seed": 5, "seed_derivation_version": 2})
+        variant = manager.create_city_variation("layout", "grid", ["districts.a"])
+        branch = variant.generator._branch_generators["districts.a"]
+
+        assert variant.generator.derivation_version == 2
+        assert branch.derivation_version == 2
+        assert variant.generator.get_seed("districts") == manager.generator.get_seed(
+            "districts"
+        )
+
+    def test_branch_variation(self):
+        """Test a branch variation only changes seeds under that branch."""
+        manager = CitySeedManager(5)
+        variant = manager.create_city_variation("layout", "grid", ["districts.a"])
+        base, varied = manager.generator, variant.generator
+
+        assert varied.master_seed == base.master_seed
+        assert varied.get_seed("districts.a") != base.get_seed("districts.a")
+        assert varied.get_seed("districts.a.zones") != base.get_seed(
+            "districts.a.zones"
+        )
+        assert varied.get_seed("districts.ab") == base.get_seed("districts.ab")
+        assert varied.get_seed("districts") == base.get_seed("districts")
+        assert varied.overridden_branch("districts.a.zones.park") == "districts.a"
+        assert varied.overridden_branch("districts.ab") is None
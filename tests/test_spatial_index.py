@@ -0,0 +1,84 @@
+"""
+Tests for Metro spatial index.
+"""
+
+import numpy as np
+import pytest
+
+from metro.city_simulator import CitySimulator
+from metro.spatial_index import SpatialIndex
+
+
+@pytest.fixture
+def rectangles():
+    """Random rectangles, some overlapping, over a 50 km square."""
+    rng = np.random.default_rng(1)
+    return (
+        rng.uniform(0, 50, 2000),
+        rng.uniform(0, 50, 2000),
+        rng.uniform(0.1, 3, 2000),
+        rng.uniform(0.1, 3, 2000),
+    )
+
+
+class TestSpatialIndex:
+    """Test cases for SpatialIndex class."""
+
+    def test_query_points(self, rectangles):
+        """Test batched point queries match a linear scan."""
+        x, y, w, h = rectangles
+        index = SpatialIndex(x, y, w, h)
+        rng = np.random.default_rng(2)
+        px, py = rng.uniform(-5, 55, 500), rng.uniform(-5, 55, 500)
+
+        offsets, indices = index.query_points(px, py)
+        for p in range(500):
+            inside = (x <= px[p]) & (px[p] <= x + w) & (y <= py[p]) & (py[p] <= y + h)
+            assert indices[offsets[p] : offsets[p + 1]].tolist() == (
+                np.flatnonzero(inside).tolist()
+            )
+        assert index.query_point(px[0], py[0]).tolist() == (
+            indices[offsets[0] : offsets[1]].tolist()
+        )
+
+    def test_query_window(self, rectangles):
+        """Test window queries match a linear scan."""
+        x, y, w, h = rectangles
+        index = SpatialIndex(x, y, w, h, cell_size=4.0)
+
+        for x0, y0, x1, y1 in [(10, 10, 12, 30), (-5, -5, 0.5, 0.5), (60, 0, 70, 9)]:
+            hit = (x <= x1) & (x0 <= x + w) & (y <= y1) & (y0 <= y + h)
+            assert index.query_window(x0, y0, x1, y1).tolist() == (
+                np.flatnonzero(hit).tolist()
+            )
+
+    def test_nearest(self, rectangles):
+        """Test k-nearest queries match sorting all distances."""
+        index = SpatialIndex(*rectangles)
+        rng = np.random.default_rng(3)
+        px, py = rng.uniform(-20, 70, 50), rng.uniform(-20, 70, 50)
+
+        batch = index.nearest_batch(px, py, k=5)
+        for p in range(50):
+            distances = index.distances(px[p], py[p])
+            expected = np.lexsort((np.arange(len(index)), distances))[:5]
+            assert batch[p].tolist() == expected.tolist()
+        batch = index.nearest_batch(px, py, k=40)
+        for p in range(50):
+            assert batch[p].tolist() == index.nearest(px[p], py[p], 40).tolist()
+
+        assert SpatialIndex([0], [0], [1], [1]).nearest_batch([5], [5], 2).tolist() == (
+            [[0, -1]]
+        )
+
+    def test_simulator_index(self):
+        """Test the simulator indexes the current layout."""
+        simulator = CitySimulator({"seed": 42})
+        layout = simulator.simulate_city(600000, 10.0)
+        index = simulator.spatial_index("districts")
+
+        assert simulator.spatial_index("districts") is index
+        district = layout.districts[2]
+        assert 2 in index.query_point(district.x, district.y)
+        with pytest.raises(ValueError):
+            simulator.spatial_index("roads")
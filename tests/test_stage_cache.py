@@ -0,0 +1,98 @@
+"""
+Tests for Metro simulation stage cache.
+"""
+
+import os
+import zlib
+
+from metro.city_simulator import CitySimulator
+from metro.stage_cache import StageCache
+
+
+class TestStageCache:
+    """Test cases for StageCache class."""
+
+    def test_round_trip(self, tmp_path):
+        """Test values are stored and keyed by every input."""
+        cache = StageCache(tmp_path)
+        key = cache.key("districts", "districts", 1, {"population": 10})
+        cache.put(key, [{"x": 1.5}])
+
+        assert cache.get(key) == [{"x": 1.5}]
+        assert cache.key("districts", "districts", 2, {"population": 10}) != key
+        assert cache.key("districts", "districts", 1, {"population": 11}) != key
+        assert cache.get("missing", "default") == "default"
+        assert cache.stats()["hits"] == 1
+
+    def test_eviction(self, tmp_path):
+        """Test the least recently used entries are evicted past the limit."""
+        cache = StageCache(tmp_path, max_bytes=2500)
+        for i in range(3):
+            cache.put(f"k{i}", os.urandom(1000))
+            os.utime(tmp_path / f"k{i}.stage", ns=(i * 10**9, i * 10**9))
+
+        assert cache.get("k0") is None
+        assert cache.get("k2") is not None
+        assert cache.size_bytes() <= 2500
+        assert cache.evictions == 1
+
+    def test_simulator_reuse(self, tmp_path):
+        """Test a cached simulation matches an uncached one."""
+        config = {"seed": 9, "population": 150000}
+        expected = CitySimulator(config)
+        expected.simulate_city(150000, 10.0)
+
+        cache = StageCache(tmp_path)
+        for _ in range(2):
+            simulator = CitySimulator(config, stage_cache=cache)
+            simulator.simulate_city(150000, 10.0)
+            assert simulator.city_layout == expected.city_layout
+            assert simulator.population_model.histogram == (
+                expected.population_model.histogram
+            )
+
+        assert cache.stats()["hits"] == 5
+
+    def test_consecutive_runs(self, tmp_path):
+        """Test repeated runs on one simulator match with and without a cache."""
+        config = {"seed": 11, "population": 150000}
+        expected = CitySimulator(config)
+        cached = CitySimulator(config, stage_cache=StageCache(tmp_path))
+
+        for _ in range(3):
+            expected.simulate_city(150000, 10.0)
+            cached.simulate_city(150000, 10.0)
+            assert cached.city_layout == expected.city_layout
+
+        again = CitySimulator(config, stage_cache=StageCache(tmp_path))
+        for _ in range(3):
+            again.simulate_city(150000, 10.0)
+        assert again.city_layout == expected.city_layout
+        assert again.stage_cache.stats()["hits"] == 15
+
+    def test_unreadable_entry(self, tmp_path):
+        """Test entries that fail to unpickle are treated as misses."""
+        cache = StageCache(tmp_path)
+        key = cache.key("districts", "districts", 1, {})
+        cache.put(key, [1, 2])
+        path = tmp_path / f"{key}.stage"
+        # A pickled reference to a class that no longer exists
+        path.write_bytes(zlib.compress(b"cmetro.missing\nGone\n."))
+
+        assert cache.get(key, "default") == "default"
+        path.write_bytes(path.read_bytes()[:5])
+        assert cache.get(key, "default") == "default"
+        assert cache.stats()["misses"] == 2
+
+    def test_seed_tree_independent_of_cache(self, tmp_path):
+        """Test cache hits derive the same seed paths as a cold run."""
+        config = {"seed": 9, "population": 150000}
+        expected = CitySimulator(config)
+        expected.simulate_city(150000, 10.0)
+        exported = expected.export_city_data()["seed_tree"]
+
+        cache = StageCache(tmp_path)
+        for _ in range(2):
+            simulator = CitySimulator(config, stage_cache=cache)
+            simulator.simulate_city(150000, 10.0)
+            assert simulator.export_city_data()["seed_tree"] == exported
@@ -0,0 +1,137 @@
+"""
+Tests for Metro travel demand.
+"""
+
+import numpy as np
+import pytest
+
+from metro.city_simulator import CitySimulator, Zone
+from metro.travel_demand import gravity_model, zone_attractions
+
+
+@pytest.fixture(scope="module")
+def simulator():
+    """A simulated 1M city."""
+    simulator = CitySimulator({"seed": 42})
+    simulator.simulate_city(1000000)
+    return simulator
+
+
+class TestTravelDemand:
+    """Test cases for the gravity model."""
+
+    @pytest.mark.parametrize("costs", ["euclidean", "network"])
+    def test_dense_balanced(self, simulator, costs):
+        """Test dense flows meet both productions and attractions."""
+        od = simulator.travel_demand(costs)
+        zones = simulator.city_layout.zones
+
+        assert od.converged
+        assert od.zone_ids == [zone.id for zone in zones]
+        assert od.to_dense().shape == (len(zones), len(zones))
+        assert od.row_sums() == pytest.approx(od.productions, rel=1e-5)
+        assert od.column_sums() == pytest.approx(od.attractions, rel=1e-5)
+        assert od.productions.sum() == pytest.approx(od.attractions.sum())
+        assert 0 < od.productions.sum() < sum(z.population for z in zones)
+
+    def test_network_costs_with_hierarchy(self, simulator):
+        """Test the batched hierarchy query gives the per-origin Dijkstra flows."""
+        zones = simulator.city_layout.zones
+        network = simulator.road_network()
+        expected = gravity_model(zones, 0.5, costs="network", network=network)
+        od = gravity_model(
+            zones,
+            0.5,
+            costs="network",
+            network=network,
+            hierarchy=simulator.contraction_hierarchy("length"),
+        )
+
+        assert od.flows == pytest.approx(expected.flows)
+        with pytest.raises(ValueError, match="by length"):
+            gravity_model(
+                zones,
+                0.5,
+                costs="network",
+                network=network,
+                hierarchy=simulator.contraction_hierarchy("time"),
+            )
+
+    def test_distance_decay(self):
+        """Test nearer destinations attract more of an origin's commuters."""
+        zones = [
+            Zone("west", "d", "residential", 1.0, 1000, 1000, 0, 0, 1, 1, 0),
+            Zone("east", "d", "residential", 1.0, 1000, 1000, 10, 0, 1, 1, 0),
+            Zone("west_work", "d", "commercial", 1.0, 0, 0, 2, 0, 1, 1, 0),
+            Zone("east_work", "d", "commercial", 1.0, 0, 0, 8, 0, 1, 1, 0),
+        ]
+        flows = gravity_model(zones, 0.5).to_dense()
+
+        assert flows.sum(axis=1)[:2] == pytest.approx([500, 500])
+        assert flows[0, 2] > flows[0, 3] > 0
+        assert flows[1, 3] > flows[1, 2] > 0
+        assert zone_attractions(zones, 10.0) == pytest.approx(
+            [0.05 / 2.1 * 10, 0.05 / 2.1 * 10, 10 / 2.1, 10 / 2.1]
+        )
+        assert zone_attractions(zones, 10.0, {"residential": 0.0}) == pytest.approx(
+            [0, 0, 5, 5]
+        )
+        assert len(zone_attractions([], 10.0)) == 0
+
+    def test_top_k(self, simulator):
+        """Test the sparse mode keeps nearest pairs and still balances."""
+        dense = simulator.travel_demand()
+        everything = simulator.travel_demand(top_k=len(dense.zone_ids))
+        assert everything.to_dense() == pytest.approx(dense.to_dense())
+
+        sparse = simulator.travel_demand(top_k=40)
+        n = len(sparse.zone_ids)
+        assert sparse.converged
+        assert len(sparse.flows) < n * n
+        assert sparse.row_sums() == pytest.approx(sparse.productions, rel=1e-5)
+        assert sparse.column_sums() == pytest.approx(sparse.attractions, rel=1e-5)
+
+        # Pairs include every origin's 40 nearest zones with jobs and every
+        # destination's 40 nearest zones with commuters, and nothing else
+        origins = np.repeat(np.arange(n), np.diff(sparse.indptr))
+        pairs = set(zip(origins.tolist(), sparse.indices.tolist()))
+        producing = np.flatnonzero(sparse.productions > 0)
+        attracting = np.flatnonzero(sparse.attractions > 0)
+        assert len(attracting) < n
+        zones = simulator.city_layout.zones
+        cx = np.array([z.x + z.width / 2 for z in zones])
+        cy = np.array([z.y + z.height / 2 for z in zones])
+        expected = set()
+        for queries, candidates, flip in [
+            (producing, attracting, False),
+            (attracting, producing, True),
+        ]:
+            for i in queries.tolist():
+                distances = np.hypot(cx[candidates] - cx[i], cy[candidates] - cy[i])
+                nearest = candidates[np.lexsort((candidates, distances))[:40]]
+                expected |= {(j, i) if flip else (i, j) for j in nearest.tolist()}
+        assert pairs == expected
+
+    def test_top_k_skips_zones_without_jobs(self):
+        """Test origins surrounded by parks still reach zones with jobs."""
+        zones = [
+            Zone("home", "d", "residential", 1.0, 1000, 1000, 0, 0, 1, 1, 0),
+            Zone("park_east", "d", "park", 1.0, 0, 0, 2, 0, 1, 1, 0),
+            Zone("park_north", "d", "park", 1.0, 0, 0, 0, 2, 1, 1, 0),
+            Zone("park_west", "d", "park", 1.0, 0, 0, -2, 0, 1, 1, 0),
+            Zone("work", "d", "commercial", 1.0, 0, 0, 10, 0, 1, 1, 0),
+        ]
+        od = gravity_model(zones, 0.5, {"residential": 0.0}, top_k=2)
+
+        assert od.converged
+        assert od.row_sums() == pytest.approx(od.productions)
+        assert od.column_sums() == pytest.approx(od.attractions)
+        assert od.to_dense()[0, 4] == pytest.approx(500)
+
+    def test_invalid_costs(self, simulator):
+        """Test unknown cost modes and missing networks are rejected."""
+        zones = simulator.city_layout.zones
+        with pytest.raises(ValueError, match="Unknown costs"):
+            gravity_model(zones, 0.5, costs="manhattan")
+        with pytest.raises(ValueError, match="road network"):
+            gravity_model(zones, 0.5, costs="network")